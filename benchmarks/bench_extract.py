@@ -0,0 +1,106 @@
+"""
+Per-page CPU cost of page feature extraction: the previous BeautifulSoup
+walks vs the one-pass lxml extractor (utils/extract.py).
+
+Usage:
+    python benchmarks/bench_extract.py [CORPUS_DIR] [--pages N] [--repeat R]
+
+CORPUS_DIR is a directory of saved .html pages (searched recursively). Without
+it, N synthetic pages of varying size are generated.
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+from advanced_seo_mcp.utils.extract import extract_page  # noqa: E402
+
+WORDS = "seo audit page speed content crawl index link schema search ranking keyword meta title".split()
+
+def synthetic_page(rng: random.Random) -> bytes:
+    sections = rng.randint(3, 60)
+    body = []
+    for i in range(sections):
+        level = rng.randint(1, 4)
+        words = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(20, 200)))
+        links = ''.join(f'<a href="/p{rng.randint(0, 9999)}.html">link {j}</a> ' for j in range(rng.randint(0, 15)))
+        alt = ' alt="figure"' if rng.random() < 0.5 else ''
+        img = f'<img src="/img{i}.png"{alt}>'
+        body.append(f'<section><h{level}>Section {i}</h{level}><div><p>{words}</p><p>{links}</p>{img}</div></section>')
+    schema = json.dumps({"@context": "https://schema.org", "@type": "Article", "headline": "Bench"})
+    return (
+        '<!doctype html><html><head><meta charset="utf-8"><title>Synthetic benchmark page title</title>'
+        '<meta name="description" content="A synthetic page used to benchmark extraction.">'
+        '<meta name="robots" content="index, follow"><link rel="canonical" href="https://example.com/p">'
+        f'<script type="application/ld+json">{schema}</script><style>body{{margin:0}}</style></head>'
+        f'<body><nav><a href="/">Home</a></nav>{"".join(body)}<script>var x = 1;</script></body></html>'
+    ).encode('utf-8')
+
+def legacy_extract(content: bytes) -> int:
+    """The tree walks previously done by the on-page, schema, link and content analyzers."""
+    soup = BeautifulSoup(content, 'lxml')
+    title = soup.title.string if soup.title else None
+    desc_tag = soup.find('meta', attrs={'name': 'description'})
+    _ = desc_tag.get('content') if desc_tag else None
+    _ = soup.find('link', rel='canonical')['href'] if soup.find('link', rel='canonical') else None
+    _ = soup.find('meta', attrs={'name': 'robots'})['content'] if soup.find('meta', attrs={'name': 'robots'}) else None
+    headings = {f'h{i}': [t.get_text(strip=True) for t in soup.find_all(f'h{i}')] for i in range(1, 7)}
+    words = len(soup.get_text(separator=' ', strip=True).split())
+    _ = [a['href'] for a in soup.find_all('a', href=True)]
+    _ = [img.get('src') for img in soup.find_all('img') if not img.get('alt')]
+    _ = [s.string for s in soup.find_all('script', type='application/ld+json')]
+    _ = soup.get_text()
+    return words
+
+def onepass_extract(content: bytes) -> int:
+    return len(extract_page(content).text.split())
+
+def measure(fn, pages, repeat):
+    per_page = []
+    for content in pages:
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.process_time()
+            fn(content)
+            best = min(best, time.process_time() - started)
+        per_page.append(best * 1000)
+    return per_page
+
+def summarize(name, samples):
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(f"{name:>10}: mean {statistics.mean(samples):7.2f} ms  median {statistics.median(samples):7.2f} ms  p95 {p95:7.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", nargs="?", help="Directory of .html files")
+    parser.add_argument("--pages", type=int, default=200, help="Synthetic pages when no corpus is given")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per page (best is kept)")
+    args = parser.parse_args()
+
+    if args.corpus:
+        pages = [p.read_bytes() for p in sorted(Path(args.corpus).rglob("*.htm*"))]
+    else:
+        rng = random.Random(42)
+        pages = [synthetic_page(rng) for _ in range(args.pages)]
+    if not pages:
+        sys.exit("No pages found.")
+
+    mismatched = sum(1 for c in pages if legacy_extract(c) != onepass_extract(c))
+    print(f"{len(pages)} pages, {sum(map(len, pages)) / len(pages) / 1024:.1f} KiB average, "
+          f"{mismatched} with differing word counts")
+
+    legacy = measure(legacy_extract, pages, args.repeat)
+    onepass = measure(onepass_extract, pages, args.repeat)
+    summarize("bs4", legacy)
+    summarize("one-pass", onepass)
+    print(f"   speedup: {sum(legacy) / sum(onepass):.1f}x total CPU")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+Offline end-to-end benchmarks for the main providers against a local
+fixture site (benchmarks/fixture_site.py), with the PSI, Ahrefs and
+CapSolver APIs replaced by local stand-ins. No network access is needed.
+
+Each scenario runs in its own interpreter with a fresh cache directory, so
+peak memory is per scenario and the first call in each is a cold-cache call.
+Later calls in the same scenario see the warm caches, as they would in a
+long-running server.
+
+Scenarios:
+    onpage      analyze_onpage over --pages pages, --concurrency at a time
+    sitemap     audit_sitemap over the nested sitemap (limit=--pages), --repeat runs
+    links       check_broken_links on --pages/10 pages (404, 301 and slow links)
+    technical   check_technical_health, 5 x --repeat calls
+    report      generate_markdown_report with Ahrefs stages, --repeat runs
+    startup     spawn the MCP server over stdio until its first onpage_audit
+                response, --repeat times (time to first tool response)
+
+Results are compared with the stored baseline (benchmarks/baselines.json by
+default). Record one on the machine you compare on:
+
+    python benchmarks/bench_providers.py --save-baseline
+    python benchmarks/bench_providers.py            # exits 1 on regression
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE))
+from fixture_site import FixtureSite  # noqa: E402
+
+SCENARIOS = ("onpage", "sitemap", "links", "technical", "report", "startup")
+# Metric -> True if higher is better
+COMPARED = {"throughput": True, "p95_ms": False, "peak_rss_mb": False}
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError: # Windows
+        return None
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+# --- Child side: one scenario per process ---
+
+async def _timed(latencies, coro):
+    started = time.perf_counter()
+    result = await coro
+    latencies.append((time.perf_counter() - started) * 1000)
+    return result
+
+async def _run_scenario(name, base_url, pages, concurrency, repeat):
+    from advanced_seo_mcp.providers.link_inspector import check_broken_links
+    from advanced_seo_mcp.providers.onpage_analyzer import analyze_onpage
+    from advanced_seo_mcp.providers.reporter import generate_markdown_report
+    from advanced_seo_mcp.providers.sitemap_auditor import audit_sitemap
+    from advanced_seo_mcp.providers.technical_auditor import check_technical_health
+
+    latencies = []
+    errors = 0
+    gate = asyncio.Semaphore(concurrency)
+
+    async def bounded(coro):
+        async with gate:
+            return await _timed(latencies, coro)
+
+    if name == "onpage":
+        results = await asyncio.gather(*(bounded(analyze_onpage(f"{base_url}/p/{n}")) for n in range(pages)))
+        errors = sum(1 for r in results if "error" in r)
+        items, unit = pages, "pages"
+    elif name == "sitemap":
+        for _ in range(repeat):
+            r = await _timed(latencies, audit_sitemap(base_url, limit=pages, concurrency=concurrency, include_raw=False))
+            errors += r.get("failed", 0) if "error" not in r else pages
+        items, unit = pages * repeat, "pages"
+    elif name == "links":
+        count = max(1, pages // 10)
+        results = await asyncio.gather(*(bounded(check_broken_links(f"{base_url}/p/{n}", limit=50)) for n in range(count)))
+        errors = sum(1 for r in results if "error" in r)
+        items, unit = count, "pages"
+    elif name == "technical":
+        for _ in range(repeat * 5):
+            r = await _timed(latencies, check_technical_health(base_url))
+            errors += "error" in r
+        items, unit = repeat * 5, "calls"
+    elif name == "startup":
+        from fastmcp import Client
+        from fastmcp.client.transports import StdioTransport
+
+        for _ in range(repeat):
+            transport = StdioTransport(sys.executable, ["-m", "advanced_seo_mcp.server"], env=dict(os.environ))
+            started = time.perf_counter()
+            async with Client(transport) as client:
+                r = await client.call_tool("onpage_audit", {"url": f"{base_url}/p/0"}, raise_on_error=False)
+                latencies.append((time.perf_counter() - started) * 1000)
+                errors += bool(r.is_error)
+        items, unit = repeat, "starts"
+    elif name == "report":
+        for _ in range(repeat):
+            path = await _timed(latencies, generate_markdown_report(base_url))
+            errors += not str(path).endswith(".md")
+        items, unit = repeat, "reports"
+    else:
+        raise ValueError(f"Unknown scenario '{name}'")
+    return latencies, items, unit, errors
+
+def run_child(args):
+    started = time.perf_counter()
+    latencies, items, unit, errors = asyncio.run(
+        _run_scenario(args.child, args.base_url, args.pages, args.concurrency, args.repeat))
+    wall = time.perf_counter() - started
+    print(json.dumps({
+        "items": items,
+        "unit": unit,
+        "errors": errors,
+        "seconds": round(wall, 3),
+        "throughput": round(items / wall, 2),
+        "first_ms": round(latencies[0], 1),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "peak_rss_mb": peak_rss_mb(),
+    }))
+
+# --- Parent side: fixture, scenarios, baseline comparison ---
+
+def run_scenario(name, site, args):
+    with tempfile.TemporaryDirectory(prefix="seo-bench-") as home:
+        env = dict(
+            os.environ,
+            HOME=home,
+            PYTHONPATH=os.pathsep.join(filter(None, [str(HERE.parent / "src"), os.environ.get("PYTHONPATH")])),
+            GOOGLE_PSI_API_KEY="bench",
+            GOOGLE_PSI_API_URL=f"{site.base_url}/psi/runPagespeed",
+            AHREFS_API_URL=f"{site.base_url}/ahrefs/v4",
+            CAPSOLVER_API_KEY="bench",
+            CAPSOLVER_API_URL=f"{site.base_url}/capsolver",
+            CAPSOLVER_POOL_SIZE="0",
+        )
+        cmd = [sys.executable, str(Path(__file__).resolve()), "--child", name, "--base-url", site.base_url,
+               "--pages", str(args.pages), "--concurrency", str(args.concurrency), "--repeat", str(args.repeat)]
+        proc = subprocess.run(cmd, env=env, cwd=home, capture_output=True, text=True)
+    if proc.returncode != 0:
+        sys.exit(f"Scenario '{name}' failed:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def compare(name, result, baseline, tolerance):
+    """Returns a list of regression descriptions for one scenario."""
+    regressions = []
+    for metric, higher_is_better in COMPARED.items():
+        old, new = baseline.get(metric), result.get(metric)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        if (change < -tolerance) if higher_is_better else (change > tolerance):
+            regressions.append(f"{name}.{metric}: {old} -> {new} ({change:+.0%})")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scenarios", nargs="*", default=list(SCENARIOS), help=f"Subset of {', '.join(SCENARIOS)}")
+    parser.add_argument("--pages", type=int, default=200, help="Pages per scenario (and sitemap size)")
+    parser.add_argument("--page-kb", type=int, default=30, help="Approximate page size in KiB")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", type=Path, default=HERE / "baselines.json")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative regression (0.15 = 15%%)")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return run_child(args)
+
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        sys.exit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    config = {"pages": args.pages, "page_kb": args.page_kb, "concurrency": args.concurrency, "repeat": args.repeat}
+    stored = json.loads(args.baseline.read_text()) if args.baseline.exists() else None
+    if stored and stored.get("config") != config:
+        print(f"Baseline was recorded with {stored.get('config')}; not comparing.")
+        stored = None
+
+    results = {}
+    with FixtureSite(pages=args.pages, page_kb=args.page_kb) as site:
+        print(f"{'scenario':>10} {'items/s':>9} {'first':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'peak RSS':>9}  errors")
+        for name in args.scenarios:
+            r = results[name] = run_scenario(name, site, args)
+            print(f"{name:>10} {r['throughput']:>9.2f} {r['first_ms']:>7.0f}ms {r['p50_ms']:>7.0f}ms "
+                  f"{r['p95_ms']:>7.0f}ms {r['p99_ms']:>7.0f}ms {r['peak_rss_mb'] or 0:>7.1f}MB  {r['errors']}")
+
+    if args.save_baseline:
+        scenarios = dict(stored["scenarios"]) if stored else {}
+        scenarios.update(results)
+        args.baseline.write_text(json.dumps({"config": config, "scenarios": scenarios}, indent=2) + "\n")
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if not stored:
+        print("No baseline to compare with (run with --save-baseline).")
+        return
+    regressions = []
+    for name, result in results.items():
+        if name in stored["scenarios"]:
+            regressions += compare(name, result, stored["scenarios"][name], args.tolerance)
+    if regressions:
+        print("Regressions beyond tolerance:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"No regressions beyond {args.tolerance:.0%} of the baseline.")
+
+if __name__ == "__main__":
+    main()
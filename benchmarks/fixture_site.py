@@ -0,0 +1,256 @@
+"""
+Local HTTP fixture for the offline benchmarks: a synthetic site plus
+stand-ins for the PageSpeed Insights, Ahrefs and CapSolver APIs.
+
+Everything is generated deterministically from the page number, so runs are
+comparable. Served paths:
+
+    /robots.txt                  allows everything, points at /sitemap.xml
+    /sitemap.xml                 sitemap index -> nested indexes -> urlsets
+    /p/<n>                       page <n> (~page_kb KiB, links to other pages)
+    /missing/<n>                 404 (broken link)
+    /r/<n>                       301 -> /p/<n> (redirecting link)
+    /slow/<n>                    200 after slow_delay seconds
+    /psi/runPagespeed            PSI-shaped Lighthouse result
+    /ahrefs/v4/<endpoint>        Ahrefs free-tools-shaped responses
+    /capsolver/<method>          CapSolver createTask/getTaskResult
+
+Run it standalone to poke at it:
+    python benchmarks/fixture_site.py --pages 1000 --port 8900
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+WORDS = ("seo audit page speed content crawl index link schema search ranking keyword meta "
+         "title product category review price guide tutorial checklist shipping").split()
+
+class FixtureSite:
+    """
+    Serves the synthetic site from a background thread.
+
+    Args:
+        pages: Pages listed in the sitemap.
+        page_kb: Approximate HTML size of each page in KiB.
+        links_per_page: Internal links to other pages on each page.
+        urls_per_sitemap: URLs per urlset file (controls how many sitemaps are nested).
+        slow_every: Every Nth page (and each /slow/ link) is delayed; 0 disables.
+        slow_delay: Delay in seconds for slow responses.
+        api_delay: Simulated latency of the PSI/Ahrefs/CapSolver stand-ins.
+        port: Port to bind (0 picks a free one).
+    """
+
+    def __init__(self, pages: int = 500, page_kb: int = 30, links_per_page: int = 20,
+                 urls_per_sitemap: int = 200, slow_every: int = 50, slow_delay: float = 0.3,
+                 api_delay: float = 0.05, port: int = 0):
+        self.pages = pages
+        self.page_kb = page_kb
+        self.links_per_page = links_per_page
+        self.urls_per_sitemap = urls_per_sitemap
+        self.slow_every = slow_every
+        self.slow_delay = slow_delay
+        self.api_delay = api_delay
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def page_url(self, n: int) -> str:
+        return f"{self.base_url}/p/{n}"
+
+    def start(self) -> "FixtureSite":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # --- Site content ---
+
+    def sitemap(self, path: str) -> str:
+        files = max(1, -(-self.pages // self.urls_per_sitemap))
+        ns = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+        if path == "/sitemap.xml":
+            # Root index -> one nested index per 10 urlsets
+            nested = -(-files // 10)
+            entries = ''.join(f"<sitemap><loc>{self.base_url}/sitemaps/index-{i}.xml</loc></sitemap>" for i in range(nested))
+            return f'<?xml version="1.0" encoding="UTF-8"?><sitemapindex {ns}>{entries}</sitemapindex>'
+        name = path.rsplit('/', 1)[-1][:-4]
+        kind, _, num = name.partition('-')
+        i = int(num)
+        if kind == "index":
+            entries = ''.join(f"<sitemap><loc>{self.base_url}/sitemaps/urls-{j}.xml</loc></sitemap>"
+                              for j in range(i * 10, min(files, i * 10 + 10)))
+            return f'<?xml version="1.0" encoding="UTF-8"?><sitemapindex {ns}>{entries}</sitemapindex>'
+        start = i * self.urls_per_sitemap
+        entries = ''.join(f"<url><loc>{self.page_url(n)}</loc><lastmod>2026-01-{n % 28 + 1:02d}</lastmod></url>"
+                          for n in range(start, min(self.pages, start + self.urls_per_sitemap)))
+        return f'<?xml version="1.0" encoding="UTF-8"?><urlset {ns}>{entries}</urlset>'
+
+    def page(self, n: int) -> bytes:
+        return _render_page(n, self.pages, self.page_kb, self.links_per_page)
+
+    def is_slow(self, n: int) -> bool:
+        return bool(self.slow_every) and n % self.slow_every == self.slow_every - 1
+
+@lru_cache(maxsize=4096)
+def _render_page(n: int, total: int, page_kb: int, links_per_page: int) -> bytes:
+    rng = random.Random(n)
+    links = [f'<a href="/p/{rng.randrange(total)}">Related {k}</a>' for k in range(links_per_page)]
+    links += [f'<a href="/missing/{n}">Old page</a>', f'<a href="/r/{n}">Moved page</a>',
+              f'<a href="/slow/{n}">Slow page</a>', '<a href="#top">Top</a>']
+    schema = json.dumps({"@context": "https://schema.org", "@type": "Article", "headline": f"Page {n}",
+                         "author": {"@type": "Person", "name": "Bench"}})
+    head = (f'<!doctype html><html lang="en"><head><meta charset="utf-8"><title>Synthetic page {n} about '
+            f'{rng.choice(WORDS)} and {rng.choice(WORDS)}</title>'
+            f'<meta name="description" content="Benchmark page {n} describing {rng.choice(WORDS)} topics in detail.">'
+            f'<link rel="canonical" href="/p/{n}"><script type="application/ld+json">{schema}</script></head>')
+    body = [f'<body><header><nav><a href="/">Home</a> <a href="/p/0">Start</a></nav></header><main>'
+            f'<h1>Page {n}</h1><p>{" ".join(links)}</p>']
+    size = len(head) + len(body[0])
+    section = 0
+    while size < page_kb * 1024:
+        text = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(60, 160)))
+        alt = ' alt="figure"' if section % 2 else ''
+        part = f'<h2>Section {section}</h2><p>{text}</p><img src="/img/{n}-{section}.png"{alt}>'
+        body.append(part)
+        size += len(part)
+        section += 1
+    body.append('</main><footer>Fixture site</footer></body></html>')
+    return (head + ''.join(body)).encode('utf-8')
+
+# --- API stand-ins ---
+
+def _psi_result() -> dict:
+    return {
+        "lighthouseResult": {
+            "categories": {"performance": {"score": 0.87}, "seo": {"score": 0.92}},
+            "audits": {
+                "largest-contentful-paint": {"displayValue": "2.1 s"},
+                "first-contentful-paint": {"displayValue": "1.2 s"},
+                "cumulative-layout-shift": {"displayValue": "0.03"},
+                "interaction-to-next-paint": {"displayValue": "180 ms"},
+                # Real screenshots are ~50-100 KB of base64
+                "final-screenshot": {"details": {"data": "data:image/jpeg;base64," + "A" * 60000}},
+            },
+        }
+    }
+
+def _ahrefs_result(endpoint: str) -> list:
+    valid_until = (datetime.now(timezone.utc) + timedelta(hours=1)).isoformat().replace('+00:00', 'Z')
+    if endpoint == "stGetFreeBacklinksOverview":
+        return ["Ok", {"signedInput": {"signature": "bench-signature", "input": {"validUntil": valid_until}},
+                       "data": {"domainRating": 42, "backlinks": 1234, "refdomains": 321}}]
+    if endpoint == "stGetFreeBacklinksList":
+        links = [{"anchor": f"anchor {i}", "domainRating": 80 - i, "title": f"Referring page {i}",
+                  "urlFrom": f"https://ref{i}.example/post", "urlTo": "https://example.com/"} for i in range(20)]
+        return ["Ok", {"topBacklinks": {"backlinks": links}}]
+    if endpoint == "stGetFreeTrafficOverview":
+        return ["Ok", {"traffic": {"trafficMonthlyAvg": 5400, "costMontlyAvg": 1200},
+                       "top_pages": [{"url": f"https://example.com/p/{i}", "traffic": 100 - i} for i in range(10)],
+                       "top_countries": [{"country": "us", "share": 0.6}]}]
+    if endpoint == "stGetFreeKeywordIdeas":
+        ideas = [{"keyword": f"idea {i}", "country": "us", "difficultyLabel": "Easy", "volumeLabel": "1.2k"} for i in range(20)]
+        return ["Ok", {"allIdeas": {"results": ideas}, "questionIdeas": {"results": ideas[:5]}}]
+    return ["Ok", {"difficulty": 35, "serp": {"results": []}}]
+
+def _make_handler(site: FixtureSite):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, body: bytes = b"", content_type: str = "text/html; charset=utf-8",
+                  headers: dict = None):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Strict-Transport-Security", "max-age=31536000")
+            self.send_header("X-Frame-Options", "DENY")
+            self.send_header("X-Content-Type-Options", "nosniff")
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(body)
+
+        def _json(self, data):
+            self._send(200, json.dumps(data).encode(), "application/json")
+
+        def _route(self):
+            path = urlsplit(self.path).path
+            if self.command == "POST":
+                length = int(self.headers.get("Content-Length") or 0)
+                self.rfile.read(length)
+
+            if path == "/robots.txt":
+                return self._send(200, f"User-agent: *\nAllow: /\nSitemap: {site.base_url}/sitemap.xml\n".encode(), "text/plain")
+            if path == "/sitemap.xml" or path.startswith("/sitemaps/"):
+                try:
+                    return self._send(200, site.sitemap(path).encode(), "application/xml")
+                except ValueError:
+                    return self._send(404)
+            if path in ("/", "/index.html"):
+                return self._send(301, headers={"Location": "/p/0"})
+
+            head, _, tail = path.strip('/').partition('/')
+            if head in ("p", "r", "slow", "missing") and tail.isdigit():
+                n = int(tail)
+                if head == "missing" or n >= site.pages:
+                    return self._send(404, b"<html><body>Not found</body></html>")
+                if head == "r":
+                    return self._send(301, headers={"Location": f"/p/{n}"})
+                if head == "slow" or site.is_slow(n):
+                    time.sleep(site.slow_delay)
+                return self._send(200, site.page(n))
+
+            if path == "/psi/runPagespeed":
+                time.sleep(site.api_delay)
+                return self._json(_psi_result())
+            if path.startswith("/ahrefs/v4/"):
+                time.sleep(site.api_delay)
+                return self._json(_ahrefs_result(path.rsplit('/', 1)[-1]))
+            if path == "/capsolver/createTask":
+                time.sleep(site.api_delay)
+                return self._json({"errorId": 0, "taskId": "bench-task"})
+            if path == "/capsolver/getTaskResult":
+                return self._json({"errorId": 0, "status": "ready", "solution": {"token": "bench-token"}})
+            return self._send(404, b"<html><body>Not found</body></html>")
+
+        do_GET = do_HEAD = do_POST = _route
+
+    return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--page-kb", type=int, default=30)
+    parser.add_argument("--port", type=int, default=8900)
+    args = parser.parse_args()
+    site = FixtureSite(pages=args.pages, page_kb=args.page_kb, port=args.port).start()
+    print(f"Serving {args.pages} pages at {site.base_url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        site.stop()
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,74 @@
-import requests
+import functools
+import inspect
 import json
+import os
 import time
 import urllib.parse
 from datetime import datetime
 from typing import List, Optional, Any, Dict, Tuple, cast, Literal
 
 from ..utils.capsolver import get_capsolver_token
-from ..utils.cache import save_signature, get_signature
+from ..utils.cache import save_signature, get_signature, kv_get, kv_set, safe_call
+from ..utils.singleflight import SingleFlight
+from ..utils import history, http, metrics
+
+# Free-tools API root (overridable to point at a stand-in, e.g. in benchmarks)
+AHREFS_API_URL = os.environ.get("AHREFS_API_URL", "https://ahrefs.com/v4").rstrip('/')
+
+# Result cache lifetimes in seconds per endpoint (override via .env, 0 disables)
+AHREFS_CACHE_TTLS = {
+    "backlinks": float(os.environ.get("AHREFS_CACHE_TTL_BACKLINKS", 12 * 3600)),
+    "traffic": float(os.environ.get("AHREFS_CACHE_TTL_TRAFFIC", 12 * 3600)),
+    "keywords": float(os.environ.get("AHREFS_CACHE_TTL_KEYWORDS", 24 * 3600)),
+    "difficulty": float(os.environ.get("AHREFS_CACHE_TTL_DIFFICULTY", 24 * 3600)),
+}
+
+_in_flight = SingleFlight()
+
+def cached_lookup(endpoint: str, subject: str, country: Optional[str] = None, mode: Optional[str] = None):
+    """
+    Caches an Ahrefs lookup by (endpoint, subject, country, mode) and
+    coalesces concurrent identical calls into one upstream fetch (and one
+    captcha solve).
+
+    Args:
+        endpoint: Key into AHREFS_CACHE_TTLS.
+        subject: Name of the argument holding the domain or keyword.
+        country: Name of the country argument, if any.
+        mode: Name of the mode/search-engine argument, if any.
+    """
+    def decorator(fn):
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            params = bound.arguments
+            key = json.dumps([
+                endpoint,
+                str(params[subject]).strip().lower(),
+                params[country] if country else None,
+                params[mode] if mode else None,
+            ])
+            ttl = AHREFS_CACHE_TTLS[endpoint]
+            if ttl > 0:
+                cached = await safe_call(kv_get, "ahrefs", key)
+                if cached is not None:
+                    return cached
+
+            async def fetch():
+                # Includes waiting for a captcha token (also timed as "captcha_wait")
+                with metrics.stage(f"ahrefs_{endpoint}"):
+                    result = await fn(*args, **kwargs)
+                # Failed lookups (None) are not cached so they can be retried
+                if result is not None and ttl > 0:
+                    await safe_call(kv_set, "ahrefs", key, result, ttl)
+                return result
+
+            return await _in_flight.do(key, fetch)
+        return wrapper
+    return decorator
 
 def iso_to_timestamp(iso_date_string: str) -> float:
     """Converts an ISO 8601 date string to a unix timestamp."""
@@ -17,12 +79,12 @@ def iso_to_timestamp(iso_date_string: str) -> float:
 
 # --- Backlinks Logic ---
 
-def get_signature_and_overview(token: str, domain: str) -> Tuple[Optional[str], Optional[str], Optional[Dict[str, Any]]]:
+async def get_signature_and_overview(token: str, domain: str) -> Tuple[Optional[str], Optional[str], Optional[Dict[str, Any]]]:
     """
     Fetches the signed input signature and overview data from Ahrefs free tools API.
     Used internally to authenticate subsequent data requests.
     """
-    url = "https://ahrefs.com/v4/stGetFreeBacklinksOverview"
+    url = f"{AHREFS_API_URL}/stGetFreeBacklinksOverview"
     payload = {
         "captcha": token,
         "mode": "subdomains",
@@ -31,7 +93,7 @@ def get_signature_and_overview(token: str, domain: str) -> Tuple[Optional[str],
     headers = {"Content-Type": "application/json"}
     
     try:
-        response = requests.post(url, json=payload, headers=headers)
+        response = await http.post(url, json=payload, headers=headers)
         if response.status_code != 200:
             return None, None, None
         
@@ -42,13 +104,14 @@ def get_signature_and_overview(token: str, domain: str) -> Tuple[Optional[str],
             valid_until = second_element['signedInput']['input']['validUntil']
             overview_data = second_element['data']
             
-            save_signature(domain, signature, valid_until, overview_data)
+            await safe_call(save_signature, domain, signature, valid_until, overview_data)
             return signature, valid_until, overview_data
     except Exception:
         pass
     return None, None, None
 
-def get_backlinks_data(domain: str) -> Optional[Dict[str, Any]]:
+@cached_lookup("backlinks", "domain")
+async def get_backlinks_data(domain: str) -> Optional[Dict[str, Any]]:
     """
     Retrieves backlink data for a domain.
     
@@ -69,7 +132,7 @@ def get_backlinks_data(domain: str) -> Optional[Dict[str, Any]]:
         Exception: If CAPTCHA solving fails or signature cannot be retrieved.
     """
     # Try cache first
-    signature, valid_until, overview_data = get_signature(domain)
+    signature, valid_until, overview_data = await safe_call(get_signature, domain) or (None, None, None)
     
     # Check validity
     if signature and valid_until:
@@ -79,16 +142,16 @@ def get_backlinks_data(domain: str) -> Optional[Dict[str, Any]]:
 
     if not signature:
         site_url = f"https://ahrefs.com/backlink-checker/?input={domain}&mode=subdomains"
-        token = get_capsolver_token(site_url)
+        token = await get_capsolver_token(site_url)
         if not token:
             raise Exception(f"Failed to get verification token for domain: {domain}")
         
-        signature, valid_until, overview_data = get_signature_and_overview(token, domain)
+        signature, valid_until, overview_data = await get_signature_and_overview(token, domain)
         if not signature:
             raise Exception(f"Failed to get signature for domain: {domain}")
 
     # Fetch List
-    url = "https://ahrefs.com/v4/stGetFreeBacklinksList"
+    url = f"{AHREFS_API_URL}/stGetFreeBacklinksList"
     payload = {
         "reportType": "TopBacklinks",
         "signedInput": {
@@ -102,7 +165,7 @@ def get_backlinks_data(domain: str) -> Optional[Dict[str, Any]]:
     }
     headers = {"Content-Type": "application/json"}
     
-    resp = requests.post(url, json=payload, headers=headers)
+    resp = await http.post(url, json=payload, headers=headers)
     if resp.status_code != 200:
         return None
     
@@ -121,10 +184,12 @@ def get_backlinks_data(domain: str) -> Optional[Dict[str, Any]]:
                 "gov": bl.get("gov", False),
             })
 
-    return {
+    result = {
         "overview": overview_data,
         "backlinks": backlinks
     }
+    await history.record(domain, history.backlink_metrics(result))
+    return result
 
 # --- Keywords Logic ---
 
@@ -160,7 +225,8 @@ def format_keyword_ideas(keyword_data: Optional[List[Any]]) -> List[Dict[str, An
                 })
     return result
 
-def generate_keywords(keyword: str, country: str = "us", search_engine: str = "Google") -> Optional[List[Dict[str, Any]]]:
+@cached_lookup("keywords", "keyword", country="country", mode="search_engine")
+async def generate_keywords(keyword: str, country: str = "us", search_engine: str = "Google") -> Optional[List[Dict[str, Any]]]:
     """
     Generates keyword ideas and questions for a seed keyword.
     
@@ -173,11 +239,11 @@ def generate_keywords(keyword: str, country: str = "us", search_engine: str = "G
         Optional[List[Dict[str, Any]]]: A list of keyword objects containing volume, difficulty, etc.
     """
     site_url = f"https://ahrefs.com/keyword-generator/?country={country}&input={urllib.parse.quote(keyword)}"
-    token = get_capsolver_token(site_url)
+    token = await get_capsolver_token(site_url)
     if not token:
         raise Exception("Failed to get captcha token")
         
-    url = "https://ahrefs.com/v4/stGetFreeKeywordIdeas"
+    url = f"{AHREFS_API_URL}/stGetFreeKeywordIdeas"
     payload = {
         "withQuestionIdeas": True,
         "captcha": token,
@@ -186,13 +252,14 @@ def generate_keywords(keyword: str, country: str = "us", search_engine: str = "G
         "keyword": ["Some", keyword]
     }
     
-    resp = requests.post(url, json=payload, headers={"Content-Type": "application/json"})
+    resp = await http.post(url, json=payload, headers={"Content-Type": "application/json"})
     if resp.status_code != 200: return None
     return format_keyword_ideas(resp.json())
 
 # --- Traffic Logic ---
 
-def get_traffic_data(domain_or_url: str, country: str = "None", mode: str = "subdomains") -> Optional[Dict[str, Any]]:
+@cached_lookup("traffic", "domain_or_url", country="country", mode="mode")
+async def get_traffic_data(domain_or_url: str, country: str = "None", mode: str = "subdomains") -> Optional[Dict[str, Any]]:
     """
     Estimates monthly organic search traffic and traffic value.
     
@@ -205,10 +272,10 @@ def get_traffic_data(domain_or_url: str, country: str = "None", mode: str = "sub
         Optional[Dict[str, Any]]: Traffic stats and top performing pages.
     """
     site_url = f"https://ahrefs.com/traffic-checker/?input={domain_or_url}&mode={mode}"
-    token = get_capsolver_token(site_url)
+    token = await get_capsolver_token(site_url)
     if not token: raise Exception("Failed to get captcha token")
 
-    url = "https://ahrefs.com/v4/stGetFreeTrafficOverview"
+    url = f"{AHREFS_API_URL}/stGetFreeTrafficOverview"
     params = {
         "input": json.dumps({
             "captcha": token,
@@ -224,13 +291,13 @@ def get_traffic_data(domain_or_url: str, country: str = "None", mode: str = "sub
         "referer": site_url
     }
     
-    resp = requests.get(url, params=params, headers=headers)
+    resp = await http.get(url, params=params, headers=headers)
     if resp.status_code != 200: return None
     
     data = resp.json()
     if isinstance(data, list) and len(data) > 1:
         traffic_data = data[1]
-        return {
+        result = {
             "traffic": {
                 "monthly": traffic_data.get("traffic", {}).get("trafficMonthlyAvg", 0),
                 "value": traffic_data.get("traffic", {}).get("costMontlyAvg", 0)
@@ -238,11 +305,14 @@ def get_traffic_data(domain_or_url: str, country: str = "None", mode: str = "sub
             "top_pages": traffic_data.get("top_pages", []),
             "top_countries": traffic_data.get("top_countries", [])
         }
+        await history.record(domain_or_url, history.traffic_metrics(result, country))
+        return result
     return None
 
 # --- Keyword Difficulty Logic ---
 
-def check_keyword_difficulty(keyword: str, country: str = "us") -> Optional[Dict[str, Any]]:
+@cached_lookup("difficulty", "keyword", country="country")
+async def check_keyword_difficulty(keyword: str, country: str = "us") -> Optional[Dict[str, Any]]:
     """
     Checks the Keyword Difficulty (KD) score and SERP analysis.
     
@@ -254,10 +324,10 @@ def check_keyword_difficulty(keyword: str, country: str = "us") -> Optional[Dict
         Optional[Dict[str, Any]]: Object containing 'difficulty' score (0-100) and 'serp' results.
     """
     site_url = f"https://ahrefs.com/keyword-difficulty/?country={country}&input={urllib.parse.quote(keyword)}"
-    token = get_capsolver_token(site_url)
+    token = await get_capsolver_token(site_url)
     if not token: raise Exception("Failed to get captcha token")
 
-    url = "https://ahrefs.com/v4/stGetFreeSerpOverviewForKeywordDifficultyChecker"
+    url = f"{AHREFS_API_URL}/stGetFreeSerpOverviewForKeywordDifficultyChecker"
     payload = {
         "captcha": token,
         "country": country,
@@ -269,7 +339,7 @@ def check_keyword_difficulty(keyword: str, country: str = "us") -> Optional[Dict
         "referer": site_url
     }
     
-    resp = requests.post(url, json=payload, headers=headers)
+    resp = await http.post(url, json=payload, headers=headers)
     if resp.status_code != 200: return None
     
     data = resp.json()
@@ -0,0 +1,125 @@
+import asyncio
+import time
+from urllib.parse import urlparse
+from typing import List, Dict, Any, Awaitable, Callable, Optional, Tuple
+from .onpage_analyzer import analyze_onpage, compact_onpage
+from .schema_validator import validate_schema
+from .technical_auditor import check_technical_health
+from ..utils.document import normalize_url
+from ..utils.progress import ProgressCallback
+from ..utils.urls import canonicalize
+
+def _compact_schema(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "found_count": data["found_count"],
+        "has_valid_schema": data["has_valid_schema"],
+        "types": [s["type"] for s in data["schemas"] if s["valid"]],
+        "errors": [s["error"] for s in data["schemas"] if not s["valid"]],
+    }
+
+def _compact_technical(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in data.items() if k != "url"}
+
+# kind -> (per-URL analyzer, compact projection)
+BATCH_KINDS: Dict[str, Tuple[Callable[..., Awaitable[Dict[str, Any]]], Callable[[Dict[str, Any]], Dict[str, Any]]]] = {
+    "onpage": (analyze_onpage, compact_onpage),
+    "schema": (validate_schema, _compact_schema),
+    "technical": (check_technical_health, _compact_technical),
+}
+
+async def audit_urls(
+    kind: str,
+    urls: List[str],
+    compact: bool = True,
+    concurrency: int = 16,
+    per_host_concurrency: int = 8,
+    progress: Optional[ProgressCallback] = None,
+    **options: Any,
+) -> Dict[str, Any]:
+    """
+    Runs one per-URL analysis over many URLs concurrently.
+
+    Duplicate URLs (after canonicalization) are analyzed once, fetching the
+    first of them as given; each input URL gets the shared result under its
+    own spelling. All calls share the process-wide HTTP client and caches. A failing URL does not
+    fail the batch: its entry carries an "error" instead of results.
+
+    Args:
+        kind: "onpage", "schema" or "technical" (PageSpeed has its own
+            quota-aware runner, `psi_analyzer.analyze_speed_batch`).
+        urls: URLs (or bare domains) to analyze.
+        compact: Return the key fields per URL instead of the full result.
+        concurrency: URLs analyzed at once across all hosts.
+        per_host_concurrency: Max in-flight URLs per host. The shared HTTP
+            client's SEO_HTTP_MAX_PER_HOST cap also applies.
+        progress: Optional async callback invoked as URLs complete.
+        **options: Passed to the analyzer.
+
+    Returns:
+        Counts plus one result per input URL, in input order.
+    """
+    if kind not in BATCH_KINDS:
+        return {"error": f"Unknown batch kind '{kind}' (use {', '.join(BATCH_KINDS)})."}
+    if not urls:
+        return {"error": "No URLs given."}
+    analyze, project = BATCH_KINDS[kind]
+
+    # The canonical form only de-duplicates: canonicalize() rewrites query
+    # strings, so the URL fetched is the first one given for each key
+    keys: List[Optional[str]] = []
+    fetch_urls: Dict[str, str] = {}
+    outcomes: Dict[str, Dict[str, Any]] = {}
+    invalid: Dict[str, str] = {}
+    for u in urls:
+        try:
+            key = canonicalize(normalize_url(u.strip()))
+        except ValueError as e:
+            keys.append(None)
+            invalid[u] = f"Invalid URL: {e}"
+            continue
+        keys.append(key)
+        fetch_urls.setdefault(key, u.strip())
+    unique = list(fetch_urls)
+    limit = asyncio.Semaphore(max(1, concurrency))
+    host_limits: Dict[str, asyncio.Semaphore] = {}
+    done = 0
+    progress_step = max(1, len(unique) // 100)
+
+    async def run(key: str):
+        nonlocal done
+        host = urlparse(key).netloc
+        if host not in host_limits:
+            host_limits[host] = asyncio.Semaphore(max(1, per_host_concurrency))
+        # Host slot first, so URLs queued for a busy host don't hold global slots
+        async with host_limits[host], limit:
+            try:
+                data = await analyze(fetch_urls[key], **options)
+                if data is None:
+                    data = {"error": "No result"}
+                elif "error" not in data and compact:
+                    data = project(data)
+            except Exception as e:
+                data = {"error": str(e) or type(e).__name__}
+        outcomes[key] = data
+        done += 1
+        if progress and (done % progress_step == 0 or done == len(unique)):
+            await progress(done, len(unique))
+
+    started = time.monotonic()
+    await asyncio.gather(*(run(key) for key in unique))
+
+    results = []
+    for url, key in zip(urls, keys):
+        data = outcomes[key] if key is not None else {"error": invalid[url]}
+        results.append({"url": url, "error": data["error"]} if "error" in data else {**data, "url": url})
+    failed = sum(1 for key in unique if "error" in outcomes[key])
+    return {
+        "kind": kind,
+        "total": len(urls),
+        "unique": len(unique),
+        "succeeded": len(unique) - failed,
+        # Inputs that could not be parsed as URLs count as failures too
+        "failed": failed + len(invalid),
+        "seconds": round(time.monotonic() - started, 2),
+        "results": results,
+    }
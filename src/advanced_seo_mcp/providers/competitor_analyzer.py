@@ -1,7 +1,8 @@
+import asyncio
 from typing import Dict, Any, List
 from .ahrefs_scraper import get_backlinks_data, get_traffic_data
 
-def analyze_competitors(domain1: str, domain2: str) -> Dict[str, Any]:
+async def analyze_competitors(domain1: str, domain2: str) -> Dict[str, Any]:
     """
     Compares two domains using Ahrefs data (Backlinks, DR, Traffic).
     
@@ -14,13 +15,15 @@ def analyze_competitors(domain1: str, domain2: str) -> Dict[str, Any]:
     """
     results = {}
     
-    # Analyze Domain 1
-    d1_bl = get_backlinks_data(domain1) or {}
-    d1_tr = get_traffic_data(domain1) or {}
-    
-    # Analyze Domain 2
-    d2_bl = get_backlinks_data(domain2) or {}
-    d2_tr = get_traffic_data(domain2) or {}
+    # Analyze both domains concurrently; a failed lookup counts as missing data
+    lookups = await asyncio.gather(
+        get_backlinks_data(domain1),
+        get_traffic_data(domain1),
+        get_backlinks_data(domain2),
+        get_traffic_data(domain2),
+        return_exceptions=True,
+    )
+    d1_bl, d1_tr, d2_bl, d2_tr = ({} if isinstance(r, BaseException) or not r else r for r in lookups)
     
     # Helper to safe get
     def get_val(data, *keys):
@@ -1,57 +1,67 @@
-import requests
-from bs4 import BeautifulSoup
 from collections import Counter
-import re
-import string
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+from ..utils.document import DocumentOrUrl, FetchedDocument, fetch_document, run_on_document
+from ..utils.text import PhraseMatcher, content_words, tokenize
+from .corpus_index import page_top_terms
 
-def analyze_keywords(url: str, target_keyword: str = None) -> Dict[str, Any]:
+async def analyze_keywords(url: DocumentOrUrl, target_keyword: str = None, keywords: Optional[List[str]] = None) -> Dict[str, Any]:
     """
     Analyzes keyword density and TF-IDF like metrics.
+    Accepts a URL or a `FetchedDocument`. Adds site-relative TF-IDF terms when
+    the site's content index has been built (see corpus_index).
+
+    `keywords` may hold hundreds of words/phrases; all are counted as whole
+    words in a single pass over the page text.
     """
-    if not url.startswith('http'):
-        url = 'https://' + url
-        
     try:
-        resp = requests.get(url, headers={'User-Agent': 'Mozilla/5.0'}, timeout=10)
-        soup = BeautifulSoup(resp.content, 'lxml')
-        
-        # Remove script and style elements
-        for script in soup(["script", "style"]):
-            script.extract()
-            
-        text = soup.get_text()
-        
-        # Normalize text
-        # Remove punctuation and lowercase
-        translator = str.maketrans('', '', string.punctuation)
-        clean_text = text.translate(translator).lower()
-        words = [w for w in clean_text.split() if len(w) > 2] # Ignore short words
-        
-        total_words = len(words)
-        word_counts = Counter(words)
-        
-        top_keywords = word_counts.most_common(10)
-        
-        result = {
-            "total_words": total_words,
-            "top_keywords": [{"word": w, "count": c, "density": f"{(c/total_words)*100:.2f}%"} for w, c in top_keywords],
-            "target_analysis": None
-        }
-        
-        if target_keyword:
-            target = target_keyword.lower()
-            count = clean_text.count(target)
-            density = (count / total_words) * 100 if total_words > 0 else 0
-            
-            result["target_analysis"] = {
-                "keyword": target,
-                "count": count,
-                "density": f"{density:.2f}%",
-                "recommendation": "Good" if 1 <= density <= 2.5 else ("Low" if density < 1 else "High (Spam Risk)")
-            }
-            
-        return result
-        
+        doc = url if isinstance(url, FetchedDocument) else await fetch_document(url, headers={'User-Agent': 'Mozilla/5.0'})
+        result = await run_on_document(_analyze_document, doc, target_keyword, keywords)
     except Exception as e:
         return {"error": str(e)}
+
+    # Real TF-IDF against the rest of the site, if its index has been built
+    site = page_top_terms(doc.url)
+    if "error" not in site:
+        result["tfidf_top_terms"] = site["top_terms"]
+    return result
+
+def _keyword_stats(keyword: str, count: int, total_words: int) -> Dict[str, Any]:
+    density = (count / total_words) * 100 if total_words > 0 else 0
+    return {
+        "keyword": keyword,
+        "count": count,
+        "density": f"{density:.2f}%",
+        "recommendation": "Good" if 1 <= density <= 2.5 else ("Low" if density < 1 else "High (Spam Risk)")
+    }
+
+def _analyze_document(doc: FetchedDocument, target_keyword: str = None, keywords: Optional[List[str]] = None) -> Dict[str, Any]:
+    # Visible text only: <script>/<style> contents are excluded by the extractor
+    # Normalize text: remove punctuation and lowercase
+    tokens = tokenize(doc.features.text)
+    words = content_words(tokens) # Ignore short words
+    
+    total_words = len(words)
+    word_counts = Counter(words)
+    
+    top_keywords = word_counts.most_common(10)
+    
+    result = {
+        "total_words": total_words,
+        "top_keywords": [{"word": w, "count": c, "density": f"{(c/total_words)*100:.2f}%"} for w, c in top_keywords],
+        "target_analysis": None
+    }
+
+    tracked = list(dict.fromkeys(k.lower().strip() for k in (keywords or []) if k and k.strip()))
+    target = target_keyword.lower().strip() if target_keyword else None
+    phrases = tracked + [target] if target and target not in tracked else tracked
+    if not phrases:
+        return result
+
+    # One pass over the tokens counts every phrase (whole words only)
+    counts = dict(zip(phrases, PhraseMatcher(phrases).count(tokens)))
+    if target:
+        result["target_analysis"] = _keyword_stats(target, counts[target], total_words)
+    if tracked:
+        result["keyword_analysis"] = [_keyword_stats(k, counts[k], total_words) for k in tracked]
+
+    return result
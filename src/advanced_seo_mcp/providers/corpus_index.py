@@ -0,0 +1,198 @@
+import heapq
+import math
+import time
+from array import array
+from collections import Counter, OrderedDict
+from urllib.parse import urlparse
+from typing import List, Dict, Any, Optional
+from .site_crawler import visit_pages
+from ..utils.document import FetchedDocument, normalize_url, run_on_document
+from ..utils.progress import ProgressCallback
+from ..utils.text import content_words, tokenize
+from ..utils.urls import canonicalize, site_key
+
+# Site indexes kept in memory; the least recently built/used is dropped first
+MAX_INDEXES = 8
+
+class CorpusIndex:
+    """
+    Term statistics for a set of pages, for TF-IDF scoring.
+
+    Each page is stored as a sparse vector: parallel uint32 arrays of term
+    ids and counts (8 bytes per distinct term on the page). Document
+    frequencies are updated as pages are added or replaced, so the index can
+    grow incrementally and every page can be scored against the whole corpus
+    without re-tokenizing anything.
+    """
+
+    def __init__(self):
+        self.vocab: Dict[str, int] = {}
+        self.terms: List[str] = []
+        self.df = array('I')
+        self.urls: List[str] = []
+        self.doc_ids: Dict[str, int] = {}
+        self.doc_terms: List[array] = []
+        self.doc_counts: List[array] = []
+        self.doc_lengths = array('I')
+        self.built_at = time.time()
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    def _term_id(self, term: str) -> int:
+        tid = self.vocab.get(term)
+        if tid is None:
+            tid = self.vocab[term] = len(self.terms)
+            self.terms.append(term)
+            self.df.append(0)
+        return tid
+
+    def add_document(self, url: str, words: List[str]):
+        """Adds (or replaces) a page from its tokenized words."""
+        key = canonicalize(url)
+        counts = sorted((self._term_id(w), c) for w, c in Counter(words).items())
+        terms = array('I', (t for t, _ in counts))
+        tf = array('I', (c for _, c in counts))
+
+        doc = self.doc_ids.get(key)
+        if doc is None:
+            doc = self.doc_ids[key] = len(self.urls)
+            self.urls.append(url)
+            self.doc_terms.append(terms)
+            self.doc_counts.append(tf)
+            self.doc_lengths.append(len(words))
+        else:
+            for tid in self.doc_terms[doc]:
+                self.df[tid] -= 1
+            self.doc_terms[doc] = terms
+            self.doc_counts[doc] = tf
+            self.doc_lengths[doc] = len(words)
+        for tid in terms:
+            self.df[tid] += 1
+
+    def idf(self, tid: int) -> float:
+        # Smoothed so terms on every page still score slightly above zero
+        return math.log((1 + len(self.urls)) / (1 + self.df[tid])) + 1
+
+    def top_terms(self, url: str, top: int = 10) -> Optional[List[Dict[str, Any]]]:
+        """Highest TF-IDF terms of an indexed page, or None if it is not indexed."""
+        doc = self.doc_ids.get(canonicalize(url))
+        if doc is None:
+            return None
+        length = self.doc_lengths[doc] or 1
+        scored = heapq.nlargest(
+            top,
+            zip(self.doc_terms[doc], self.doc_counts[doc]),
+            key=lambda tc: tc[1] / length * self.idf(tc[0]),
+        )
+        return [{
+            "term": self.terms[tid],
+            "count": count,
+            "tf": round(count / length, 4),
+            "pages_with_term": self.df[tid],
+            "idf": round(self.idf(tid), 3),
+            "tfidf": round(count / length * self.idf(tid), 4),
+        } for tid, count in scored]
+
+    def size_bytes(self) -> int:
+        """Approximate bytes held by the sparse vectors and frequency tables."""
+        vectors = sum(a.itemsize * len(a) for a in self.doc_terms) * 2
+        return vectors + self.df.itemsize * len(self.df) + self.doc_lengths.itemsize * len(self.doc_lengths)
+
+def _page_words(doc: FetchedDocument) -> List[str]:
+    return content_words(tokenize(doc.features.text))
+
+_indexes: "OrderedDict[str, CorpusIndex]" = OrderedDict()
+
+def _index_key(url: str) -> str:
+    return site_key(urlparse(canonicalize(normalize_url(url))).netloc)
+
+def get_index(url: str) -> Optional[CorpusIndex]:
+    """Returns the in-memory index for the site of `url`, if one was built."""
+    key = _index_key(url)
+    index = _indexes.get(key)
+    if index is not None:
+        _indexes.move_to_end(key)
+    return index
+
+async def build_index(
+    url: str,
+    source: str = "sitemap",
+    max_pages: int = 200,
+    max_depth: int = 3,
+    concurrency: int = 8,
+    progress: Optional[ProgressCallback] = None,
+) -> Dict[str, Any]:
+    """
+    Builds (or extends) the TF-IDF index for a site from its sitemap or a crawl.
+
+    Pages are tokenized once as they are fetched. Re-running on the same site
+    adds new pages and replaces re-fetched ones in the existing index.
+
+    Args:
+        url: Domain, page URL or sitemap URL.
+        source: "sitemap" or "crawl".
+        max_pages: Max pages indexed in this run.
+        max_depth: Max crawl depth (crawl source only).
+        concurrency: Pages fetched at once.
+        progress: Optional async callback invoked as pages are indexed.
+
+    Returns:
+        Index statistics and the terms found on the most pages.
+    """
+    if source not in ("sitemap", "crawl"):
+        return {"error": f"Unknown source '{source}' (use 'sitemap' or 'crawl')."}
+
+    key = _index_key(url)
+    index = _indexes.get(key) or CorpusIndex()
+    done = 0
+    progress_step = max(1, max_pages // 100)
+
+    async def on_page(doc: FetchedDocument):
+        nonlocal done
+        words = await run_on_document(_page_words, doc)
+        index.add_document(doc.url, words)
+        done += 1
+        if progress and done % progress_step == 0:
+            await progress(done, max_pages)
+
+    started = time.monotonic()
+    pages = await visit_pages(url, on_page, source, max_pages, max_depth, concurrency)
+    if len(index) == 0:
+        return {"error": "No pages could be indexed."}
+
+    _indexes[key] = index
+    _indexes.move_to_end(key)
+    while len(_indexes) > MAX_INDEXES:
+        _indexes.popitem(last=False)
+
+    common = heapq.nlargest(10, range(len(index.terms)), key=lambda tid: index.df[tid])
+    return {
+        "site": key,
+        "pages_indexed": pages["pages"],
+        "pages_failed": pages["failed"],
+        "total_pages": len(index),
+        "vocabulary_size": len(index.terms),
+        "index_bytes": index.size_bytes(),
+        "seconds": round(time.monotonic() - started, 2),
+        "most_common_terms": [{"term": index.terms[t], "pages": index.df[t]} for t in common],
+    }
+
+def page_top_terms(url: str, top: int = 10) -> Dict[str, Any]:
+    """
+    Returns the page's top TF-IDF terms from its site's index.
+    No fetching or tokenizing happens here.
+    """
+    index = get_index(url)
+    if index is None:
+        return {"error": "No content index for this site. Build one with build_content_index first."}
+    started = time.perf_counter()
+    terms = index.top_terms(normalize_url(url), top)
+    if terms is None:
+        return {"error": "Page is not in the site's content index."}
+    return {
+        "url": url,
+        "corpus_pages": len(index),
+        "top_terms": terms,
+        "query_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
@@ -1,65 +1,116 @@
-import requests
-from bs4 import BeautifulSoup
+import asyncio
+import os
 from urllib.parse import urlparse, urljoin
-from fake_useragent import UserAgent
-from concurrent.futures import ThreadPoolExecutor
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+from ..utils import cache, http, metrics
+from ..utils.document import DocumentOrUrl, FetchedDocument, fetch_document, run_on_document
+from ..utils.singleflight import SingleFlight
+from ..utils.urls import canonicalize
+from ..utils.useragent import random_user_agent
 
-def check_broken_links(url: str, limit: int = 20) -> Dict[str, Any]:
+# Link checks in flight at once per call (override via .env); the shared
+# client's per-host cap (SEO_HTTP_MAX_PER_HOST) still applies per server.
+LINK_CHECK_CONCURRENCY = int(os.environ.get("SEO_LINK_CHECK_CONCURRENCY", 16))
+# How long a checked link's status is reused across pages and audits (0 disables)
+LINK_STATUS_TTL = float(os.environ.get("SEO_LINK_STATUS_TTL", 3600))
+# Server errors may be transient, so they are remembered for less time
+LINK_ERROR_TTL = float(os.environ.get("SEO_LINK_ERROR_TTL", 300))
+
+# Servers that refuse HEAD often answer these instead of the real status
+HEAD_REJECTED = {403, 405, 501}
+
+_in_flight = SingleFlight()
+
+def _extract_targets(doc: FetchedDocument) -> List[str]:
+    targets = []
+    for href, _ in doc.features.links:
+        full_url = urljoin(doc.url, href)
+        # Skip mailto, tel, javascript
+        if full_url.startswith(('http', 'https')):
+            targets.append(full_url)
+    return targets
+
+async def _probe(target: str, headers: Dict[str, str], timeout: float) -> Dict[str, Any]:
+    # Use HEAD request for speed
+    r = await http.head(target, headers=headers, timeout=timeout, follow_redirects=True)
+    method = "HEAD"
+    if r.status_code in HEAD_REJECTED:
+        # Ask for a single byte and close without reading the body
+        async with http.stream("GET", target, headers={**headers, 'Range': 'bytes=0-0'}, timeout=timeout) as g:
+            r = g
+        method = "GET"
+    status_text = "Broken" if r.status_code >= 400 else "OK"
+    return {"url": target, "status": r.status_code, "status_text": status_text, "method": method}
+
+async def check_link(target: str, headers: Optional[Dict[str, str]] = None, timeout: float = 5) -> Dict[str, Any]:
+    """
+    Returns the HTTP status of one link: {"url", "status", "status_text", "method"}.
+    Status 0 means the request failed (DNS, timeout, TLS, ...).
+
+    Results are shared through the on-disk cache for LINK_STATUS_TTL seconds
+    and concurrent checks of the same URL share one request, so a link that
+    appears on every page is only requested once.
+    """
+    key = canonicalize(target)
+    if LINK_STATUS_TTL > 0:
+        cached = await cache.safe_call(cache.kv_get, "link_status", key)
+        if cached is not None:
+            return {**cached, "url": target, "cached": True}
+
+    async def fetch():
+        try:
+            with metrics.stage("link_check"):
+                res = await _probe(target, headers or {'User-Agent': random_user_agent()}, timeout)
+        except Exception as e:
+            # Network failures are not cached so they are retried next time
+            return {"url": target, "status": 0, "status_text": str(e) or type(e).__name__}
+        ttl = LINK_ERROR_TTL if res["status"] >= 500 or res["status"] == 429 else LINK_STATUS_TTL
+        if LINK_STATUS_TTL > 0 and ttl > 0:
+            await cache.safe_call(cache.kv_set, "link_status", key, res, ttl)
+        return res
+
+    res = await _in_flight.do(key, fetch)
+    return {**res, "url": target}
+
+async def check_links(targets: List[str], concurrency: Optional[int] = None, headers: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
+    """Checks links concurrently (at most `concurrency` at once), preserving order."""
+    semaphore = asyncio.Semaphore(concurrency or LINK_CHECK_CONCURRENCY)
+
+    async def bounded(target):
+        async with semaphore:
+            return await check_link(target, headers)
+
+    return await asyncio.gather(*(bounded(t) for t in targets))
+
+async def check_broken_links(url: DocumentOrUrl, limit: int = 20, concurrency: Optional[int] = None) -> Dict[str, Any]:
     """
-    Scans a page for broken internal/external links.
+    Scans a page (URL or `FetchedDocument`) for broken internal/external links.
     """
-    if not url.startswith('http'):
-        url = 'https://' + url
-    
-    domain = urlparse(url).netloc
-    ua = UserAgent()
-    headers = {'User-Agent': ua.random}
-    
+    headers = {'User-Agent': random_user_agent()}
+
     try:
-        resp = requests.get(url, headers=headers, timeout=10)
-        soup = BeautifulSoup(resp.content, 'lxml')
-        links = soup.find_all('a', href=True)
-        
-        targets = []
-        for link in links:
-            href = link['href']
-            full_url = urljoin(url, href)
-            # Skip mailto, tel, javascript
-            if full_url.startswith(('http', 'https')):
-                targets.append(full_url)
-        
+        doc = url if isinstance(url, FetchedDocument) else await fetch_document(url, headers=headers)
+        targets = await run_on_document(_extract_targets, doc)
+
         # Unique links, limited
         unique_targets = list(set(targets))[:limit]
-        
+
         broken = []
         working = []
-        
-        def check_link(target):
-            try:
-                # Use HEAD request for speed
-                r = requests.head(target, headers=headers, timeout=5, allow_redirects=True)
-                if r.status_code >= 400:
-                    return {"url": target, "status": r.status_code, "status_text": "Broken"}
-                return {"url": target, "status": r.status_code, "status_text": "OK"}
-            except Exception as e:
-                return {"url": target, "status": 0, "status_text": str(e)}
-
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            results = list(executor.map(check_link, unique_targets))
-            
+        results = await check_links(unique_targets, concurrency, headers)
+
         for res in results:
             if res['status'] >= 400 or res['status'] == 0:
                 broken.append(res)
             else:
                 working.append(res)
-                
+
         return {
             "total_scanned": len(unique_targets),
             "broken_count": len(broken),
             "broken_links": broken,
             "working_count": len(working)
         }
-        
+
     except Exception as e:
         return {"error": str(e)}
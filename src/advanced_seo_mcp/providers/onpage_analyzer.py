@@ -1,61 +1,94 @@
-import requests
-from bs4 import BeautifulSoup
 from urllib.parse import urlparse, urljoin
-from fake_useragent import UserAgent
 from typing import Dict, Any, List
+from ..utils import history
+from ..utils.document import DocumentOrUrl, FetchedDocument, fetch_document, run_on_document
 
-def analyze_onpage(url: str) -> Dict[str, Any]:
+async def analyze_onpage(url: DocumentOrUrl, head_only: bool = False) -> Dict[str, Any]:
     """
     Performs a comprehensive on-page SEO analysis of a given URL.
-    """
-    if not url.startswith('http'):
-        url = 'https://' + url
+    Accepts either a URL or an already fetched `FetchedDocument`.
 
+    With `head_only`, a URL is only read up to </head> and the result holds
+    just the meta checks (title, description, canonical, robots), marked
+    "head_only". Pages served whole from the HTTP cache get the full analysis.
+    """
     try:
-        ua = UserAgent()
-        headers = {'User-Agent': ua.random}
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
+        doc = url if isinstance(url, FetchedDocument) else await fetch_document(url, head_only=head_only)
+        doc.response.raise_for_status()
     except Exception as e:
         return {"error": f"Failed to fetch URL: {str(e)}"}
 
-    soup = BeautifulSoup(response.content, 'lxml')
+    result = await run_on_document(_analyze_document, doc)
+    if not doc.head_only:
+        # Head-only results have no body metrics to record
+        await history.record(doc.url, history.onpage_metrics(result))
+    return result
+
+def compact_onpage(data: Dict[str, Any]) -> Dict[str, Any]:
+    """The key fields of an `analyze_onpage` result (no samples or heading texts)."""
+    meta = data["meta"]
+    result = {
+        "status_code": data["status_code"],
+        "load_time_ms": data["load_time_ms"],
+        "title": meta["title"]["content"],
+        "title_length": meta["title"]["length"],
+        "description_length": meta["description"]["length"],
+        "canonical": meta["canonical"],
+        "robots": meta["robots"],
+    }
+    if "headings" in data: # Absent from head-only results
+        result.update({
+            "h1_count": data["headings"]["counts"]["h1"],
+            "word_count": data["content"]["word_count"],
+            "thin_content": data["content"]["thin_content"],
+            "internal_links": data["links"]["internal"],
+            "external_links": data["links"]["external"],
+            "images_missing_alt": data["images"]["missing_alt_count"],
+        })
+    for flag in ("truncated", "head_only"):
+        if data.get(flag):
+            result[flag] = True
+    return result
+
+def _analyze_document(doc: FetchedDocument) -> Dict[str, Any]:
+    url = doc.url
+    page = doc.features
     
     result = {
         "url": url,
-        "status_code": response.status_code,
-        "load_time_ms": int(response.elapsed.total_seconds() * 1000),
+        "status_code": doc.status_code,
+        "load_time_ms": doc.load_time_ms,
         "meta": {},
-        "headings": {},
-        "content": {},
-        "links": {},
-        "images": {}
     }
+    if doc.head_only:
+        # Only the <head> was read: the body sections are left out
+        result["head_only"] = True
+    elif not doc.complete:
+        # Body exceeded the download cap; only the part read was analyzed
+        result["truncated"] = True
 
     # Meta Tags
-    title = soup.title.string if soup.title else None
+    title = page.title
     result["meta"]["title"] = {
         "content": title,
         "length": len(title) if title else 0,
         "optimal": 30 <= len(title) <= 60 if title else False
     }
 
-    desc_tag = soup.find('meta', attrs={'name': 'description'})
-    description = desc_tag['content'] if desc_tag else None
+    description = page.meta.get('description')
     result["meta"]["description"] = {
         "content": description,
         "length": len(description) if description else 0,
         "optimal": 120 <= len(description) <= 160 if description else False
     }
 
-    result["meta"]["canonical"] = soup.find('link', rel='canonical')['href'] if soup.find('link', rel='canonical') else None
-    result["meta"]["robots"] = soup.find('meta', attrs={'name': 'robots'})['content'] if soup.find('meta', attrs={'name': 'robots'}) else "index, follow"
+    result["meta"]["canonical"] = page.canonical
+    result["meta"]["robots"] = page.meta.get('robots', "index, follow")
+    if doc.head_only:
+        return result
 
     # Headings
-    headings = {}
-    for i in range(1, 7):
-        tags = soup.find_all(f'h{i}')
-        headings[f'h{i}'] = [tag.get_text(strip=True) for tag in tags]
+    headings = page.headings
     
     result["headings"] = {
         "counts": {k: len(v) for k, v in headings.items()},
@@ -64,21 +97,18 @@ def analyze_onpage(url: str) -> Dict[str, Any]:
     }
 
     # Content
-    text = soup.get_text(separator=' ', strip=True)
-    word_count = len(text.split())
+    word_count = len(page.text.split())
     result["content"] = {
         "word_count": word_count,
         "thin_content": word_count < 300
     }
 
     # Links
-    all_links = soup.find_all('a', href=True)
     internal_links = []
     external_links = []
     domain = urlparse(url).netloc
 
-    for link in all_links:
-        href = link['href']
+    for href, _ in page.links:
         full_url = urljoin(url, href)
         parsed_href = urlparse(full_url)
         
@@ -88,7 +118,7 @@ def analyze_onpage(url: str) -> Dict[str, Any]:
             external_links.append(full_url)
 
     result["links"] = {
-        "total": len(all_links),
+        "total": len(page.links),
         "internal": len(internal_links),
         "external": len(external_links),
         "internal_sample": internal_links[:5],
@@ -96,11 +126,10 @@ def analyze_onpage(url: str) -> Dict[str, Any]:
     }
 
     # Images
-    images = soup.find_all('img')
-    missing_alt = [img['src'] for img in images if not img.get('alt')]
+    missing_alt = [src for src, alt in page.images if not alt]
     
     result["images"] = {
-        "total": len(images),
+        "total": len(page.images),
         "missing_alt_count": len(missing_alt),
         "missing_alt_sample": missing_alt[:5]
     }
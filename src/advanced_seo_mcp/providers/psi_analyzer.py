@@ -1,56 +1,218 @@
-import requests
+import asyncio
+import json
 import os
-from typing import Dict, Any, Optional
+import random
+import time
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+import httpx
+from ..utils import history, http, metrics
+from ..utils.cache import kv_get, kv_set, safe_call
+from ..utils.progress import ProgressCallback
+from ..utils.ratelimit import TokenBucket
+from ..utils.singleflight import SingleFlight
 
-def analyze_speed(url: str, strategy: str = "mobile") -> Dict[str, Any]:
-    """
-    Analyzes URL performance using Google PageSpeed Insights API.
-    
-    Args:
-        url: The URL to analyze.
-        strategy: 'mobile' or 'desktop' (default: 'mobile').
-        
-    Returns:
-        Dictionary containing Core Web Vitals and Performance Score.
-    """
-    api_key = os.environ.get("GOOGLE_PSI_API_KEY")
-    if not api_key:
-        return {"error": "GOOGLE_PSI_API_KEY is missing in .env file"}
+PSI_API_URL = os.environ.get("GOOGLE_PSI_API_URL", "https://www.googleapis.com/pagespeedonline/v5/runPagespeed")
+
+# PSI quota (queries per 100 seconds per project) and retry/caching settings (override via .env)
+PSI_QUOTA_PER_100S = float(os.environ.get("GOOGLE_PSI_QUOTA_PER_100S", 400))
+PSI_MAX_RETRIES = int(os.environ.get("GOOGLE_PSI_MAX_RETRIES", 4))
+PSI_CACHE_TTL = float(os.environ.get("GOOGLE_PSI_CACHE_TTL", 24 * 3600))
+
+# 90% of the quota as steady rate plus a 10% burst: any 100s window stays within quota
+_bucket = TokenBucket(rate=PSI_QUOTA_PER_100S * 0.9 / 100, capacity=max(1.0, PSI_QUOTA_PER_100S * 0.1))
+_in_flight = SingleFlight()
+_RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_AUDITS = {
+    "lcp": "largest-contentful-paint",
+    "fcp": "first-contentful-paint",
+    "cls": "cumulative-layout-shift",
+    "inp": "interaction-to-next-paint", # Interaction to Next Paint
+}
+
+def _fields(include_screenshot: bool) -> str:
+    """Partial-response mask: the full Lighthouse JSON is several hundred KB."""
+    fields = ["lighthouseResult/categories/performance/score", "lighthouseResult/categories/seo/score"]
+    fields += [f"lighthouseResult/audits/{audit}/displayValue" for audit in _AUDITS.values()]
+    if include_screenshot:
+        fields.append("lighthouseResult/audits/final-screenshot/details/data")
+    return ','.join(fields)
+
+# Longest wait between retries, whatever Retry-After asks for
+_MAX_BACKOFF = 60.0
+
+def _backoff(attempt: int, retry_after: Optional[str]) -> float:
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), _MAX_BACKOFF)
+    # Exponential (2s, 4s, 8s, ... up to 60s), half of it jittered
+    delay = min(_MAX_BACKOFF, 2.0 * 2 ** attempt)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+async def _run_psi(params: Dict[str, Any]) -> Dict[str, Any]:
+    """One PSI call under the quota limiter, retried on 429/5xx and network errors."""
+    for attempt in range(PSI_MAX_RETRIES + 1):
+        await _bucket.acquire()
+        retry_after = None
+        try:
+            with metrics.stage("psi"):
+                resp = await http.get(PSI_API_URL, params=params, timeout=60)
+        except httpx.TransportError as e:
+            if attempt == PSI_MAX_RETRIES:
+                raise
+            reason = "timeout" if isinstance(e, httpx.TimeoutException) else "network"
+        else:
+            if resp.status_code not in _RETRY_STATUSES or attempt == PSI_MAX_RETRIES:
+                resp.raise_for_status()
+                return resp.json()
+            reason = str(resp.status_code)
+            retry_after = resp.headers.get("Retry-After")
+        metrics.inc("seo_psi_retries_total", reason=reason)
+        await asyncio.sleep(_backoff(attempt, retry_after))
+
+def _cache_key(url: str, strategy: str, include_screenshot: bool) -> str:
+    day = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+    return json.dumps([url.strip(), strategy, day, include_screenshot])
+
+async def _speed(url: str, strategy: str, include_screenshot: bool, use_cache: bool) -> Tuple[Dict[str, Any], bool]:
+    """Returns the PSI summary for one URL and strategy, and whether it came from the cache."""
+    use_cache = use_cache and PSI_CACHE_TTL > 0
+    if use_cache:
+        cached = await safe_call(kv_get, "psi", _cache_key(url, strategy, include_screenshot))
+        if cached is None and not include_screenshot:
+            # Today's run with a screenshot answers a request without one
+            cached = await safe_call(kv_get, "psi", _cache_key(url, strategy, True))
+            if cached is not None:
+                cached.pop("screenshot", None)
+        if cached is not None:
+            return cached, True
 
-    endpoint = "https://www.googleapis.com/pagespeedonline/v5/runPagespeed"
     params = {
         "url": url,
         "strategy": strategy,
-        "key": api_key,
-        "category": ["performance", "seo"]
+        "key": os.environ.get("GOOGLE_PSI_API_KEY"),
+        "category": ["performance", "seo"],
+        "fields": _fields(include_screenshot),
     }
 
-    try:
-        resp = requests.get(endpoint, params=params, timeout=60)
-        resp.raise_for_status()
-        data = resp.json()
-        
+    async def fetch():
+        data = await _run_psi(params)
         lighthouse = data.get("lighthouseResult", {})
         audits = lighthouse.get("audits", {})
         categories = lighthouse.get("categories", {})
-        
+
         # Helper to get numeric value safely
         def get_metric(name):
             return audits.get(name, {}).get("displayValue", "N/A")
-            
+
         result = {
             "strategy": strategy,
             "performance_score": int(categories.get("performance", {}).get("score", 0) * 100),
             "seo_score": int(categories.get("seo", {}).get("score", 0) * 100),
-            "core_web_vitals": {
-                "lcp": get_metric("largest-contentful-paint"),
-                "fcp": get_metric("first-contentful-paint"),
-                "cls": get_metric("cumulative-layout-shift"),
-                "inp": get_metric("interaction-to-next-paint") # Interaction to Next Paint
-            },
-            "screenshot": lighthouse.get("audits", {}).get("final-screenshot", {}).get("details", {}).get("data")
+            "core_web_vitals": {name: get_metric(audit) for name, audit in _AUDITS.items()},
         }
+        if include_screenshot:
+            result["screenshot"] = audits.get("final-screenshot", {}).get("details", {}).get("data")
+        if use_cache:
+            await safe_call(kv_set, "psi", _cache_key(url, strategy, include_screenshot), result, PSI_CACHE_TTL)
+        await history.record(url, history.speed_metrics(result))
+        return result
+
+    # Concurrent requests for the same URL/strategy share one PSI run
+    return await _in_flight.do((url.strip(), strategy, include_screenshot), fetch), False
+
+async def analyze_speed(url: str, strategy: str = "mobile", include_screenshot: bool = False,
+                        use_cache: bool = True) -> Dict[str, Any]:
+    """
+    Analyzes URL performance using Google PageSpeed Insights API.
+
+    Calls share a token bucket sized to GOOGLE_PSI_QUOTA_PER_100S, retry
+    429/5xx responses with backoff, and are cached per URL, strategy and
+    day (GOOGLE_PSI_CACHE_TTL).
+
+    Args:
+        url: The URL to analyze.
+        strategy: 'mobile' or 'desktop' (default: 'mobile').
+        include_screenshot: Also return the base64 final screenshot.
+        use_cache: Reuse today's result for this URL and strategy.
+
+    Returns:
+        Dictionary containing Core Web Vitals and Performance Score.
+    """
+    if not os.environ.get("GOOGLE_PSI_API_KEY"):
+        return {"error": "GOOGLE_PSI_API_KEY is missing in .env file"}
+
+    try:
+        result, _ = await _speed(url, strategy, include_screenshot, use_cache)
         return result
-        
     except Exception as e:
         return {"error": f"PageSpeed Analysis Failed: {str(e)}"}
+
+async def analyze_speed_batch(
+    urls: List[str],
+    strategies: Sequence[str] = ("mobile", "desktop"),
+    include_screenshot: bool = False,
+    concurrency: int = 8,
+    use_cache: bool = True,
+    progress: Optional[ProgressCallback] = None,
+) -> Dict[str, Any]:
+    """
+    Runs PageSpeed Insights for every URL x strategy pair concurrently.
+
+    Requests are paced by the shared quota limiter, so `concurrency` only
+    bounds how many runs wait on PSI at once (each takes 10-30s). Failures
+    are reported per URL and strategy.
+
+    Args:
+        urls: URLs to test (duplicates are run once).
+        strategies: Any of 'mobile' and 'desktop'.
+        include_screenshot: Also return base64 screenshots.
+        concurrency: PSI runs in flight at once.
+        use_cache: Reuse today's results.
+        progress: Optional async callback invoked as runs complete.
+
+    Returns:
+        Counts plus one entry per URL with a result per strategy.
+    """
+    if not os.environ.get("GOOGLE_PSI_API_KEY"):
+        return {"error": "GOOGLE_PSI_API_KEY is missing in .env file"}
+    unknown = [s for s in strategies if s not in ("mobile", "desktop")]
+    if unknown or not strategies:
+        return {"error": f"Unknown strategies {unknown} (use 'mobile' and/or 'desktop')."}
+    unique = list(dict.fromkeys(u.strip() for u in urls if u.strip()))
+    if not unique:
+        return {"error": "No URLs given."}
+
+    jobs = [(url, strategy) for url in unique for strategy in dict.fromkeys(strategies)]
+    limit = asyncio.Semaphore(max(1, concurrency))
+    outcomes: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    counts = {"cached": 0, "failed": 0}
+    done = 0
+    progress_step = max(1, len(jobs) // 100)
+
+    async def run(url: str, strategy: str):
+        nonlocal done
+        async with limit:
+            try:
+                result, cached = await _speed(url, strategy, include_screenshot, use_cache)
+                counts["cached"] += cached
+                result = {k: v for k, v in result.items() if k != "strategy"}
+            except Exception as e:
+                counts["failed"] += 1
+                result = {"error": f"PageSpeed Analysis Failed: {str(e)}"}
+        outcomes[url, strategy] = result
+        done += 1
+        if progress and (done % progress_step == 0 or done == len(jobs)):
+            await progress(done, len(jobs))
+
+    started = time.monotonic()
+    await asyncio.gather(*(run(url, strategy) for url, strategy in jobs))
+    return {
+        "urls": len(unique),
+        "jobs": len(jobs),
+        "succeeded": len(jobs) - counts["failed"],
+        "failed": counts["failed"],
+        "cached": counts["cached"],
+        "seconds": round(time.monotonic() - started, 2),
+        "results": [{"url": url, **{s: outcomes[url, s] for s in dict.fromkeys(strategies)}} for url in unique],
+    }
@@ -1,6 +1,8 @@
+import asyncio
 import os
+import time
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Awaitable, Callable, Optional, Tuple
 from pathlib import Path
 from .onpage_analyzer import analyze_onpage
 from .technical_auditor import check_technical_health
@@ -9,11 +11,70 @@ from .schema_validator import validate_schema
 from .link_inspector import check_broken_links
 from .content_analyzer import analyze_keywords
 from .psi_analyzer import analyze_speed
+from ..utils import metrics
+from ..utils.document import fetch_document
 
-def generate_markdown_report(url: str, include_ahrefs: bool = True) -> str:
+# Per-stage deadlines in seconds, measured from the moment the stage is scheduled.
+DEFAULT_STAGE_TIMEOUTS = {
+    "onpage": 30,
+    "technical": 30,
+    "schema": 30,
+    "links": 60,
+    "content": 30,
+    "psi": 90,
+    "backlinks": 180,
+    "traffic": 180,
+}
+
+async def _with_page(shared_page, analyzer, **kwargs):
+    return await analyzer(await shared_page(), **kwargs)
+
+async def run_stages(stages: Dict[str, Callable[[], Awaitable[Any]]], timeouts: Dict[str, float]) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
     """
-    Runs all analysis tools for a URL and saves a formatted Markdown report.
+    Runs independent stages concurrently, each with its own deadline.
+
+    Args:
+        stages: Mapping of stage name to a zero-argument coroutine function.
+        timeouts: Mapping of stage name to its deadline in seconds.
+
+    Returns:
+        (results, timings). A stage that raises or misses its deadline gets a
+        None result; its timing entry records the status and error.
+    """
+    results: Dict[str, Any] = {}
+    timings: Dict[str, Dict[str, Any]] = {}
+
+    async def timed(name, fn):
+        deadline = timeouts.get(name, 60)
+        started = time.monotonic()
+        try:
+            with metrics.stage(f"report_{name}"):
+                results[name] = await asyncio.wait_for(fn(), timeout=deadline)
+            timings[name] = {"status": "ok", "seconds": round(time.monotonic() - started, 2)}
+        except asyncio.TimeoutError:
+            results[name] = None
+            timings[name] = {"status": "timeout", "seconds": round(deadline, 2), "error": f"Timed out after {deadline}s"}
+            print(f"⏱️ Stage '{name}' timed out after {deadline}s")
+        except Exception as e:
+            results[name] = None
+            timings[name] = {"status": "error", "seconds": round(time.monotonic() - started, 2), "error": str(e)}
+            print(f"⚠️ Stage '{name}' failed: {e}")
+
+    started = time.monotonic()
+    await asyncio.gather(*(timed(name, fn) for name, fn in stages.items()))
+    timings["total"] = {"status": "ok", "seconds": round(time.monotonic() - started, 2)}
+    return results, timings
+
+async def generate_markdown_report(url: str, include_ahrefs: bool = True, stage_timeouts: Optional[Dict[str, float]] = None) -> str:
+    """
+    Runs all analysis tools for a URL concurrently and saves a formatted Markdown report.
     Returns the file path of the generated report.
+
+    Args:
+        url: The URL to analyze.
+        include_ahrefs: Whether to run the Ahrefs backlink/traffic stages.
+        stage_timeouts: Optional per-stage deadline overrides (seconds), keyed
+            like DEFAULT_STAGE_TIMEOUTS.
     """
     domain = url.replace('https://', '').replace('http://', '').strip('/')
     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
@@ -25,34 +86,46 @@ def generate_markdown_report(url: str, include_ahrefs: bool = True) -> str:
     file_path = report_dir / report_filename
 
     # 1. Run Analyses
-    print(f"🔍 Analyzing On-Page SEO for {url}...")
-    onpage = analyze_onpage(url)
-    
-    print(f"🛠️ Checking Technical Health...")
-    tech = check_technical_health(url)
-    
-    print(f"🧩 Validating Schema Markup...")
-    schema = validate_schema(url)
-    
-    print(f"🔗 Inspecting Links (Broken Checker)...")
-    links = check_broken_links(url, limit=20)
-    
-    print(f"📝 Analyzing Content & Keywords...")
-    content_analysis = analyze_keywords(url)
-    
-    print(f"🚀 Measuring Page Speed (PSI)...")
-    speed = analyze_speed(url, strategy='mobile')
-    
-    ahrefs = None
-    traffic = None
-    if include_ahrefs:
+    # Stages are independent, so they run concurrently; wall-clock time is
+    # bounded by the slowest stage (or its deadline) rather than the sum.
+    # Page-level stages share one fetched document. If that fetch fails,
+    # they fall back to the URL and report their own error.
+    timeouts = dict(DEFAULT_STAGE_TIMEOUTS, **(stage_timeouts or {}))
+    page_task = asyncio.ensure_future(fetch_document(url))
+
+    async def shared_page():
+        # shield() keeps one stage's timeout from cancelling the shared fetch.
         try:
-            print(f"🔗 Fetching Backlinks via CapSolver...")
-            ahrefs = get_backlinks_data(domain)
-            print(f"📈 Estimating Traffic...")
-            traffic = get_traffic_data(domain)
-        except Exception as e:
-            print(f"⚠️ Ahrefs data skipped: {e}")
+            return await asyncio.shield(page_task)
+        except Exception:
+            return url
+
+    stages = {
+        "onpage": lambda: _with_page(shared_page, analyze_onpage),
+        "technical": lambda: check_technical_health(url),
+        "schema": lambda: _with_page(shared_page, validate_schema),
+        "links": lambda: _with_page(shared_page, check_broken_links, limit=20),
+        "content": lambda: _with_page(shared_page, analyze_keywords),
+        "psi": lambda: analyze_speed(url, strategy='mobile'),
+    }
+    if include_ahrefs:
+        stages["backlinks"] = lambda: get_backlinks_data(domain)
+        stages["traffic"] = lambda: get_traffic_data(domain)
+
+    print(f"🔍 Running {len(stages)} analysis stages for {url}...")
+    try:
+        results, timings = await run_stages(stages, timeouts)
+    finally:
+        page_task.cancel()
+
+    onpage = results["onpage"] or {}
+    tech = results["technical"] or {}
+    schema = results["schema"] or {}
+    links = results["links"] or {}
+    content_analysis = results["content"] or {}
+    speed = results["psi"] or {"error": timings["psi"].get("error", "No result")}
+    ahrefs = results.get("backlinks")
+    traffic = results.get("traffic")
 
     # 2. Build Markdown Content
     md_parts = []
@@ -117,10 +190,10 @@ def generate_markdown_report(url: str, include_ahrefs: bool = True) -> str:
 
     # Technical
     md_parts.append("\n## 🛠️ Technical Health")
-    exists_robots = '✅ Found' if tech['robots_txt'].get('exists') else '❌ Missing'
+    exists_robots = '✅ Found' if tech.get('robots_txt', {}).get('exists') else '❌ Missing'
     md_parts.append(f"- **Robots.txt:** {exists_robots}")
     
-    exists_sitemap = '✅ Found' if tech['sitemap'].get('found') else '❌ Not found'
+    exists_sitemap = '✅ Found' if tech.get('sitemap', {}).get('found') else '❌ Not found'
     md_parts.append(f"- **Sitemap:** {exists_sitemap}")
 
     # Backlinks Detail
@@ -133,6 +206,14 @@ def generate_markdown_report(url: str, include_ahrefs: bool = True) -> str:
             if anchor: anchor += "..."
             md_parts.append(f"| {link.get('domainRating')} | {anchor} | {link.get('urlFrom')} |")
 
+    # Stage Timings
+    md_parts.append("\n## ⏱️ Stage Timings")
+    md_parts.append("| Stage | Status | Seconds |")
+    md_parts.append("|-------|--------|---------|")
+    for name, timing in timings.items():
+        status = timing['status'] if timing['status'] == 'ok' else f"{timing['status']}: {timing.get('error', '')}"
+        md_parts.append(f"| {name} | {status} | {timing['seconds']} |")
+
     # Save File
     final_content = "\n".join(md_parts)
     with open(file_path, "w", encoding="utf-8") as f:
@@ -0,0 +1,368 @@
+import asyncio
+import time
+from array import array
+from contextlib import aclosing
+from urllib.parse import urlparse, urljoin
+from urllib.robotparser import RobotFileParser
+from typing import List, Dict, Any, Awaitable, Callable, Optional, Tuple
+from .onpage_analyzer import _analyze_document
+from .sitemap_auditor import _record_issues
+from .sitemap_parser import iter_sitemap_entries
+from ..utils import http
+from ..utils.document import FetchedDocument, fetch_document, normalize_url, run_on_document
+from ..utils.progress import ProgressCallback
+from ..utils.urls import canonicalize, fingerprint, site_key
+from ..utils.useragent import random_user_agent
+
+# Page callback: fetched HTML page -> awaitable
+PageCallback = Callable[[FetchedDocument], Awaitable[None]]
+
+# Links to these are never fetched: they cannot contain further HTML links
+SKIP_EXTENSIONS = (
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.ico', '.bmp',
+    '.pdf', '.zip', '.gz', '.rar', '.7z', '.tar', '.exe', '.dmg',
+    '.mp3', '.mp4', '.avi', '.mov', '.webm', '.woff', '.woff2', '.ttf',
+    '.css', '.js', '.xml', '.json', '.txt',
+)
+
+# Crawlers only honour the first 500 KiB of robots.txt
+ROBOTS_MAX_BYTES = 500 * 1024
+
+def _extract_links(doc: FetchedDocument) -> Tuple[List[str], bool]:
+    """Returns (absolute canonical hrefs, nofollow) for a fetched page."""
+    # Resolve against the final URL so redirected pages keep relative links correct
+    base = str(doc.response.url)
+    page = doc.features
+    nofollow = 'nofollow' in (page.meta.get('robots') or '').lower()
+
+    links = []
+    for href, rel in page.links:
+        if 'nofollow' in rel:
+            continue
+        full_url = urljoin(base, href)
+        if full_url.startswith(('http://', 'https://')):
+            links.append(canonicalize(full_url))
+    return links, nofollow
+
+def _crawl_document(doc: FetchedDocument) -> Tuple[Dict[str, Any], List[str], bool]:
+    return (_analyze_document(doc),) + _extract_links(doc)
+
+class LinkGraph:
+    """
+    Internal link graph over crawled pages.
+
+    Nodes are numbered in discovery order and edges are kept as two parallel
+    uint32 arrays, so the graph costs 8 bytes per edge plus one URL per page.
+    """
+
+    def __init__(self):
+        self.urls: List[str] = []
+        self.ids: Dict[int, int] = {}
+        self.src = array('I')
+        self.dst = array('I')
+
+    def add_node(self, url: str) -> int:
+        node = len(self.urls)
+        self.ids[fingerprint(url)] = node
+        self.urls.append(url)
+        return node
+
+    def node(self, url: str) -> Optional[int]:
+        return self.ids.get(fingerprint(url))
+
+    def add_edges(self, src: int, targets: List[int]):
+        for dst in targets:
+            self.src.append(src)
+            self.dst.append(dst)
+
+    def summary(self, top: int = 10, include_edges: bool = False) -> Dict[str, Any]:
+        inlinks = array('I', bytes(4 * len(self.urls)))
+        outlinks = array('I', bytes(4 * len(self.urls)))
+        for s, d in zip(self.src, self.dst):
+            outlinks[s] += 1
+            inlinks[d] += 1
+
+        ranked = sorted(range(len(self.urls)), key=lambda n: inlinks[n], reverse=True)
+        result = {
+            "nodes": len(self.urls),
+            "edges": len(self.src),
+            "most_linked": [{"url": self.urls[n], "inlinks": inlinks[n]} for n in ranked[:top]],
+            "least_linked": [{"url": self.urls[n], "inlinks": inlinks[n]} for n in ranked[::-1][:top]],
+            "dead_ends_count": sum(1 for n in outlinks if n == 0),
+        }
+        if include_edges:
+            result["urls"] = self.urls
+            result["edge_list"] = [[s, d] for s, d in zip(self.src, self.dst)]
+        return result
+
+async def _load_robots(base_url: str, headers: Dict[str, str]) -> Optional[RobotFileParser]:
+    try:
+        resp, body, _ = await http.fetch_limited("GET", urljoin(base_url, '/robots.txt'), max_bytes=ROBOTS_MAX_BYTES,
+                                                 headers=headers, timeout=10)
+    except Exception:
+        return None
+    if resp.status_code != 200:
+        return None
+    parser = RobotFileParser()
+    parser.parse(body.decode('utf-8', 'replace').splitlines())
+    return parser
+
+async def crawl_site(
+    url: str,
+    max_pages: int = 100,
+    max_depth: int = 3,
+    concurrency: int = 8,
+    per_host_concurrency: int = 4,
+    crawl_delay: float = 0.0,
+    respect_robots: bool = True,
+    include_raw: bool = False,
+    include_graph: bool = False,
+    progress: Optional[ProgressCallback] = None,
+    on_page: Optional[PageCallback] = None,
+) -> Dict[str, Any]:
+    """
+    Crawls a site breadth-first from a seed URL and runs the On-Page audit on
+    every HTML page it fetches.
+
+    Discovered URLs are canonicalized and deduplicated through a set of 64-bit
+    fingerprints. At most `max_pages` URLs are ever admitted to the frontier,
+    so memory is bounded by the page limit, not by the size of the site.
+    Only links on the seed's site (with or without www.) are followed.
+
+    Args:
+        url: Seed URL or domain.
+        max_pages: Max pages to fetch.
+        max_depth: Max link distance from the seed (seed is depth 0).
+        concurrency: Number of pages fetched at once.
+        per_host_concurrency: Max in-flight pages per host (politeness).
+        crawl_delay: Min seconds between requests to one host. A larger
+            robots.txt Crawl-delay takes precedence.
+        respect_robots: Skip URLs disallowed by robots.txt.
+        include_raw: Whether to return the full per-page results.
+        include_graph: Whether to return the full node and edge lists.
+        progress: Optional async callback invoked as pages complete.
+        on_page: Optional async callback given each fetched HTML page, e.g.
+            to run further analyzers on it.
+
+    Returns:
+        Crawl summary with aggregated issues and link graph statistics.
+    """
+    seed = canonicalize(normalize_url(url))
+    parsed = urlparse(seed)
+    site = site_key(parsed.netloc)
+    headers = {'User-Agent': random_user_agent()}
+
+    robots = None
+    delay = crawl_delay
+    if respect_robots:
+        robots = await _load_robots(f"{parsed.scheme}://{parsed.netloc}", headers)
+        if robots is not None:
+            delay = max(delay, float(robots.crawl_delay('*') or 0))
+
+    frontier: asyncio.Queue = asyncio.Queue()
+    seen = set()
+    graph = LinkGraph()
+    results: Dict[int, Dict[str, Any]] = {}
+    host_limits: Dict[str, asyncio.Semaphore] = {}
+    next_slot: Dict[str, float] = {}
+
+    issues = {
+        "missing_h1": [],
+        "missing_meta_desc": [],
+        "thin_content": [],
+        "slow_pages": [] # > 2s load time
+    }
+    stats = {"fetched": 0, "failed": 0, "skipped_non_html": 0, "blocked_by_robots": 0, "max_depth_reached": 0}
+    truncated = False
+    done = 0
+    progress_step = max(1, max_pages // 100)
+
+    def admit(target: str, depth: int) -> Optional[int]:
+        """Adds a URL to the frontier if it is new, in scope and within limits."""
+        nonlocal truncated
+        key = fingerprint(target)
+        if key in seen:
+            return graph.ids.get(key)
+        target_parsed = urlparse(target)
+        if site_key(target_parsed.netloc) != site or target_parsed.path.lower().endswith(SKIP_EXTENSIONS):
+            return None
+        if len(graph.urls) >= max_pages:
+            truncated = True
+            return None
+        seen.add(key)
+        if robots is not None and not robots.can_fetch('*', target):
+            stats["blocked_by_robots"] += 1
+            return None
+        node = graph.add_node(target)
+        frontier.put_nowait((node, depth))
+        return node
+
+    async def polite_fetch(page_url: str) -> FetchedDocument:
+        host = urlparse(page_url).netloc
+        if host not in host_limits:
+            host_limits[host] = asyncio.Semaphore(per_host_concurrency)
+        async with host_limits[host]:
+            if delay > 0:
+                # Reserve the next free slot for this host before sleeping
+                now = time.monotonic()
+                slot = max(now, next_slot.get(host, now))
+                next_slot[host] = slot + delay
+                await asyncio.sleep(slot - now)
+            return await fetch_document(page_url, headers=headers)
+
+    async def worker():
+        nonlocal done
+        while True:
+            node, depth = await frontier.get()
+            page_url = graph.urls[node]
+            try:
+                try:
+                    doc = await polite_fetch(page_url)
+                    doc.response.raise_for_status()
+                except http.ContentTypeRejected:
+                    # Non-HTML bodies are never downloaded
+                    stats["skipped_non_html"] += 1
+                    data = None
+                except Exception as e:
+                    data = {"url": page_url, "error": f"Failed to fetch URL: {str(e)}"}
+                    links, nofollow = [], True
+                else:
+                    # A failing analysis or callback must not kill the worker
+                    # (frontier.join() would then wait forever)
+                    try:
+                        data, links, nofollow = await run_on_document(_crawl_document, doc)
+                        if on_page is not None:
+                            await on_page(doc)
+                    except Exception as e:
+                        data = {"url": page_url, "error": f"Failed to analyze page: {str(e) or type(e).__name__}"}
+                        links, nofollow = [], True
+                    del doc
+
+                if data is not None:
+                    stats["fetched"] += 1
+                    stats["max_depth_reached"] = max(stats["max_depth_reached"], depth)
+                    data["depth"] = depth
+                    _record_issues(issues, page_url, data)
+                    if "error" in data:
+                        stats["failed"] += 1
+                    if include_raw:
+                        results[node] = data
+
+                    targets = set()
+                    for link in links:
+                        if depth < max_depth and not nofollow:
+                            target = admit(link, depth + 1)
+                        else:
+                            target = graph.node(link)
+                        if target is not None and target != node:
+                            targets.add(target)
+                    graph.add_edges(node, sorted(targets))
+
+                # Skipped pages count as done so progress reaches its total
+                done += 1
+                total = len(graph.urls)
+                if progress and (done % progress_step == 0 or done == total):
+                    try:
+                        await progress(done, total)
+                    except Exception:
+                        pass # Progress is best-effort (e.g. the client went away)
+            finally:
+                frontier.task_done()
+
+    admit(seed, 0)
+    workers = [asyncio.create_task(worker()) for _ in range(max(1, concurrency))]
+    try:
+        await frontier.join()
+    finally:
+        for w in workers:
+            w.cancel()
+
+    summary = {
+        "seed": seed,
+        "pages_crawled": stats["fetched"],
+        "pages_discovered": len(graph.urls),
+        "failed": stats["failed"],
+        "skipped_non_html": stats["skipped_non_html"],
+        "blocked_by_robots": stats["blocked_by_robots"],
+        "max_depth_reached": stats["max_depth_reached"],
+        "truncated": truncated,
+        "issues_summary": {k: len(v) for k, v in issues.items()},
+        "issue_details": issues,
+        "link_graph": graph.summary(include_edges=include_graph),
+    }
+    if include_raw:
+        summary["raw_results"] = [results[n] for n in sorted(results)]
+    return summary
+
+async def visit_pages(
+    url: str,
+    on_page: PageCallback,
+    source: str = "sitemap",
+    max_pages: int = 200,
+    max_depth: int = 3,
+    concurrency: int = 8,
+) -> Dict[str, int]:
+    """
+    Fetches up to `max_pages` HTML pages of a site and hands each to `on_page`.
+
+    Args:
+        url: Domain, page URL or sitemap URL.
+        on_page: Async callback given each fetched page.
+        source: "sitemap" (pages listed in the sitemap) or "crawl" (links
+            followed from `url`, see crawl_site).
+        max_pages: Max pages fetched.
+        max_depth: Max crawl depth (crawl source only).
+        concurrency: Pages fetched at once.
+
+    Returns:
+        {"pages": pages handed to on_page, "failed": pages that could not be fetched}
+    """
+    if source not in ("sitemap", "crawl"):
+        raise ValueError(f"Unknown source '{source}' (use 'sitemap' or 'crawl').")
+
+    counts = {"pages": 0, "failed": 0}
+
+    async def visit(doc: FetchedDocument):
+        counts["pages"] += 1
+        await on_page(doc)
+
+    if source == "crawl":
+        crawl = await crawl_site(url, max_pages=max_pages, max_depth=max_depth, concurrency=concurrency, on_page=visit)
+        counts["failed"] = crawl["failed"]
+        return counts
+
+    headers = {'User-Agent': random_user_agent()}
+    work: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+
+    async def produce():
+        try:
+            async with aclosing(iter_sitemap_entries(url)) as entries:
+                selected = 0
+                async for entry in entries:
+                    if selected >= max_pages:
+                        break
+                    await work.put(entry.loc)
+                    selected += 1
+        finally:
+            for _ in range(concurrency):
+                await work.put(None)
+
+    async def worker():
+        while True:
+            page_url = await work.get()
+            if page_url is None:
+                return
+            try:
+                doc = await fetch_document(page_url, headers=headers)
+                doc.response.raise_for_status()
+            except Exception:
+                counts["failed"] += 1
+                continue
+            try:
+                await visit(doc)
+            except Exception:
+                # A dead worker would leave produce() blocked on the full queue
+                counts["failed"] += 1
+
+    await asyncio.gather(produce(), *(worker() for _ in range(concurrency)))
+    return counts
@@ -0,0 +1,157 @@
+import asyncio
+from urllib.parse import urlparse
+from typing import List, Dict, Any, Awaitable, Callable, Optional
+from .link_inspector import _extract_targets, check_link, LINK_CHECK_CONCURRENCY
+from .site_crawler import visit_pages
+from ..utils.document import FetchedDocument, normalize_url, run_on_document
+from ..utils.progress import ProgressCallback
+from ..utils.urls import canonicalize, fingerprint, site_key
+from ..utils.useragent import random_user_agent
+
+# Finding callback: broken link record -> awaitable
+FindingCallback = Callable[[Dict[str, Any]], Awaitable[None]]
+
+async def scan_site_links(
+    url: str,
+    source: str = "sitemap",
+    max_pages: int = 200,
+    max_depth: int = 3,
+    concurrency: int = 8,
+    link_concurrency: Optional[int] = None,
+    include_external: bool = True,
+    max_sources: int = 5,
+    on_finding: Optional[FindingCallback] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> Dict[str, Any]:
+    """
+    Finds broken links across a whole site, checking each unique target once.
+
+    Pages come from the sitemap or from a crawl. Links are extracted as pages
+    arrive and pushed through a bounded queue to link-check workers, so
+    checking overlaps page fetching and a slow checker throttles the page
+    side. Only per-link fingerprints are kept for healthy links; source pages
+    are remembered (up to `max_sources` each) only for links still being
+    checked or found broken, which keeps memory flat across hundreds of
+    thousands of link references.
+
+    Args:
+        url: Domain, page URL or sitemap URL.
+        source: "sitemap" or "crawl".
+        max_pages: Max pages whose links are collected.
+        max_depth: Max crawl depth (crawl source only).
+        concurrency: Pages fetched at once.
+        link_concurrency: Links checked at once (SEO_LINK_CHECK_CONCURRENCY by default).
+        include_external: Also check links to other sites.
+        max_sources: Source pages recorded per broken link.
+        on_finding: Optional async callback invoked for each broken link as
+            soon as it is confirmed.
+        progress: Optional async callback invoked as pages complete.
+
+    Returns:
+        Summary with every broken link and the pages referencing it.
+    """
+    if source not in ("sitemap", "crawl"):
+        return {"error": f"Unknown source '{source}' (use 'sitemap' or 'crawl')."}
+
+    site = site_key(urlparse(canonicalize(normalize_url(url))).netloc)
+    headers = {'User-Agent': random_user_agent()}
+    link_workers = max(1, link_concurrency or LINK_CHECK_CONCURRENCY)
+    links: asyncio.Queue = asyncio.Queue(maxsize=link_workers * 4)
+
+    ok = set()
+    # fingerprint -> {"url", "internal", "sources", "references"} for unchecked or broken links
+    pending: Dict[int, Dict[str, Any]] = {}
+    broken: Dict[int, Dict[str, Any]] = {}
+    stats = {"references": 0, "unique": 0, "checked": 0, "cached": 0}
+    done = 0
+    progress_step = max(1, max_pages // 100)
+
+    async def add_page_links(page_url: str, targets: List[str]):
+        for target in dict.fromkeys(targets):
+            target_url = canonicalize(target)
+            internal = site_key(urlparse(target_url).netloc) == site
+            if not include_external and not internal:
+                continue
+            stats["references"] += 1
+            key = fingerprint(target_url)
+            if key in ok:
+                continue
+            record = pending.get(key) or broken.get(key)
+            if record is None:
+                stats["unique"] += 1
+                record = pending[key] = {"url": target, "internal": internal, "sources": [], "references": 0}
+                await links.put(key)
+            record["references"] += 1
+            if len(record["sources"]) < max_sources:
+                record["sources"].append(page_url)
+
+    async def on_page(doc: FetchedDocument):
+        nonlocal done
+        targets = await run_on_document(_extract_targets, doc)
+        await add_page_links(doc.url, targets)
+        done += 1
+        if progress and done % progress_step == 0:
+            await progress(done, max_pages)
+
+    async def link_worker():
+        while True:
+            key = await links.get()
+            if key is None:
+                return
+            record = pending[key]
+            res = await check_link(record["url"], headers)
+            stats["checked"] += 1
+            if res.get("cached"):
+                stats["cached"] += 1
+            del pending[key]
+            if res["status"] >= 400 or res["status"] == 0:
+                record.update(status=res["status"], status_text=res["status_text"])
+                broken[key] = record
+                if on_finding:
+                    try:
+                        await on_finding(record)
+                    except Exception:
+                        pass # Notifications are best-effort (e.g. the client went away)
+            else:
+                ok.add(key)
+
+    async def feed():
+        visited = await visit_pages(url, on_page, source, max_pages, max_depth, concurrency)
+        for _ in checkers:
+            await links.put(None)
+        return visited
+
+    checkers = [asyncio.create_task(link_worker()) for _ in range(link_workers)]
+    feeder = asyncio.create_task(feed())
+    try:
+        # gather fails as soon as a checker dies; otherwise nothing would drain
+        # the bounded queue and feed() would block on it forever
+        pages, *_ = await asyncio.gather(feeder, *checkers)
+    except Exception as e:
+        return {"error": f"Site link scan failed: {str(e)}"}
+    finally:
+        feeder.cancel()
+        for c in checkers:
+            c.cancel()
+
+    if progress:
+        try:
+            await progress(done, done)
+        except Exception:
+            pass
+
+    if pages["pages"] == 0 and not pages["failed"]:
+        return {"error": "No pages found to scan."}
+
+    broken_links = sorted(broken.values(), key=lambda r: r["references"], reverse=True)
+    return {
+        "source": source,
+        "pages_scanned": pages["pages"],
+        "pages_failed": pages["failed"],
+        "link_references": stats["references"],
+        "unique_links": stats["unique"],
+        "links_checked": stats["checked"],
+        "cached_checks": stats["cached"],
+        "broken_count": len(broken_links),
+        "broken_links": broken_links,
+    }
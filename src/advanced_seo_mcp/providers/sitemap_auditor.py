@@ -1,64 +1,162 @@
-import requests
-from urllib.parse import urlparse, urljoin
-import xml.etree.ElementTree as ET
-from typing import List, Dict, Any
+import asyncio
+import hashlib
+import os
+import time
+from array import array
+from contextlib import aclosing
+from urllib.parse import urlparse
+from typing import List, Dict, Any, Optional, Tuple
 from .onpage_analyzer import analyze_onpage
+from .sitemap_parser import SitemapEntry, iter_sitemap_entries
+from ..utils import cache, history, metrics
+from ..utils.document import FetchedDocument, fetch_document, run_on_document
+from ..utils.minhash import NearDuplicateIndex, minhash_signature
+from ..utils.progress import ProgressCallback
+from ..utils.text import tokenize
+from ..utils.urls import canonicalize
+from ..utils.useragent import random_user_agent
 
-def fetch_sitemap_urls(domain_url: str) -> List[str]:
-    """Finds sitemap and extracts URLs."""
-    if not domain_url.startswith('http'):
-        domain_url = 'https://' + domain_url
-        
-    base = f"{urlparse(domain_url).scheme}://{urlparse(domain_url).netloc}"
-    candidates = ['/sitemap.xml', '/sitemap_index.xml', '/wp-sitemap.xml']
-    
-    sitemap_content = None
-    
-    for path in candidates:
-        try:
-            resp = requests.get(urljoin(base, path), timeout=10)
-            if resp.status_code == 200:
-                sitemap_content = resp.content
-                break
-        except: pass
-        
-    if not sitemap_content:
-        return []
+# Stored audits are trusted on an unchanged sitemap <lastmod> for at most this
+# long; older ones are re-checked against the page (validators, body hash).
+LASTMOD_TRUST_SECONDS = float(os.environ.get("SEO_AUDIT_LASTMOD_TRUST_DAYS", 30)) * 86400
+
+async def fetch_sitemap_urls(domain_url: str) -> List[str]:
+    """
+    Finds the site's sitemaps and extracts page URLs (indexes are expanded).
+    Prefer `iter_sitemap_entries` for large sites; this collects everything.
+    """
+    return [entry.loc async for entry in iter_sitemap_entries(domain_url)]
+
+def _record_issues(issues: Dict[str, List[str]], page_url: str, data: Dict[str, Any]) -> None:
+    """Adds one page's on-page result to the aggregated issue buckets."""
+    if "error" in data:
+        return
+
+    if data['headings']['counts']['h1'] == 0:
+        issues['missing_h1'].append(page_url)
+
+    if not data['meta']['description']['content']:
+        issues['missing_meta_desc'].append(page_url)
+
+    if data['content']['thin_content']:
+        issues['thin_content'].append(page_url)
+
+    # A page reused on lastmod alone was not fetched: its timing is from an earlier run
+    if data.get('reused') != 'lastmod' and data['load_time_ms'] > 2000:
+        issues['slow_pages'].append(page_url)
+
+def _page_signature(doc: FetchedDocument):
+    return minhash_signature(tokenize(doc.features.main_text))
+
+def _stored_signature(stored: Dict[str, Any]) -> Optional[array]:
+    # b'' marks a page that had no text to sign
+    if not stored["signature"]:
+        return None
+    signature = array('I')
+    signature.frombytes(stored["signature"])
+    return signature
+
+def _reused(stored: Dict[str, Any], reason: str, load_time_ms: Optional[int] = None) -> Dict[str, Any]:
+    """A stored audit marked as reused; pages fetched this run get this run's load time."""
+    data = dict(stored["result"], reused=reason)
+    if load_time_ms is not None:
+        data["load_time_ms"] = load_time_ms
+    return data
+
+async def _audit_page(entry: SitemapEntry, with_signature: bool, incremental: bool) -> Tuple[Dict[str, Any], Optional[array], Optional[str]]:
+    """
+    On-page audit of one sitemap entry, plus its MinHash signature when requested.
+
+    With `incremental`, the page's stored audit is reused when its sitemap
+    lastmod, HTTP validators (ETag/Last-Modified) or body hash are unchanged.
+    The third value names which one matched ("lastmod", "validator",
+    "content_hash"), or is None when the page was analyzed; reused results
+    carry it as "reused".
+    """
+    key = canonicalize(entry.loc)
+    stored = await cache.safe_call(cache.get_page_audit, key) if incremental else None
+    if stored and with_signature and stored["signature"] is None:
+        stored = None # Audited without duplicate detection; needs a signature now
+    headers = None
+    if stored:
+        if entry.lastmod and entry.lastmod == stored["lastmod"] and time.time() - stored["audited_at"] < LASTMOD_TRUST_SECONDS:
+            return _reused(stored, "lastmod"), _stored_signature(stored), "lastmod"
+        headers = {'User-Agent': random_user_agent()}
+        if stored["etag"]:
+            headers['If-None-Match'] = stored["etag"]
+        if stored["last_modified"]:
+            headers['If-Modified-Since'] = stored["last_modified"]
 
     try:
-        root = ET.fromstring(sitemap_content)
-        # Handle namespaces if present (e.g. {http://www.sitemaps.org/schemas/sitemap/0.9}url)
-        urls = []
-        for child in root:
-            # Very basic XML parsing, works for standard sitemaps
-            for sub in child:
-                if 'loc' in sub.tag:
-                    urls.append(sub.text)
-            if 'loc' in child.tag: # for urlset/url structure
-                 urls.append(child.text)
-                 
-        # Filter None and duplicates
-        return list(set([u for u in urls if u]))
-    except:
-        return []
-
-def audit_sitemap(url: str, limit: int = 5) -> Dict[str, Any]:
+        doc = await fetch_document(entry.loc, headers=headers)
+        if stored and doc.status_code == 304:
+            await cache.safe_call(cache.refresh_page_audit, key, entry.lastmod, None, None)
+            return _reused(stored, "validator", doc.load_time_ms), _stored_signature(stored), "validator"
+        doc.response.raise_for_status()
+    except Exception as e:
+        return {"error": f"Failed to fetch URL: {str(e)}"}, None, None
+
+    etag, last_modified = doc.headers.get('ETag'), doc.headers.get('Last-Modified')
+    content_hash = hashlib.blake2b(doc.content, digest_size=16).hexdigest()
+    if stored and stored["content_hash"] == content_hash:
+        await cache.safe_call(cache.refresh_page_audit, key, entry.lastmod, etag, last_modified)
+        # A 304 answered from the response cache still counts as a validator match
+        reason = "content_hash" if doc.cache_status == "miss" else "validator"
+        return _reused(stored, reason, doc.load_time_ms), _stored_signature(stored), reason
+
+    data = await analyze_onpage(doc)
+    signature = await run_on_document(_page_signature, doc) if with_signature else None
+    if incremental and "error" not in data:
+        stored_signature = (signature.tobytes() if signature is not None else b'') if with_signature else None
+        await cache.safe_call(cache.save_page_audit, key, entry.lastmod, etag, last_modified, content_hash, data, stored_signature)
+    return data, signature, None
+
+async def audit_sitemap(
+    url: str,
+    limit: int = 5,
+    concurrency: int = 16,
+    per_host_concurrency: int = 8,
+    include_raw: bool = True,
+    progress: Optional[ProgressCallback] = None,
+    count_all: bool = True,
+    detect_duplicates: bool = True,
+    duplicate_threshold: float = 0.8,
+    incremental: bool = True,
+) -> Dict[str, Any]:
     """
-    Fetches sitemap and runs On-Page audit on first N URLs.
+    Streams the sitemap and runs On-Page audit on the first N URLs using a
+    worker pool. Audits start as soon as the first entries are parsed.
     
     Args:
         url: Domain URL.
         limit: Max pages to analyze (default 5 to prevent overload).
+        concurrency: Number of pages audited at once across all hosts.
+        per_host_concurrency: Max in-flight pages per host (politeness). The
+            shared HTTP client's SEO_HTTP_MAX_PER_HOST cap also applies.
+        include_raw: Whether to return the full per-page results.
+        progress: Optional async callback invoked as pages complete.
+        count_all: Keep reading past `limit` to report total_in_sitemap. Set
+            False to stop parsing once enough pages have been selected.
+        detect_duplicates: Group pages whose main text is nearly identical
+            (MinHash signatures indexed with LSH; a few hundred bytes per page).
+        duplicate_threshold: Estimated Jaccard similarity of word 5-gram
+            shingles above which two pages count as near-duplicates.
+        incremental: Reuse the stored audit of pages whose sitemap lastmod,
+            ETag/Last-Modified or body hash is unchanged since the last run,
+            and store fresh audits for the next one. Stored audits are
+            trusted on lastmod alone for SEO_AUDIT_LASTMOD_TRUST_DAYS.
+            Reused results carry "reused" (the reason); pages reused on
+            lastmod were not fetched, so they are left out of slow_pages.
         
     Returns:
         Summary of audits.
     """
-    urls = fetch_sitemap_urls(url)
-    if not urls:
-        return {"error": "No sitemap found or empty sitemap."}
-    
-    selected_urls = urls[:limit]
-    results = []
+    workers = max(1, min(concurrency, limit))
+    work: asyncio.Queue = asyncio.Queue(maxsize=workers * 2)
+    results: Dict[int, Dict[str, Any]] = {}
+    selected = 0
+    in_sitemap = 0
+    producing = True
     
     issues = {
         "missing_h1": [],
@@ -66,29 +164,95 @@ def audit_sitemap(url: str, limit: int = 5) -> Dict[str, Any]:
         "thin_content": [],
         "slow_pages": [] # > 2s load time
     }
-    
-    for page_url in selected_urls:
-        data = analyze_onpage(page_url)
-        results.append(data)
-        
-        # Aggregate Issues
-        if "error" not in data:
-            if data['headings']['counts']['h1'] == 0:
-                issues['missing_h1'].append(page_url)
-            
-            if not data['meta']['description']['content']:
-                issues['missing_meta_desc'].append(page_url)
-                
-            if data['content']['thin_content']:
-                issues['thin_content'].append(page_url)
-                
-            if data['load_time_ms'] > 2000:
-                issues['slow_pages'].append(page_url)
-
-    return {
-        "total_scanned": len(selected_urls),
-        "total_in_sitemap": len(urls),
-        "issues_summary": {k: len(v) for k, v in issues.items()},
+    failed = 0
+    done = 0
+    reused = {"lastmod": 0, "validator": 0, "content_hash": 0}
+    # Throttle notifications to roughly one per percent on large audits.
+    progress_step = max(1, limit // 100)
+
+    host_limits: Dict[str, asyncio.Semaphore] = {}
+    duplicates = NearDuplicateIndex(threshold=duplicate_threshold) if detect_duplicates else None
+
+    async def produce():
+        nonlocal selected, in_sitemap, producing
+        try:
+            async with aclosing(iter_sitemap_entries(url)) as entries:
+                async for entry in entries:
+                    in_sitemap += 1
+                    if selected < limit:
+                        await work.put((selected, entry))
+                        selected += 1
+                    elif not count_all:
+                        break
+        finally:
+            producing = False
+            for _ in range(workers):
+                await work.put(None)
+
+    async def worker():
+        nonlocal failed, done
+        while True:
+            item = await work.get()
+            if item is None:
+                return
+            index, entry = item
+            page_url = entry.loc
+            host = urlparse(page_url).netloc
+            if host not in host_limits:
+                host_limits[host] = asyncio.Semaphore(per_host_concurrency)
+            try:
+                async with host_limits[host]:
+                    data, signature, reuse = await _audit_page(entry, duplicates is not None, incremental)
+            except Exception as e:
+                # A dead worker would leave produce() blocked on the full queue
+                data, signature, reuse = {"error": f"Failed to audit page: {str(e) or type(e).__name__}"}, None, None
+            if incremental:
+                metrics.cache_lookup("page_audit", "miss" if reuse is None else "hit")
+                if reuse is not None:
+                    reused[reuse] += 1
+                    # Still an observation: the page was confirmed unchanged
+                    await history.record(page_url, history.onpage_metrics(data))
+
+            # Aggregate issues as results arrive
+            _record_issues(issues, page_url, data)
+            if signature is not None:
+                duplicates.add(page_url, signature)
+            if "error" in data:
+                failed += 1
+            if include_raw:
+                results[index] = data
+
+            done += 1
+            # Until the sitemap is exhausted the page total is only bounded by `limit`
+            total = limit if producing else selected
+            if progress and (done % progress_step == 0 or done == total):
+                try:
+                    await progress(done, total)
+                except Exception:
+                    pass # Progress is best-effort (e.g. the client went away)
+
+    await asyncio.gather(produce(), *(worker() for _ in range(workers)))
+
+    if in_sitemap == 0:
+        return {"error": "No sitemap found or empty sitemap."}
+
+    clusters = duplicates.clusters() if duplicates is not None else []
+    # Cluster URL lists are capped: count from the sizes, list what was kept
+    issues["near_duplicate"] = [u for cluster in clusters for u in cluster["urls"]]
+    issues_summary = {k: len(v) for k, v in issues.items()}
+    issues_summary["near_duplicate"] = sum(cluster["size"] for cluster in clusters)
+
+    summary = {
+        "total_scanned": selected,
+        "total_in_sitemap": in_sitemap if count_all else None,
+        "failed": failed,
+        "issues_summary": issues_summary,
         "issue_details": issues,
-        "raw_results": results
     }
+    if duplicates is not None:
+        summary["duplicate_clusters"] = clusters
+    if incremental:
+        summary["incremental"] = {"reused": reused, "audited": selected - failed - sum(reused.values())}
+    if include_raw:
+        summary["raw_results"] = [results[i] for i in range(selected)]
+    return summary
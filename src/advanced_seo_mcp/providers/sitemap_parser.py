@@ -0,0 +1,249 @@
+import asyncio
+import os
+import zlib
+from lxml import etree
+from urllib.parse import urlparse, urljoin
+from typing import List, Dict, Any, AsyncIterator, Awaitable, Callable, Iterator, NamedTuple, Optional
+from ..utils import http
+from ..utils.document import normalize_url
+from ..utils.urls import fingerprint
+
+# Common locations to check when robots.txt declares no (working) sitemap
+SITEMAP_CANDIDATES = ['/sitemap.xml', '/sitemap_index.xml', '/wp-sitemap.xml']
+# Uncompressed size read per sitemap document (the protocol allows 50 MB);
+# caps gzip bodies too, which can expand far beyond their download size
+MAX_SITEMAP_BYTES = int(float(os.environ.get("SEO_SITEMAP_MAX_MB", 50)) * 1024 * 1024)
+# Largest piece inflated from a gzip body at once
+_INFLATE_CHUNK = 256 * 1024
+
+class SitemapEntry(NamedTuple):
+    """One <url> entry of a sitemap."""
+    loc: str
+    lastmod: Optional[str] = None
+    priority: Optional[float] = None
+
+def _localname(tag: Any) -> str:
+    # Comments/PIs have non-string tags; namespaced tags look like {ns}url
+    if not isinstance(tag, str):
+        return ""
+    return tag.rsplit('}', 1)[-1]
+
+def _child_text(elem: etree._Element, name: str) -> Optional[str]:
+    for child in elem:
+        if _localname(child.tag) == name:
+            return child.text.strip() if child.text else None
+    return None
+
+def _to_priority(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+async def sitemaps_from_robots(base_url: str) -> List[str]:
+    """Returns the `Sitemap:` URLs declared in robots.txt (may be empty)."""
+    try:
+        resp, body, _ = await http.fetch_limited("GET", urljoin(base_url, '/robots.txt'), max_bytes=500 * 1024, timeout=10)
+    except Exception:
+        return []
+    if resp.status_code != 200:
+        return []
+
+    sitemaps = []
+    for line in body.decode('utf-8', 'replace').splitlines():
+        key, _, value = line.partition(':')
+        if key.strip().lower() == 'sitemap' and value.strip():
+            sitemaps.append(urljoin(base_url, value.strip()))
+    return sitemaps
+
+def _inflate(decompressor: Any, data: bytes) -> Iterator[bytes]:
+    """Decompresses `data` in pieces of at most _INFLATE_CHUNK bytes."""
+    while data:
+        piece = decompressor.decompress(data, _INFLATE_CHUNK)
+        if piece:
+            yield piece
+        data = decompressor.unconsumed_tail
+
+async def parse_sitemap(
+    url: str,
+    on_entry: Callable[[SitemapEntry], Awaitable[None]],
+    on_child: Callable[[str], Awaitable[None]],
+) -> bool:
+    """
+    Streams one sitemap document through an incremental parser.
+
+    Gzip bodies (.xml.gz served without Content-Encoding) are detected by
+    their magic bytes and decompressed on the fly. Each <url> is handed to
+    `on_entry` and each child <sitemap> of an index to `on_child` as soon as
+    its closing tag is parsed; processed elements are then discarded, so
+    memory stays flat regardless of document size. Reading stops after
+    MAX_SITEMAP_BYTES of (decompressed) XML.
+
+    Returns:
+        False if the sitemap could not be fetched (non-200), True otherwise.
+    """
+    # Sitemap streams can stall on consumer backpressure, so they do not take
+    # a per-host slot; iter_sitemap_entries bounds them with its own workers.
+    async with http.stream("GET", url, host_limit=False, timeout=30) as resp:
+        if resp.status_code != 200:
+            return False
+
+        parser = etree.XMLPullParser(events=("end",), recover=True, huge_tree=True,
+                                     resolve_entities=False, no_network=True)
+        decompressor = None
+        head = b""
+        fed = 0
+
+        async def handle_events():
+            for _, elem in parser.read_events():
+                name = _localname(elem.tag)
+                if name == 'url':
+                    loc = _child_text(elem, 'loc')
+                    if loc:
+                        await on_entry(SitemapEntry(loc, _child_text(elem, 'lastmod'),
+                                                    _to_priority(_child_text(elem, 'priority'))))
+                elif name == 'sitemap':
+                    loc = _child_text(elem, 'loc')
+                    if loc:
+                        await on_child(loc)
+                else:
+                    continue
+                # Drop the processed element and any already-handled siblings
+                elem.clear()
+                parent = elem.getparent()
+                if parent is not None:
+                    while elem.getprevious() is not None:
+                        del parent[0]
+
+        async for chunk in resp.aiter_bytes():
+            if head is not None:
+                # Sniff the gzip magic number before feeding the parser
+                head += chunk
+                if len(head) < 2:
+                    continue
+                if head[:2] == b'\x1f\x8b':
+                    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                chunk, head = head, None
+            for piece in [chunk] if decompressor is None else _inflate(decompressor, chunk):
+                piece = piece[:MAX_SITEMAP_BYTES - fed]
+                fed += len(piece)
+                parser.feed(piece)
+                await handle_events()
+                if fed >= MAX_SITEMAP_BYTES:
+                    break
+            if fed >= MAX_SITEMAP_BYTES:
+                break # Cut off at the cap; entries parsed so far stand
+        else:
+            if head:
+                parser.feed(head)
+            if decompressor is not None:
+                parser.feed(decompressor.flush()[:MAX_SITEMAP_BYTES - fed])
+        try:
+            parser.close()
+        except etree.XMLSyntaxError:
+            pass
+        await handle_events()
+    return True
+
+async def iter_sitemap_entries(
+    domain_url: str,
+    concurrency: int = 4,
+    max_sitemaps: int = 50000,
+    buffer_size: int = 1000,
+    dedupe: bool = True,
+) -> AsyncIterator[SitemapEntry]:
+    """
+    Yields every page entry reachable from a site's sitemaps.
+
+    Sitemaps are discovered from robots.txt `Sitemap:` lines (or the URL
+    itself if it points at an .xml/.xml.gz file), falling back to common
+    locations when none of those yields an entry. Sitemap indexes are expanded recursively by `concurrency` workers.
+    Entries flow through a bounded queue, so a slow consumer applies
+    backpressure to the parsers instead of buffering the whole tree.
+
+    Args:
+        domain_url: Domain, page URL or direct sitemap URL.
+        concurrency: Number of sitemap documents fetched at once.
+        max_sitemaps: Safety cap on the number of sitemap documents visited.
+        buffer_size: Max parsed entries waiting for the consumer.
+        dedupe: Skip repeated <loc> values (tracked as 64-bit fingerprints).
+    """
+    domain_url = normalize_url(domain_url)
+    parsed = urlparse(domain_url)
+    base = f"{parsed.scheme}://{parsed.netloc}"
+
+    entries: asyncio.Queue = asyncio.Queue(maxsize=buffer_size)
+    todo: asyncio.Queue = asyncio.Queue()
+    seen_sitemaps = set()
+    seen_pages = set()
+    done = object()
+
+    found = 0
+
+    async def on_entry(entry: SitemapEntry):
+        nonlocal found
+        found += 1
+        if dedupe:
+            key = fingerprint(entry.loc)
+            if key in seen_pages:
+                return
+            seen_pages.add(key)
+        await entries.put(entry)
+
+    async def on_child(loc: str):
+        loc = urljoin(base, loc)
+        if loc not in seen_sitemaps and len(seen_sitemaps) < max_sitemaps:
+            seen_sitemaps.add(loc)
+            todo.put_nowait(loc)
+
+    async def worker():
+        while True:
+            sitemap_url = await todo.get()
+            try:
+                await parse_sitemap(sitemap_url, on_entry, on_child)
+            except Exception:
+                pass # Unreachable or malformed child sitemaps are skipped
+            finally:
+                todo.task_done()
+
+    async def produce():
+        workers = [asyncio.create_task(worker()) for _ in range(max(1, concurrency))]
+        try:
+            if parsed.path.endswith(('.xml', '.xml.gz')):
+                roots = [domain_url]
+            else:
+                roots = await sitemaps_from_robots(base)
+
+            for root in roots:
+                await on_child(root)
+            await todo.join()
+
+            if not found:
+                # No declared sitemap worked (missing, stale or 404 robots.txt entries)
+                for path in SITEMAP_CANDIDATES:
+                    candidate = urljoin(base, path)
+                    if candidate in seen_sitemaps:
+                        continue
+                    seen_sitemaps.add(candidate)
+                    try:
+                        if await parse_sitemap(candidate, on_entry, on_child):
+                            break
+                    except Exception:
+                        continue
+                await todo.join()
+        except Exception:
+            pass # Discovery failures simply end the stream
+        finally:
+            for w in workers:
+                w.cancel()
+        await entries.put(done)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            entry = await entries.get()
+            if entry is done:
+                break
+            yield entry
+    finally:
+        producer.cancel()
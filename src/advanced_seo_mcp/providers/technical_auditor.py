@@ -1,9 +1,10 @@
-import requests
+import asyncio
 from urllib.parse import urlparse, urljoin
-from fake_useragent import UserAgent
 from typing import Dict, Any
+from ..utils import history, http
+from ..utils.useragent import random_user_agent
 
-def check_technical_health(url: str) -> Dict[str, Any]:
+async def check_technical_health(url: str) -> Dict[str, Any]:
     """
     Performs a technical SEO audit of a given domain or URL.
     
@@ -42,8 +43,7 @@ def check_technical_health(url: str) -> Dict[str, Any]:
     parsed = urlparse(url)
     base_url = f"{parsed.scheme}://{parsed.netloc}"
     
-    ua = UserAgent()
-    headers = {'User-Agent': ua.random}
+    headers = {'User-Agent': random_user_agent()}
     
     result = {
         "url": url,
@@ -52,49 +52,55 @@ def check_technical_health(url: str) -> Dict[str, Any]:
         "security": {}
     }
 
-    # Check robots.txt
-    robots_url = urljoin(base_url, '/robots.txt')
-    try:
-        r_resp = requests.get(robots_url, headers=headers, timeout=5)
-        result["robots_txt"] = {
-            "exists": r_resp.status_code == 200,
-            "url": robots_url,
-            "size": len(r_resp.content) if r_resp.status_code == 200 else 0
+    # The three checks are independent, so they run concurrently.
+    async def check_robots():
+        robots_url = urljoin(base_url, '/robots.txt')
+        try:
+            r_resp = await http.get(robots_url, headers=headers, timeout=5)
+            return {
+                "exists": r_resp.status_code == 200,
+                "url": robots_url,
+                "size": len(r_resp.content) if r_resp.status_code == 200 else 0
+            }
+        except:
+            return {"exists": False, "error": "Request failed"}
+
+    async def check_sitemap():
+        # Common locations to check
+        sitemap_candidates = ['/sitemap.xml', '/sitemap_index.xml', '/wp-sitemap.xml']
+        found_sitemap = None
+
+        for path in sitemap_candidates:
+            sitemap_url = urljoin(base_url, path)
+            try:
+                s_resp = await http.head(sitemap_url, headers=headers, timeout=5)
+                if s_resp.status_code == 200:
+                    found_sitemap = sitemap_url
+                    break
+            except:
+                continue
+
+        return {
+            "found": found_sitemap is not None,
+            "url": found_sitemap if found_sitemap else "Not found in common locations"
         }
-    except:
-        result["robots_txt"] = {"exists": False, "error": "Request failed"}
 
-    # Check sitemap.xml
-    # Common locations to check
-    sitemap_candidates = ['/sitemap.xml', '/sitemap_index.xml', '/wp-sitemap.xml']
-    found_sitemap = None
-    
-    for path in sitemap_candidates:
-        sitemap_url = urljoin(base_url, path)
+    async def check_security():
         try:
-            s_resp = requests.head(sitemap_url, headers=headers, timeout=5)
-            if s_resp.status_code == 200:
-                found_sitemap = sitemap_url
-                break
+            resp = await http.head(url, headers=headers, timeout=5)
+            sec_headers = resp.headers
+            return {
+                "https": parsed.scheme == 'https',
+                "hsts": 'Strict-Transport-Security' in sec_headers,
+                "x_frame_options": sec_headers.get('X-Frame-Options', 'Missing'),
+                "x_content_type_options": sec_headers.get('X-Content-Type-Options', 'Missing')
+            }
         except:
-            continue
-            
-    result["sitemap"] = {
-        "found": found_sitemap is not None,
-        "url": found_sitemap if found_sitemap else "Not found in common locations"
-    }
+            return {"error": "Could not fetch headers"}
 
-    # Security Headers
-    try:
-        resp = requests.head(url, headers=headers, timeout=5)
-        sec_headers = resp.headers
-        result["security"] = {
-            "https": parsed.scheme == 'https',
-            "hsts": 'Strict-Transport-Security' in sec_headers,
-            "x_frame_options": sec_headers.get('X-Frame-Options', 'Missing'),
-            "x_content_type_options": sec_headers.get('X-Content-Type-Options', 'Missing')
-        }
-    except:
-        result["security"] = {"error": "Could not fetch headers"}
+    result["robots_txt"], result["sitemap"], result["security"] = await asyncio.gather(
+        check_robots(), check_sitemap(), check_security()
+    )
 
+    await history.record(base_url, history.technical_metrics(result))
     return result
\ No newline at end of file
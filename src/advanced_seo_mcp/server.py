@@ -1,4 +1,9 @@
-from fastmcp import FastMCP
+import time
+_import_started = time.perf_counter()
+
+import asyncio
+from fastmcp import FastMCP, Context
+from fastmcp.server.middleware import Middleware
 from typing import Dict, Any, List, Optional
 from dotenv import load_dotenv
 import os
@@ -9,26 +14,75 @@ from pathlib import Path
 root_dir = Path(__file__).resolve().parents[2]
 load_dotenv(root_dir / '.env')
 
-from .providers.onpage_analyzer import analyze_onpage
-from .providers.technical_auditor import check_technical_health
-from .providers.reporter import generate_markdown_report
-from .providers.psi_analyzer import analyze_speed
-from .providers.competitor_analyzer import analyze_competitors
-from .providers.sitemap_auditor import audit_sitemap
-from .providers.schema_validator import validate_schema
-from .providers.link_inspector import check_broken_links
-from .providers.content_analyzer import analyze_keywords
-from .providers.ahrefs_scraper import (
-    get_backlinks_data, 
-    generate_keywords, 
-    get_traffic_data, 
-    check_keyword_difficulty
-)
+# Providers are imported inside the tools that use them: MCP clients spawn
+# the server per session, and most sessions only touch a few tools.
+from .utils import metrics
 
 mcp = FastMCP("Advanced SEO MCP")
 
+class ToolMetrics(Middleware):
+    """Records latency and outcome of every tool call."""
+
+    async def on_call_tool(self, context, call_next):
+        global _first_response_recorded
+        tool = context.message.name
+        started = time.perf_counter()
+        outcome = "exception"
+        try:
+            result = await call_next(context)
+            # Providers report failures as {"error": ...} rather than raising
+            content = getattr(result, "structured_content", None)
+            outcome = "error" if isinstance(content, dict) and "error" in content else "ok"
+            return result
+        finally:
+            metrics.observe("seo_tool_duration_seconds", time.perf_counter() - started, tool=tool)
+            metrics.inc("seo_tool_calls_total", tool=tool, outcome=outcome)
+            if not _first_response_recorded:
+                _first_response_recorded = True
+                metrics.set_gauge("seo_first_tool_response_seconds", time.perf_counter() - _import_started, tool=tool)
+
+_first_response_recorded = False
+mcp.add_middleware(ToolMetrics())
+
+async def with_http_cache_stats(coro) -> Dict[str, Any]:
+    """Awaits a provider call and attaches its HTTP cache hit/revalidation counts."""
+    from .utils.cache import track_http_cache
+    with track_http_cache() as stats:
+        result = await coro
+    if isinstance(result, dict):
+        result["http_cache"] = stats
+    return result
+
+def _page_row(data: Dict[str, Any]) -> Dict[str, Any]:
+    from .providers.onpage_analyzer import compact_onpage
+    row = {"url": data["url"], **compact_onpage(data)}
+    if "reused" in data:
+        row["reused"] = data["reused"]
+    return row
+
+async def compact_lists(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Keeps a site-wide result small: long lists keep their first page inline and
+    the rest is stored server-side for fetch_results (see each "<list>_page").
+    Per-page audit results are reduced to their key fields inline.
+    """
+    from .utils.results import paginate
+    if not isinstance(result, dict) or "error" in result:
+        return result
+    await paginate(result, "raw_results", project=_page_row)
+    for issue in list(result.get("issue_details", {})):
+        await paginate(result["issue_details"], issue)
+    await paginate(result, "duplicate_clusters")
+    await paginate(result, "broken_links")
+    await paginate(result, "results")
+    graph = result.get("link_graph")
+    if graph:
+        await paginate(graph, "urls")
+        await paginate(graph, "edge_list")
+    return result
+
 @mcp.tool()
-def generate_audit_report(url: str, include_ahrefs: bool = True) -> str:
+async def generate_audit_report(url: str, include_ahrefs: bool = True) -> str:
     """
     Generates a full SEO audit report (Markdown) and saves it locally.
     Combines On-Page, Technical, Ahrefs data into a single file.
@@ -40,63 +94,230 @@ def generate_audit_report(url: str, include_ahrefs: bool = True) -> str:
     Returns:
         The absolute file path of the saved report.
     """
-    return generate_markdown_report(url, include_ahrefs)
+    from .providers.reporter import generate_markdown_report
+    return await generate_markdown_report(url, include_ahrefs)
 
 @mcp.tool()
-def analyze_page_speed(url: str, strategy: str = "mobile") -> Dict[str, Any]:
+async def analyze_page_speed(url: str, strategy: str = "mobile", include_screenshot: bool = False) -> Dict[str, Any]:
     """
     Analyzes site speed using Google PageSpeed Insights.
-    Requires GOOGLE_PSI_API_KEY in .env.
+    Requires GOOGLE_PSI_API_KEY in .env. Results are cached per URL, strategy and day.
     
     Args:
         url: URL to test.
         strategy: 'mobile' or 'desktop'.
+        include_screenshot: Also return the final screenshot (base64, ~50-100 KB).
     """
-    return analyze_speed(url, strategy)
+    from .providers.psi_analyzer import analyze_speed
+    return await analyze_speed(url, strategy, include_screenshot)
 
 @mcp.tool()
-def check_schema_markup(url: str) -> Dict[str, Any]:
+async def check_schema_markup(url: str) -> Dict[str, Any]:
     """
     Validates JSON-LD Schema Markup on a page.
     """
-    return validate_schema(url)
+    from .providers.schema_validator import validate_schema
+    return await with_http_cache_stats(validate_schema(url))
 
 @mcp.tool()
-def check_broken_links_on_page(url: str, limit: int = 20) -> Dict[str, Any]:
+async def check_broken_links_on_page(url: str, limit: int = 20, concurrency: Optional[int] = None) -> Dict[str, Any]:
     """
     Scans a page for broken links (404s).
+    Link statuses are cached, so re-checking shared links is cheap.
+    `concurrency` defaults to SEO_LINK_CHECK_CONCURRENCY (16).
     """
-    return check_broken_links(url, limit)
+    from .providers.link_inspector import check_broken_links
+    return await with_http_cache_stats(check_broken_links(url, limit, concurrency))
 
 @mcp.tool()
-def analyze_content_density(url: str, target_keyword: str = None) -> Dict[str, Any]:
+async def analyze_content_density(url: str, target_keyword: str = None, keywords: List[str] = None) -> Dict[str, Any]:
     """
     Analyzes keyword density and TF-IDF metrics.
+    Pass `keywords` to count many words/phrases at once (whole-word matches).
+    """
+    from .providers.content_analyzer import analyze_keywords
+    return await with_http_cache_stats(analyze_keywords(url, target_keyword, keywords))
+
+@mcp.tool()
+async def site_broken_links_scan(
+    url: str,
+    source: str = "sitemap",
+    max_pages: int = 200,
+    max_depth: int = 3,
+    concurrency: int = 8,
+    link_concurrency: Optional[int] = None,
+    include_external: bool = True,
+    compact: bool = True,
+    ctx: Context = None,
+) -> Dict[str, Any]:
+    """
+    Finds broken links across a whole site (not just one page).
+    Collects links from every page, checks each unique link once, and lists
+    the pages that reference each broken one. Broken links are also streamed
+    as log messages while the scan runs.
+    
+    Args:
+        url: Domain URL (e.g. 'example.com').
+        source: 'sitemap' (pages listed in the sitemap) or 'crawl' (follow links from the URL).
+        max_pages: Max number of pages to collect links from (Default: 200).
+        max_depth: Max clicks from the start page when source is 'crawl' (Default: 3).
+        concurrency: Pages fetched at once (Default: 8).
+        link_concurrency: Links checked at once (Default: SEO_LINK_CHECK_CONCURRENCY, 16).
+        include_external: Also check links to other sites (Default: True).
+        compact: Return the first page of broken links and a cursor for fetch_results.
+    """
+    from .providers.site_link_auditor import scan_site_links
+    async def on_finding(finding: Dict[str, Any]):
+        if ctx is not None:
+            await ctx.warning(f"Broken link ({finding['status']}): {finding['url']}", extra=finding)
+
+    async def progress(done: int, total: int):
+        if ctx is not None:
+            await ctx.report_progress(progress=done, total=total, message=f"Scanned {done}/{total} pages")
+
+    result = await with_http_cache_stats(scan_site_links(
+        url, source, max_pages, max_depth, concurrency, link_concurrency,
+        include_external, on_finding=on_finding, progress=progress,
+    ))
+    return await compact_lists(result) if compact else result
+
+@mcp.tool()
+async def build_content_index(
+    url: str,
+    source: str = "sitemap",
+    max_pages: int = 200,
+    max_depth: int = 3,
+    concurrency: int = 8,
+    ctx: Context = None,
+) -> Dict[str, Any]:
+    """
+    Builds a site-wide content index so pages can be scored with real TF-IDF
+    (how distinctive a word is on a page compared to the rest of the site).
+    Run again to add more pages. Reports progress while it runs.
+    
+    Args:
+        url: Domain URL (e.g. 'example.com').
+        source: 'sitemap' (pages listed in the sitemap) or 'crawl' (follow links from the URL).
+        max_pages: Max number of pages to index (Default: 200).
+        max_depth: Max clicks from the start page when source is 'crawl' (Default: 3).
+        concurrency: Pages fetched at once (Default: 8).
+    """
+    from .providers.corpus_index import build_index
+    async def progress(done: int, total: int):
+        if ctx is not None:
+            await ctx.report_progress(progress=done, total=total, message=f"Indexed {done}/{total} pages")
+
+    return await with_http_cache_stats(build_index(url, source, max_pages, max_depth, concurrency, progress))
+
+@mcp.tool()
+async def tfidf_top_terms(url: str, top: int = 10) -> Dict[str, Any]:
+    """
+    Returns a page's most distinctive terms by TF-IDF against its site.
+    Requires build_content_index to have been run for the site first.
+    
+    Args:
+        url: Page URL (must be part of the index).
+        top: Number of terms to return (Default: 10).
     """
-    return analyze_keywords(url, target_keyword)
+    from .providers.corpus_index import page_top_terms
+    return page_top_terms(url, top)
 
 @mcp.tool()
-def compare_competitors(my_domain: str, competitor_domain: str) -> Dict[str, Any]:
+async def compare_competitors(my_domain: str, competitor_domain: str) -> Dict[str, Any]:
     """
     Compares SEO metrics (Backlinks, Traffic, DR) of two domains.
     Requires CAPSOLVER_API_KEY.
     """
-    return analyze_competitors(my_domain, competitor_domain)
+    from .providers.competitor_analyzer import analyze_competitors
+    return await analyze_competitors(my_domain, competitor_domain)
 
 @mcp.tool()
-def bulk_sitemap_audit(url: str, limit: int = 5) -> Dict[str, Any]:
+async def bulk_sitemap_audit(
+    url: str,
+    limit: int = 5,
+    concurrency: int = 16,
+    per_host_concurrency: int = 8,
+    include_raw: bool = True,
+    detect_duplicates: bool = True,
+    incremental: bool = True,
+    compact: bool = True,
+    ctx: Context = None,
+) -> Dict[str, Any]:
     """
-    Scans the sitemap and runs On-Page audit on multiple pages.
-    Useful for finding site-wide issues (e.g., missing H1s).
+    Scans the sitemap and runs On-Page audit on multiple pages in parallel.
+    Useful for finding site-wide issues (e.g., missing H1s) and clusters of
+    near-duplicate pages (faceted or paginated copies).
+    Reports progress while it runs.
     
     Args:
         url: Domain URL (e.g. 'example.com').
-        limit: Max number of pages to scan (Default: 5). High numbers take time!
+        limit: Max number of pages to scan (Default: 5).
+        concurrency: Pages audited at once (Default: 16).
+        per_host_concurrency: Max in-flight pages per host (Default: 8).
+        include_raw: Include full per-page results (set False for large audits).
+        detect_duplicates: Cluster pages whose main text is nearly identical.
+        incremental: Reuse stored results of pages unchanged since the last audit
+            (same sitemap lastmod, ETag/Last-Modified or content hash).
+        compact: Keep the response small whatever the audit size: key fields for
+            the first pages inline, full results and long lists via fetch_results.
+    """
+    from .providers.sitemap_auditor import audit_sitemap
+    async def progress(done: int, total: int):
+        if ctx is not None:
+            await ctx.report_progress(progress=done, total=total, message=f"Audited {done}/{total} pages")
+
+    result = await with_http_cache_stats(audit_sitemap(
+        url, limit, concurrency, per_host_concurrency, include_raw, progress,
+        detect_duplicates=detect_duplicates, incremental=incremental,
+    ))
+    return await compact_lists(result) if compact else result
+
+@mcp.tool()
+async def crawl_site_audit(
+    url: str,
+    max_pages: int = 100,
+    max_depth: int = 3,
+    concurrency: int = 8,
+    per_host_concurrency: int = 4,
+    crawl_delay: float = 0.0,
+    respect_robots: bool = True,
+    include_raw: bool = False,
+    include_graph: bool = False,
+    compact: bool = True,
+    ctx: Context = None,
+) -> Dict[str, Any]:
     """
-    return audit_sitemap(url, limit)
+    Crawls a site from a seed URL (breadth-first, following internal links)
+    and runs On-Page audit on every page found. Works without a sitemap.
+    Also maps the internal link graph (most/least linked pages).
+    Reports progress while it runs.
+    
+    Args:
+        url: Seed URL or domain (e.g. 'example.com').
+        max_pages: Max number of pages to crawl (Default: 100).
+        max_depth: Max clicks from the seed page (Default: 3).
+        concurrency: Pages fetched at once (Default: 8).
+        per_host_concurrency: Max in-flight pages per host (Default: 4).
+        crawl_delay: Min seconds between requests to the host (Default: 0).
+        respect_robots: Skip URLs disallowed by robots.txt (Default: True).
+        include_raw: Include full per-page results.
+        include_graph: Include the full list of internal link edges.
+        compact: Key fields for the first pages inline, full results and long
+            lists via fetch_results.
+    """
+    from .providers.site_crawler import crawl_site
+    async def progress(done: int, total: int):
+        if ctx is not None:
+            await ctx.report_progress(progress=done, total=total, message=f"Crawled {done}/{total} pages")
+
+    result = await with_http_cache_stats(crawl_site(
+        url, max_pages, max_depth, concurrency, per_host_concurrency, crawl_delay,
+        respect_robots, include_raw, include_graph, progress,
+    ))
+    return await compact_lists(result) if compact else result
 
 @mcp.tool()
-def onpage_audit(url: str) -> Dict[str, Any]:
+async def onpage_audit(url: str, head_only: bool = False) -> Dict[str, Any]:
     """
     Performs a detailed on-page SEO audit of a specific URL.
     Checks meta tags, heading structure, word count, internal/external links, and image alt tags.
@@ -104,11 +325,119 @@ def onpage_audit(url: str) -> Dict[str, Any]:
     
     Args:
         url: The full URL to analyze (e.g. 'https://example.com/blog/post-1')
+        head_only: Only check meta tags (title, description, canonical, robots);
+            the page is read up to </head>, which is much faster on large pages.
     """
-    return analyze_onpage(url)
+    from .providers.onpage_analyzer import analyze_onpage
+    return await with_http_cache_stats(analyze_onpage(url, head_only))
+
+async def _batch(kind: str, urls: List[str], compact: bool, concurrency: int, per_host_concurrency: int,
+                 ctx: Optional[Context], **options: Any) -> Dict[str, Any]:
+    from .providers.batch_auditor import audit_urls
+
+    async def progress(done: int, total: int):
+        if ctx is not None:
+            await ctx.report_progress(progress=done, total=total, message=f"Finished {done}/{total} URLs")
+
+    result = await with_http_cache_stats(audit_urls(
+        kind, urls, compact, concurrency, per_host_concurrency, progress, **options,
+    ))
+    # Compact batches come back a page at a time (see results_page / fetch_results)
+    return await compact_lists(result) if compact else result
 
 @mcp.tool()
-def technical_health_check(url: str) -> Dict[str, Any]:
+async def batch_onpage_audit(
+    urls: List[str],
+    compact: bool = True,
+    concurrency: int = 16,
+    per_host_concurrency: int = 8,
+    head_only: bool = False,
+    ctx: Context = None,
+) -> Dict[str, Any]:
+    """
+    Runs onpage_audit on many URLs in one call, concurrently.
+    Failed URLs are reported inline with an "error" and do not fail the batch.
+
+    Args:
+        urls: URLs to audit (duplicates are audited once).
+        compact: Key fields per URL (title, description length, H1s, words, links, alts) instead of full results.
+        concurrency: URLs audited at once (Default: 16).
+        per_host_concurrency: Max in-flight URLs per host (Default: 8).
+        head_only: Only check meta tags, reading each page up to </head>.
+    """
+    return await _batch("onpage", urls, compact, concurrency, per_host_concurrency, ctx, head_only=head_only)
+
+@mcp.tool()
+async def batch_check_schema_markup(
+    urls: List[str],
+    compact: bool = True,
+    concurrency: int = 16,
+    per_host_concurrency: int = 8,
+    ctx: Context = None,
+) -> Dict[str, Any]:
+    """
+    Validates JSON-LD Schema Markup on many URLs in one call, concurrently.
+
+    Args:
+        urls: URLs to check.
+        compact: Schema types and errors per URL instead of the raw JSON-LD.
+        concurrency: URLs checked at once (Default: 16).
+        per_host_concurrency: Max in-flight URLs per host (Default: 8).
+    """
+    return await _batch("schema", urls, compact, concurrency, per_host_concurrency, ctx)
+
+@mcp.tool()
+async def batch_technical_health_check(
+    urls: List[str],
+    concurrency: int = 16,
+    per_host_concurrency: int = 8,
+    ctx: Context = None,
+) -> Dict[str, Any]:
+    """
+    Runs technical_health_check (robots.txt, sitemap, security headers) on many URLs or domains at once.
+
+    Args:
+        urls: URLs or domains to check.
+        concurrency: URLs checked at once (Default: 16).
+        per_host_concurrency: Max in-flight URLs per host (Default: 8).
+    """
+    return await _batch("technical", urls, True, concurrency, per_host_concurrency, ctx)
+
+@mcp.tool()
+async def batch_analyze_page_speed(
+    urls: List[str],
+    strategies: Optional[List[str]] = None,
+    include_screenshot: bool = False,
+    concurrency: int = 8,
+    compact: bool = True,
+    ctx: Context = None,
+) -> Dict[str, Any]:
+    """
+    Runs PageSpeed Insights for many URLs and both strategies in one call
+    (Requires GOOGLE_PSI_API_KEY). Requests are paced to the PSI quota
+    (GOOGLE_PSI_QUOTA_PER_100S), retried on 429/5xx with backoff, and cached
+    per URL, strategy and day.
+
+    Args:
+        urls: URLs to test.
+        strategies: 'mobile' and/or 'desktop' (Default: both).
+        include_screenshot: Also fetch base64 screenshots (large).
+        concurrency: PSI runs in flight at once (Default: 8; each takes 10-30s).
+        compact: Return the first page of per-URL results and a cursor for fetch_results.
+    """
+    from .providers.psi_analyzer import analyze_speed_batch
+    if strategies is None:
+        strategies = ["mobile", "desktop"]
+
+    async def progress(done: int, total: int):
+        if ctx is not None:
+            await ctx.report_progress(progress=done, total=total, message=f"Finished {done}/{total} PSI runs")
+
+    result = await analyze_speed_batch(urls, strategies, include_screenshot, concurrency, progress=progress)
+    return await compact_lists(result) if compact else result
+
+@mcp.tool()
+async def technical_health_check(url: str) -> Dict[str, Any]:
     """
     Checks technical SEO aspects of a domain/URL.
     Verifies robots.txt, sitemap.xml, and security headers (HTTPS, HSTS).
@@ -117,10 +446,11 @@ def technical_health_check(url: str) -> Dict[str, Any]:
     Args:
         url: The domain or URL to check.
     """
-    return check_technical_health(url)
+    from .providers.technical_auditor import check_technical_health
+    return await check_technical_health(url)
 
 @mcp.tool()
-def get_backlinks(domain: str) -> Optional[Dict[str, Any]]:
+async def get_backlinks(domain: str) -> Optional[Dict[str, Any]]:
     """
     Retrieves backlink data for a domain using Ahrefs (Requires CAPSOLVER_API_KEY).
     Returns domain rating, total backlinks, and a list of top referring pages.
@@ -128,13 +458,14 @@ def get_backlinks(domain: str) -> Optional[Dict[str, Any]]:
     Args:
         domain: The domain to analyze (e.g. 'example.com')
     """
+    from .providers.ahrefs_scraper import get_backlinks_data
     try:
-        return get_backlinks_data(domain)
+        return await get_backlinks_data(domain)
     except Exception as e:
         return {"error": str(e)}
 
 @mcp.tool()
-def keyword_ideas(keyword: str, country: str = "us") -> Optional[List[Dict[str, Any]]]:
+async def keyword_ideas(keyword: str, country: str = "us") -> Optional[List[Dict[str, Any]]]:
     """
     Generates keyword ideas and questions based on a seed keyword (Requires CAPSOLVER_API_KEY).
     
@@ -142,13 +473,14 @@ def keyword_ideas(keyword: str, country: str = "us") -> Optional[List[Dict[str,
         keyword: The seed keyword.
         country: Two-letter country code (default: 'us').
     """
+    from .providers.ahrefs_scraper import generate_keywords
     try:
-        return generate_keywords(keyword, country)
+        return await generate_keywords(keyword, country)
     except Exception as e:
         return [{"error": str(e)}]
 
 @mcp.tool()
-def estimate_traffic(domain: str, country: str = "None") -> Optional[Dict[str, Any]]:
+async def estimate_traffic(domain: str, country: str = "None") -> Optional[Dict[str, Any]]:
     """
     Estimates monthly search traffic and value for a domain (Requires CAPSOLVER_API_KEY).
     
@@ -156,13 +488,14 @@ def estimate_traffic(domain: str, country: str = "None") -> Optional[Dict[str, A
         domain: The domain to check.
         country: Optional country filter.
     """
+    from .providers.ahrefs_scraper import get_traffic_data
     try:
-        return get_traffic_data(domain, country)
+        return await get_traffic_data(domain, country)
     except Exception as e:
         return {"error": str(e)}
 
 @mcp.tool()
-def check_difficulty(keyword: str, country: str = "us") -> Optional[Dict[str, Any]]:
+async def check_difficulty(keyword: str, country: str = "us") -> Optional[Dict[str, Any]]:
     """
     Checks keyword difficulty and returns SERP analysis (Requires CAPSOLVER_API_KEY).
     
@@ -170,12 +503,103 @@ def check_difficulty(keyword: str, country: str = "us") -> Optional[Dict[str, An
         keyword: The keyword to analyze.
         country: Two-letter country code (default: 'us').
     """
+    from .providers.ahrefs_scraper import check_keyword_difficulty
     try:
-        return check_keyword_difficulty(keyword, country)
+        return await check_keyword_difficulty(keyword, country)
     except Exception as e:
         return {"error": str(e)}
 
+@mcp.tool()
+async def fetch_results(cursor: str, limit: int = 20, fields: List[str] = None) -> Dict[str, Any]:
+    """
+    Pages through results stored server-side by compact responses
+    (the next_cursor / full_cursor values in their "<list>_page" entries).
+    Stored results expire after SEO_RESULT_TTL_HOURS (Default: 24).
+
+    Args:
+        cursor: Cursor from a previous response.
+        limit: Max items to return (Default: 20).
+        fields: Only return these top-level keys of each item (e.g. ['url', 'meta']).
+    """
+    from .utils.results import fetch_page
+    return await asyncio.to_thread(fetch_page, cursor, limit, fields)
+
+@mcp.tool()
+async def audit_trend(domain: str, metric: str = None, days: float = 90, url: str = None, limit: int = 500) -> Dict[str, Any]:
+    """
+    Trend of a stored audit metric over time, from the local audit history
+    (every on-page, technical, PageSpeed and Ahrefs result is recorded).
+    E.g. metric='ahrefs.domain_rating', days=90 for "DR over 90 days".
+
+    Args:
+        domain: Domain (e.g. 'example.com').
+        metric: Metric name; omit to list the metrics recorded for the domain.
+        days: How far back to look (Default: 90).
+        url: Restrict to one page URL.
+        limit: Max points returned.
+    """
+    from .utils import history
+    if not metric:
+        return {"domain": history.domain_of(domain), "metrics": await asyncio.to_thread(history.list_metrics, domain)}
+    points = await asyncio.to_thread(history.trend, domain, metric, days, url, limit)
+    return {"domain": history.domain_of(domain), "metric": metric, "days": days, "points": points}
+
+@mcp.tool()
+async def audit_changes(
+    domain: str,
+    metric: str,
+    change: str = "any",
+    since_last_audit: bool = True,
+    days: float = None,
+    limit: int = 500,
+) -> Dict[str, Any]:
+    """
+    Pages whose stored audit metric changed, from the local audit history.
+    E.g. metric='onpage.h1_count', change='lost' for "pages that lost their H1 since last audit".
+
+    Args:
+        domain: Domain (e.g. 'example.com').
+        metric: Metric name (see audit_trend without a metric for the list).
+        change: 'any', 'lost' (was set/non-zero, now empty/zero), 'gained', 'up' or 'down'.
+        since_last_audit: Only changes that showed up in each page's most recent audit.
+        days: Only changes first seen within this many days.
+        limit: Max pages returned.
+    """
+    from .utils import history
+    if change not in history.CHANGE_KINDS:
+        return {"error": f"Unknown change '{change}' (use {', '.join(history.CHANGE_KINDS)})."}
+    pages = await asyncio.to_thread(history.changes, domain, metric, change, since_last_audit, days, limit)
+    return {"domain": history.domain_of(domain), "metric": metric, "change": change, "count": len(pages), "pages": pages}
+
+@mcp.tool()
+async def server_metrics(reset: bool = False) -> Dict[str, Any]:
+    """
+    Returns the server's runtime metrics: per-tool and per-stage latency
+    (count, mean, p50/p95/p99 ms), HTTP requests/bytes/errors per host and
+    cache hit/miss counts. Stages separate page fetch, HTML parse, link
+    checks, PSI calls, captcha solves/waits, Ahrefs lookups and report stages.
+
+    Args:
+        reset: Clear the counters after reading them.
+    """
+    snapshot = metrics.snapshot()
+    if reset:
+        metrics.reset()
+    return snapshot
+
+@mcp.resource("metrics://prometheus", mime_type="text/plain")
+def prometheus_metrics() -> str:
+    """Server metrics in Prometheus text format."""
+    return metrics.render_prometheus()
+
+# Everything above is what a client waits for before the handshake
+metrics.set_gauge("seo_startup_seconds", time.perf_counter() - _import_started)
+
 def main():
+    port = os.environ.get("SEO_METRICS_PORT")
+    if port:
+        # Optional scrape endpoint (GET /metrics), separate from the MCP transport
+        metrics.start_http_server(int(port), os.environ.get("SEO_METRICS_ADDR", "127.0.0.1"))
     mcp.run()
 
 if __name__ == "__main__":
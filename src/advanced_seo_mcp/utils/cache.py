@@ -1,14 +1,48 @@
+import asyncio
+import os
 import sqlite3
 import json
+import threading
 import time
-from typing import Optional, Dict, Any, Tuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Dict, Any, Iterator, List, Tuple
 from pathlib import Path
+from . import metrics
 
 DB_PATH = Path.home() / ".advanced_seo_mcp_cache.db"
 
-def init_db():
-    conn = sqlite3.connect(DB_PATH)
+# HTTP response cache settings (override via .env)
+HTTP_CACHE_ENABLED = os.environ.get("SEO_HTTP_CACHE", "1") != "0"
+HTTP_CACHE_MAX_BYTES = int(float(os.environ.get("SEO_HTTP_CACHE_MAX_MB", 256)) * 1024 * 1024)
+HTTP_CACHE_MAX_ENTRY_BYTES = int(float(os.environ.get("SEO_HTTP_CACHE_MAX_ENTRY_MB", 10)) * 1024 * 1024)
+
+# Key/value store settings (override via .env)
+KV_MAX_BYTES = int(float(os.environ.get("SEO_CACHE_KV_MAX_MB", 64)) * 1024 * 1024)
+PURGE_INTERVAL = float(os.environ.get("SEO_CACHE_PURGE_INTERVAL", 300))
+# Stored per-page audits used by incremental sitemap audits
+PAGE_AUDIT_MAX_BYTES = int(float(os.environ.get("SEO_PAGE_AUDIT_MAX_MB", 128)) * 1024 * 1024)
+# Full tool results kept server-side for cursor paging
+RESULT_STORE_MAX_BYTES = int(float(os.environ.get("SEO_RESULT_STORE_MAX_MB", 256)) * 1024 * 1024)
+# Ahrefs signatures are short-lived; rows older than this are dropped by the janitor
+SIGNATURE_MAX_AGE = 7 * 24 * 3600
+# Size caps are checked every this many writes to a table, or sooner once
+# the bytes written since the last check reach a tenth of the cap
+_CAP_CHECK_EVERY = 50
+
+# One long-lived connection per process, serialized by a lock. WAL lets other
+# processes read while one writes; busy_timeout makes writers queue instead of
+# failing with "database is locked".
+_lock = threading.RLock()
+_conn: Optional[sqlite3.Connection] = None
+_conn_pid: Optional[int] = None
+# Per table: (writes, bytes) since its last size-cap check
+_since_cap_check: Dict[str, Tuple[int, int]] = {}
+
+def _init_schema(conn: sqlite3.Connection):
     c = conn.cursor()
+    c.execute('PRAGMA journal_mode=WAL')
+    c.execute('PRAGMA synchronous=NORMAL')
     c.execute('''
         CREATE TABLE IF NOT EXISTS signatures (
             domain TEXT PRIMARY KEY,
@@ -18,28 +52,153 @@ def init_db():
             timestamp REAL
         )
     ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS kv (
+            namespace TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT,
+            size INTEGER,
+            expires_at REAL,
+            last_access REAL,
+            PRIMARY KEY (namespace, key)
+        )
+    ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_kv_expires ON kv (expires_at)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_kv_access ON kv (last_access)')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS http_responses (
+            url TEXT PRIMARY KEY,
+            status_code INTEGER,
+            headers TEXT,
+            body BLOB,
+            etag TEXT,
+            last_modified TEXT,
+            size INTEGER,
+            stored_at REAL,
+            last_access REAL
+        )
+    ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_http_responses_access ON http_responses (last_access)')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS page_audits (
+            url TEXT PRIMARY KEY,
+            lastmod TEXT,
+            etag TEXT,
+            last_modified TEXT,
+            content_hash TEXT,
+            result TEXT,
+            signature BLOB,
+            size INTEGER,
+            audited_at REAL,
+            last_access REAL
+        )
+    ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_page_audits_access ON page_audits (last_access)')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS result_chunks (
+            result_id TEXT NOT NULL,
+            chunk INTEGER NOT NULL,
+            payload BLOB,
+            size INTEGER,
+            expires_at REAL,
+            last_access REAL,
+            PRIMARY KEY (result_id, chunk)
+        )
+    ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_result_chunks_expires ON result_chunks (expires_at)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_result_chunks_access ON result_chunks (last_access)')
     conn.commit()
-    conn.close()
+
+@contextmanager
+def _db() -> Iterator[sqlite3.Connection]:
+    """Yields the process-wide connection inside one committed transaction."""
+    global _conn, _conn_pid
+    with _lock:
+        # A forked child must not reuse its parent's connection
+        if _conn is None or _conn_pid != os.getpid():
+            _conn = sqlite3.connect(DB_PATH, timeout=30, check_same_thread=False)
+            _conn.execute('PRAGMA busy_timeout=30000')
+            _conn_pid = os.getpid()
+            _init_schema(_conn)
+            _start_janitor()
+        try:
+            yield _conn
+            _conn.commit()
+        except Exception:
+            _conn.rollback()
+            raise
+
+def init_db():
+    """Opens the shared connection and creates tables if needed."""
+    with _db():
+        pass
+
+def _start_janitor():
+    def run():
+        while True:
+            time.sleep(PURGE_INTERVAL)
+            try:
+                purge_expired()
+            except sqlite3.Error:
+                pass
+
+    threading.Thread(target=run, name="seo-cache-janitor", daemon=True).start()
+
+def purge_expired() -> int:
+    """Deletes expired kv entries and stored results, and stale signatures. Returns rows removed."""
+    now = time.time()
+    with _db() as conn:
+        removed = conn.execute('DELETE FROM kv WHERE expires_at IS NOT NULL AND expires_at <= ?', (now,)).rowcount
+        removed += conn.execute('DELETE FROM result_chunks WHERE expires_at <= ?', (now,)).rowcount
+        removed += conn.execute('DELETE FROM signatures WHERE timestamp < ?', (now - SIGNATURE_MAX_AGE,)).rowcount
+    return removed
+
+def _evict_lru(conn: sqlite3.Connection, table: str, where: str, params: Tuple, max_bytes: int):
+    """Deletes least-recently-used rows until the table is under 90% of `max_bytes`."""
+    total = conn.execute(f'SELECT COALESCE(SUM(size), 0) FROM {table} WHERE {where}', params).fetchone()[0]
+    if total <= max_bytes:
+        return
+    # Evict down to 90% of the cap so inserts do not evict one row at a time
+    target = int(max_bytes * 0.9)
+    victims = []
+    for rowid, size in conn.execute(f'SELECT rowid, size FROM {table} WHERE {where} ORDER BY last_access ASC', params):
+        if total <= target:
+            break
+        victims.append((rowid,))
+        total -= size
+    conn.executemany(f'DELETE FROM {table} WHERE rowid = ?', victims)
+
+def _check_cap(conn: sqlite3.Connection, table: str, max_bytes: int, written: int):
+    """Counts a write of `written` bytes and runs the (full-table) LRU check only when one is due."""
+    writes, pending = _since_cap_check.get(table, (0, 0))
+    writes, pending = writes + 1, pending + written
+    if writes >= _CAP_CHECK_EVERY or pending >= max_bytes // 10:
+        writes, pending = 0, 0
+        _evict_lru(conn, table, '1', (), max_bytes)
+    _since_cap_check[table] = (writes, pending)
+
+async def safe_call(fn, *args: Any) -> Any:
+    """
+    Runs a blocking cache function in a worker thread, off the event loop.
+    The cache is an optimization: a locked or unwritable database returns
+    None instead of failing the caller.
+    """
+    try:
+        return await asyncio.to_thread(fn, *args)
+    except sqlite3.Error:
+        return None
 
 def save_signature(domain: str, signature: str, valid_until: str, overview_data: Dict[str, Any]):
-    init_db()
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('''
-        INSERT OR REPLACE INTO signatures (domain, signature, valid_until, overview_data, timestamp)
-        VALUES (?, ?, ?, ?, ?)
-    ''', (domain, signature, valid_until, json.dumps(overview_data), time.time()))
-    conn.commit()
-    conn.close()
+    with _db() as conn:
+        conn.execute('''
+            INSERT OR REPLACE INTO signatures (domain, signature, valid_until, overview_data, timestamp)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (domain, signature, valid_until, json.dumps(overview_data), time.time()))
 
 def get_signature(domain: str) -> Tuple[Optional[str], Optional[str], Optional[Dict[str, Any]]]:
-    init_db()
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('SELECT signature, valid_until, overview_data FROM signatures WHERE domain = ?', (domain,))
-    row = c.fetchone()
-    conn.close()
-    
+    with _db() as conn:
+        row = conn.execute('SELECT signature, valid_until, overview_data FROM signatures WHERE domain = ?', (domain,)).fetchone()
+
     if row:
         signature, valid_until, overview_data_json = row
         try:
@@ -48,3 +207,197 @@ def get_signature(domain: str) -> Tuple[Optional[str], Optional[str], Optional[D
             overview_data = {}
         return signature, valid_until, overview_data
     return None, None, None
+
+# --- Namespaced key/value cache ---
+
+def kv_set(namespace: str, key: str, value: Any, ttl: Optional[float] = None):
+    """
+    Stores a JSON-serializable value under (namespace, key).
+    `ttl` is in seconds; None keeps the entry until evicted by the size cap.
+    """
+    payload = json.dumps(value)
+    now = time.time()
+    with _db() as conn:
+        conn.execute('''
+            INSERT OR REPLACE INTO kv (namespace, key, value, size, expires_at, last_access)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (namespace, key, payload, len(payload), now + ttl if ttl is not None else None, now))
+        _check_cap(conn, 'kv', KV_MAX_BYTES, len(payload))
+
+def kv_get(namespace: str, key: str) -> Optional[Any]:
+    """Returns the unexpired value for (namespace, key), or None."""
+    now = time.time()
+    with _db() as conn:
+        row = conn.execute('SELECT value, expires_at, last_access FROM kv WHERE namespace = ? AND key = ?', (namespace, key)).fetchone()
+        if not row:
+            metrics.cache_lookup(namespace, "miss")
+            return None
+        value, expires_at, last_access = row
+        if expires_at is not None and expires_at <= now:
+            conn.execute('DELETE FROM kv WHERE namespace = ? AND key = ?', (namespace, key))
+            metrics.cache_lookup(namespace, "miss")
+            return None
+        metrics.cache_lookup(namespace, "hit")
+        # Refresh the LRU timestamp at most once a minute to keep reads cheap
+        if last_access < now - 60:
+            conn.execute('UPDATE kv SET last_access = ? WHERE namespace = ? AND key = ?', (now, namespace, key))
+
+    try:
+        return json.loads(value)
+    except:
+        return None
+
+def kv_delete(namespace: str, key: Optional[str] = None):
+    """Deletes one key, or the whole namespace when `key` is None."""
+    with _db() as conn:
+        if key is None:
+            conn.execute('DELETE FROM kv WHERE namespace = ?', (namespace,))
+        else:
+            conn.execute('DELETE FROM kv WHERE namespace = ? AND key = ?', (namespace, key))
+
+# --- HTTP response cache ---
+
+_http_stats: ContextVar[Optional[Dict[str, int]]] = ContextVar("http_cache_stats", default=None)
+
+@contextmanager
+def track_http_cache() -> Iterator[Dict[str, int]]:
+    """
+    Collects HTTP cache outcomes for everything fetched inside the block,
+    including tasks and worker threads started from it.
+    """
+    stats = {"hits": 0, "revalidated": 0, "misses": 0, "stored": 0}
+    token = _http_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _http_stats.reset(token)
+
+_HTTP_LOOKUP_RESULTS = {"hits": "hit", "revalidated": "revalidated", "misses": "miss"}
+
+def record_http_cache(event: str) -> None:
+    """Counts one cache outcome ('hits', 'revalidated', 'misses', 'stored')."""
+    if event in _HTTP_LOOKUP_RESULTS:
+        metrics.cache_lookup("http", _HTTP_LOOKUP_RESULTS[event])
+    stats = _http_stats.get()
+    if stats is not None:
+        stats[event] += 1
+
+def get_cached_response(url: str) -> Optional[Dict[str, Any]]:
+    """Returns a stored response for a normalized URL, or None."""
+    with _db() as conn:
+        row = conn.execute('SELECT status_code, headers, body, etag, last_modified, stored_at FROM http_responses WHERE url = ?', (url,)).fetchone()
+
+    if not row:
+        return None
+    status_code, headers_json, body, etag, last_modified, stored_at = row
+    return {
+        "status_code": status_code,
+        "headers": json.loads(headers_json),
+        "body": body,
+        "etag": etag,
+        "last_modified": last_modified,
+        "stored_at": stored_at,
+    }
+
+def touch_cached_response(url: str) -> None:
+    """Marks an entry as recently used (for LRU eviction)."""
+    with _db() as conn:
+        conn.execute('UPDATE http_responses SET last_access = ? WHERE url = ?', (time.time(), url))
+
+def save_cached_response(url: str, status_code: int, headers: List[Tuple[str, str]], body: bytes,
+                         etag: Optional[str], last_modified: Optional[str]) -> bool:
+    """
+    Stores a response and evicts least-recently-used entries past the size cap.
+    Returns False if the body is too large to cache.
+    """
+    size = len(body)
+    if size > HTTP_CACHE_MAX_ENTRY_BYTES:
+        return False
+
+    now = time.time()
+    with _db() as conn:
+        conn.execute('''
+            INSERT OR REPLACE INTO http_responses (url, status_code, headers, body, etag, last_modified, size, stored_at, last_access)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (url, status_code, json.dumps(headers), body, etag, last_modified, size, now, now))
+        _check_cap(conn, 'http_responses', HTTP_CACHE_MAX_BYTES, size)
+    return True
+
+# --- Per-page audit store ---
+
+def get_page_audit(url: str) -> Optional[Dict[str, Any]]:
+    """Returns the stored audit of a canonical URL with its change markers, or None."""
+    now = time.time()
+    with _db() as conn:
+        row = conn.execute('''
+            SELECT lastmod, etag, last_modified, content_hash, result, signature, audited_at, last_access
+            FROM page_audits WHERE url = ?
+        ''', (url,)).fetchone()
+        if not row:
+            return None
+        if row[7] < now - 60:
+            conn.execute('UPDATE page_audits SET last_access = ? WHERE url = ?', (now, url))
+
+    lastmod, etag, last_modified, content_hash, result, signature, audited_at, _ = row
+    try:
+        result = json.loads(result)
+    except:
+        return None
+    return {
+        "lastmod": lastmod,
+        "etag": etag,
+        "last_modified": last_modified,
+        "content_hash": content_hash,
+        "result": result,
+        "signature": signature,
+        "audited_at": audited_at,
+    }
+
+def save_page_audit(url: str, lastmod: Optional[str], etag: Optional[str], last_modified: Optional[str],
+                    content_hash: Optional[str], result: Dict[str, Any], signature: Optional[bytes] = None):
+    """Stores a page's audit and evicts least-recently-used audits past the size cap."""
+    payload = json.dumps(result)
+    size = len(payload) + len(signature or b'')
+    now = time.time()
+    with _db() as conn:
+        conn.execute('''
+            INSERT OR REPLACE INTO page_audits
+                (url, lastmod, etag, last_modified, content_hash, result, signature, size, audited_at, last_access)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (url, lastmod, etag, last_modified, content_hash, payload, signature, size, now, now))
+        _check_cap(conn, 'page_audits', PAGE_AUDIT_MAX_BYTES, size)
+
+def refresh_page_audit(url: str, lastmod: Optional[str], etag: Optional[str], last_modified: Optional[str]):
+    """Marks a stored audit as current (content unchanged) with the page's latest change markers."""
+    now = time.time()
+    with _db() as conn:
+        conn.execute('''
+            UPDATE page_audits SET lastmod = ?, etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified),
+                audited_at = ?, last_access = ?
+            WHERE url = ?
+        ''', (lastmod, etag, last_modified, now, now, url))
+
+# --- Stored result chunks ---
+
+def save_result_chunks(result_id: str, chunks: List[bytes], ttl: float):
+    """Stores one result set as numbered chunks and evicts least-recently-used chunks past the size cap."""
+    now = time.time()
+    with _db() as conn:
+        conn.executemany('''
+            INSERT OR REPLACE INTO result_chunks (result_id, chunk, payload, size, expires_at, last_access)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [(result_id, i, chunk, len(chunk), now + ttl, now) for i, chunk in enumerate(chunks)])
+        _check_cap(conn, 'result_chunks', RESULT_STORE_MAX_BYTES, sum(len(chunk) for chunk in chunks))
+
+def get_result_chunks(result_id: str, first: int, last: int) -> Dict[int, bytes]:
+    """Returns the unexpired chunks `first`..`last` (inclusive) of a result set by number."""
+    now = time.time()
+    with _db() as conn:
+        rows = conn.execute('''
+            SELECT chunk, payload FROM result_chunks
+            WHERE result_id = ? AND chunk BETWEEN ? AND ? AND expires_at > ?
+        ''', (result_id, first, last, now)).fetchall()
+        if rows:
+            conn.execute('UPDATE result_chunks SET last_access = ? WHERE result_id = ? AND chunk BETWEEN ? AND ?',
+                         (now, result_id, first, last))
+    return dict(rows)
@@ -1,47 +1,93 @@
-import requests
-import time
+import asyncio
 import os
-from typing import Optional
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+from . import http, metrics
 
 # Get API Key from environment variable
 api_key = os.environ.get("CAPSOLVER_API_KEY")
 
-def get_capsolver_token(site_url: str) -> Optional[str]:
+CAPSOLVER_API_URL = os.environ.get("CAPSOLVER_API_URL", "https://api.capsolver.com").rstrip('/')
+WEBSITE_KEY = "0x4AAAAAAAAzi9ITzSN9xKMi"  # site key of your target site: ahrefs.com
+
+# Hard deadline for one solve, including polling
+SOLVE_TIMEOUT = float(os.environ.get("CAPSOLVER_SOLVE_TIMEOUT", 120))
+# Pre-solved tokens kept per tool page. Every pooled token is a paid solve
+# that may expire unused, so the default (0) only solves on demand.
+POOL_SIZE = int(os.environ.get("CAPSOLVER_POOL_SIZE", 0))
+# Turnstile tokens live 300s; pooled tokens older than this are discarded
+TOKEN_MAX_AGE = float(os.environ.get("CAPSOLVER_TOKEN_MAX_AGE", 240))
+# Stop refilling a page's pool after this long without demand (solves are paid)
+POOL_IDLE_TIMEOUT = float(os.environ.get("CAPSOLVER_POOL_IDLE_TIMEOUT", 600))
+# Warm every known tool page on first use instead of only the requested one
+PREWARM_ALL = os.environ.get("CAPSOLVER_PREWARM", "0") == "1"
+
+# Ahrefs free-tool pages whose tokens are pooled
+AHREFS_TOOL_PAGES = [
+    "https://ahrefs.com/backlink-checker/",
+    "https://ahrefs.com/keyword-generator/",
+    "https://ahrefs.com/traffic-checker/",
+    "https://ahrefs.com/keyword-difficulty/",
+]
+
+def tool_page(site_url: str) -> str:
+    """Pool key for a site URL: the page without its query string."""
+    parts = urlsplit(site_url)
+    return f"{parts.scheme}://{parts.netloc}{parts.path}"
+
+async def solve_turnstile(site_url: str, timeout: float = SOLVE_TIMEOUT) -> Optional[str]:
     """
-    Use CapSolver to solve the captcha and get a token
-    
+    Use CapSolver to solve the captcha and get a token.
+
+    Polls with exponential backoff (1s growing to 5s) and gives up once
+    `timeout` seconds have passed.
+
     Args:
         site_url: Site URL to query
-        
+        timeout: Overall deadline in seconds
+
     Returns:
-        Verification token or None if failed
+        Verification token or None if failed or timed out
     """
     if not api_key:
         return None
-    
+    with metrics.stage("captcha_solve"):
+        return await _solve(site_url, timeout)
+
+async def _solve(site_url: str, timeout: float) -> Optional[str]:
     payload = {
         "clientKey": api_key,
         "task": {
             "type": 'AntiTurnstileTaskProxyLess',
-            "websiteKey": "0x4AAAAAAAAzi9ITzSN9xKMi",  # site key of your target site: ahrefs.com,
+            "websiteKey": WEBSITE_KEY,
             "websiteURL": site_url,
             "metadata": {
                 "action": ""  # optional
             }
         }
     }
+    deadline = time.monotonic() + timeout
     try:
-        res = requests.post("https://api.capsolver.com/createTask", json=payload, timeout=10)
+        res = await http.post(f"{CAPSOLVER_API_URL}/createTask", json=payload, timeout=10)
         res.raise_for_status()
         resp = res.json()
         task_id = resp.get("taskId")
         if not task_id:
             return None
-    
+
+        delay = 1.0
         while True:
-            time.sleep(1)  # delay
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                print(f"CapSolver Error: no solution within {timeout}s")
+                return None
+            await asyncio.sleep(min(delay, remaining))
+            delay = min(delay * 1.5, 5.0)
+
             payload = {"clientKey": api_key, "taskId": task_id}
-            res = requests.post("https://api.capsolver.com/getTaskResult", json=payload, timeout=10)
+            res = await http.post(f"{CAPSOLVER_API_URL}/getTaskResult", json=payload, timeout=10)
             resp = res.json()
             status = resp.get("status")
             if status == "ready":
@@ -52,3 +98,137 @@ def get_capsolver_token(site_url: str) -> Optional[str]:
     except Exception as e:
         print(f"CapSolver Error: {e}")
         return None
+
+class TokenBroker:
+    """
+    Serves Turnstile tokens, optionally from small per-page pools solved in
+    the background.
+
+    Each caller that finds no pooled token gets exactly one solve; callers
+    wait for in-flight solves instead of starting extra ones. With
+    `pool_size` > 0, a page's pool is also kept topped up to that many
+    unexpired tokens while it has seen demand in the last `idle_timeout`
+    seconds, which takes captcha latency out of the request path at the
+    cost of solves that may go unused.
+    """
+
+    def __init__(self, pool_size: int = POOL_SIZE, max_age: float = TOKEN_MAX_AGE, idle_timeout: float = POOL_IDLE_TIMEOUT):
+        self.pool_size = pool_size
+        self.max_age = max_age
+        self.idle_timeout = idle_timeout
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._reset()
+
+    def _reset(self):
+        self._pools: Dict[str, Deque[Tuple[float, str]]] = {}
+        self._waiters: Dict[str, Deque[asyncio.Future]] = {}
+        self._in_flight: Dict[str, int] = {}
+        self._last_demand: Dict[str, float] = {}
+        self._maintainers: Dict[str, asyncio.Task] = {}
+
+    def _bind_loop(self):
+        # Pools and tasks belong to one event loop (see utils/http.py)
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._reset()
+
+    def _pop_fresh(self, page: str) -> Optional[str]:
+        pool = self._pools.setdefault(page, deque())
+        while pool:
+            solved_at, token = pool.popleft()
+            if time.monotonic() - solved_at < self.max_age:
+                return token
+        return None
+
+    def _is_active(self, page: str) -> bool:
+        return time.monotonic() - self._last_demand.get(page, float('-inf')) < self.idle_timeout
+
+    def _top_up(self, page: str):
+        """Starts enough solves to serve waiters and refill the pool."""
+        pool = self._pools.setdefault(page, deque())
+        waiters = self._waiters.setdefault(page, deque())
+        while waiters and waiters[0].done():
+            waiters.popleft() # timed out
+        wanted = sum(1 for w in waiters if not w.done())
+        if self._is_active(page):
+            wanted += max(self.pool_size - len(pool), 0)
+        while self._in_flight.get(page, 0) < wanted:
+            self._in_flight[page] = self._in_flight.get(page, 0) + 1
+            asyncio.ensure_future(self._solve_into(page))
+
+    async def _solve_into(self, page: str):
+        try:
+            token = await solve_turnstile(page)
+        finally:
+            self._in_flight[page] = max(self._in_flight.get(page, 0) - 1, 0)
+
+        waiters = self._waiters.setdefault(page, deque())
+        while waiters:
+            waiter = waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(token)
+                return
+        pool = self._pools.setdefault(page, deque())
+        if token and len(pool) < self.pool_size:
+            pool.append((time.monotonic(), token))
+
+    async def _maintain(self, page: str):
+        # Replace expiring tokens while the page is in use, then go idle.
+        try:
+            while self._is_active(page):
+                pool = self._pools.setdefault(page, deque())
+                while pool and time.monotonic() - pool[0][0] >= self.max_age:
+                    pool.popleft()
+                self._top_up(page)
+                await asyncio.sleep(10)
+        finally:
+            self._maintainers.pop(page, None)
+
+    def warm(self, pages: List[str]):
+        """Marks pages as in demand and starts filling their pools."""
+        self._bind_loop()
+        for page in pages:
+            page = tool_page(page)
+            self._last_demand[page] = time.monotonic()
+            if self.pool_size > 0 and page not in self._maintainers:
+                self._maintainers[page] = asyncio.ensure_future(self._maintain(page))
+            self._top_up(page)
+
+    async def get_token(self, site_url: str, timeout: float = SOLVE_TIMEOUT) -> Optional[str]:
+        """Returns a pooled token, or waits (up to `timeout`) for the next solve."""
+        if not api_key:
+            return None
+        self._bind_loop()
+        page = tool_page(site_url)
+        if PREWARM_ALL and not self._last_demand:
+            self.warm(AHREFS_TOOL_PAGES)
+        self.warm([page])
+
+        token = self._pop_fresh(page)
+        if token:
+            return token
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(page, deque()).append(waiter)
+        self._top_up(page)
+        try:
+            # Only misses are timed: pooled tokens come back without waiting
+            with metrics.stage("captcha_wait"):
+                return await asyncio.wait_for(waiter, timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+broker = TokenBroker()
+
+async def get_capsolver_token(site_url: str) -> Optional[str]:
+    """
+    Returns a Turnstile token for an Ahrefs tool page via the shared broker.
+
+    Args:
+        site_url: Site URL to query
+
+    Returns:
+        Verification token or None if failed
+    """
+    return await broker.get_token(site_url)
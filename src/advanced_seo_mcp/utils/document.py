@@ -0,0 +1,190 @@
+import asyncio
+import re
+import threading
+import time
+import httpx
+from typing import TYPE_CHECKING, Dict, Any, Optional, Tuple, Union
+from . import cache, http, metrics
+from .extract import PageExtractor, PageFeatures, extract_page
+from .urls import canonicalize
+from .useragent import random_user_agent
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
+class FetchedDocument:
+    """
+    A page that has been fetched once and is parsed at most once.
+
+    Analyzers accept this in place of a URL so a full report can share a
+    single GET and a single parse. They read `features`, built by the
+    one-pass lxml extractor; `soup` remains for ad-hoc queries and is
+    read-only by convention (no `extract()`/`decompose()`).
+
+    Downloaded pages are streamed, so `response` only carries the status
+    and headers (its body was never read into it); the body is `content`.
+    """
+
+    def __init__(self, url: str, response: httpx.Response, load_time_ms: Optional[int] = None, cache_status: str = "miss",
+                 content: Optional[bytes] = None, complete: bool = True, head_only: bool = False):
+        self.url = url
+        self.response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.content = response.content if content is None else content
+        # False if the body was cut short (size cap or head-only fetch)
+        self.complete = complete
+        # True if reading deliberately stopped after </head> (fetch_document(head_only=True)):
+        # head metadata is complete, body-derived features are not
+        self.head_only = head_only
+        if load_time_ms is None:
+            load_time_ms = int(response.elapsed.total_seconds() * 1000)
+        self.load_time_ms = load_time_ms
+        # "miss" (downloaded), "revalidated" (304 from origin) or "hit" (fresh copy, no request)
+        self.cache_status = cache_status
+        self._soup: Optional["BeautifulSoup"] = None
+        self._soup_lock = threading.Lock()
+        self._features: Optional[PageFeatures] = None
+        self._features_lock = threading.Lock()
+
+    @property
+    def features(self) -> PageFeatures:
+        """Title, meta, headings, links, images, JSON-LD and text (extracted once, thread-safe)."""
+        if self._features is None:
+            with self._features_lock:
+                if self._features is None:
+                    with metrics.stage("parse"):
+                        self._features = extract_page(self.content, self.response.charset_encoding)
+        return self._features
+
+    @property
+    def soup(self) -> "BeautifulSoup":
+        """Parsed tree, built lazily on first access (thread-safe)."""
+        if self._soup is None:
+            with self._soup_lock:
+                if self._soup is None:
+                    # bs4 takes ~0.1s to import and no analyzer needs it any more
+                    from bs4 import BeautifulSoup
+                    self._soup = BeautifulSoup(self.content, 'lxml')
+        return self._soup
+
+def normalize_url(url: str) -> str:
+    """Adds an https:// scheme to bare domains."""
+    if not url.startswith('http'):
+        url = 'https://' + url
+    return url
+
+# Headers that describe the wire encoding rather than the stored (decoded) body
+_UNCACHED_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection', 'keep-alive', 'set-cookie'}
+
+def _max_age(cache_control: str) -> Optional[int]:
+    if 'no-cache' in cache_control:
+        return 0
+    match = re.search(r'max-age=(\d+)', cache_control)
+    return int(match.group(1)) if match else None
+
+def _is_storable(response: httpx.Response) -> bool:
+    cache_control = response.headers.get('Cache-Control', '').lower()
+    if 'no-store' in cache_control or 'private' in cache_control:
+        return False
+    # Without a validator or a lifetime the copy could never be reused
+    return bool(response.headers.get('ETag') or response.headers.get('Last-Modified') or _max_age(cache_control))
+
+def _cached_response(url: str, cached: Dict[str, Any]) -> httpx.Response:
+    return httpx.Response(
+        cached["status_code"],
+        headers=cached["headers"],
+        content=cached["body"],
+        request=httpx.Request("GET", url),
+    )
+
+async def fetch_document(
+    url: str,
+    timeout: int = 10,
+    headers: Optional[Dict[str, str]] = None,
+    use_cache: bool = True,
+    max_bytes: Optional[int] = None,
+    content_types: Optional[Tuple[str, ...]] = http.HTML_CONTENT_TYPES,
+    head_only: bool = False,
+) -> FetchedDocument:
+    """
+    Fetches a URL once and wraps it for sharing between analyzers.
+    Raises on network errors; HTTP error statuses are kept on the document.
+
+    The body is streamed and never buffered past `max_bytes`
+    (SEO_HTTP_MAX_BODY_MB by default); longer pages are analyzed from the
+    part that was read and come back with `complete=False`. Responses whose
+    Content-Type is not in `content_types` raise http.ContentTypeRejected
+    without downloading the body (pass None to accept anything). With
+    `head_only`, reading stops once </head> has been parsed, which is enough
+    for title/meta/canonical/robots checks; such documents have
+    `head_only=True` (and `complete=False`) and are not cached
+    (onpage_audit and batch_onpage_audit use this for meta-only checks).
+
+    With the on-disk response cache enabled (SEO_HTTP_CACHE), stored pages are
+    served directly while fresh per Cache-Control max-age, and otherwise
+    revalidated with If-None-Match/If-Modified-Since so unchanged pages come
+    back as 304s. Outcomes are counted by `cache.track_http_cache()`.
+    """
+    url = normalize_url(url)
+    headers = dict(headers) if headers else {'User-Agent': random_user_agent()}
+    use_cache = use_cache and cache.HTTP_CACHE_ENABLED
+    key = canonicalize(url)
+
+    cached = await cache.safe_call(cache.get_cached_response, key) if use_cache else None
+    if cached:
+        max_age = _max_age(dict((k.lower(), v) for k, v in cached["headers"]).get('cache-control', '').lower())
+        if max_age and time.time() - cached["stored_at"] < max_age:
+            cache.record_http_cache("hits")
+            await cache.safe_call(cache.touch_cached_response, key)
+            return FetchedDocument(url, _cached_response(url, cached), load_time_ms=0, cache_status="hit")
+        if cached["etag"]:
+            headers['If-None-Match'] = cached["etag"]
+        if cached["last_modified"]:
+            headers['If-Modified-Since'] = cached["last_modified"]
+
+    extractor = None
+    stop = None
+    if head_only:
+        extractor = PageExtractor()
+
+        def stop(chunk: bytes) -> bool:
+            extractor.feed(chunk)
+            return extractor.head_done
+
+    started = time.monotonic()
+    with metrics.stage("fetch"):
+        response, body, complete = await http.fetch_limited("GET", url, max_bytes=max_bytes, content_types=content_types,
+                                                            stop=stop, headers=headers, timeout=timeout)
+    load_time_ms = int((time.monotonic() - started) * 1000)
+
+    if cached and response.status_code == 304:
+        cache.record_http_cache("revalidated")
+        await cache.safe_call(cache.touch_cached_response, key)
+        return FetchedDocument(url, _cached_response(url, cached), load_time_ms=load_time_ms, cache_status="revalidated")
+
+    if use_cache:
+        cache.record_http_cache("misses")
+        if complete and response.status_code == 200 and _is_storable(response):
+            stored_headers = [(k, v) for k, v in response.headers.multi_items() if k.lower() not in _UNCACHED_HEADERS]
+            if await cache.safe_call(cache.save_cached_response, key, 200, stored_headers, body,
+                                  response.headers.get('ETag'), response.headers.get('Last-Modified')):
+                cache.record_http_cache("stored")
+
+    # A head-only read that stopped at </head> (not at the size cap)
+    stopped_at_head = extractor is not None and not complete and extractor.head_done
+    doc = FetchedDocument(url, response, load_time_ms=load_time_ms, content=body, complete=complete,
+                          head_only=stopped_at_head)
+    if extractor is not None and not complete:
+        # The extractor has already seen the head; no need to parse it again
+        doc._features = extractor.finish_partial()
+    return doc
+
+async def run_on_document(fn, doc: FetchedDocument, *args: Any) -> Any:
+    """
+    Runs a synchronous, CPU-bound analysis of `doc` in a worker thread so
+    parsing and tree walks do not block the event loop.
+    """
+    return await asyncio.to_thread(fn, doc, *args)
+
+DocumentOrUrl = Union[str, FetchedDocument]
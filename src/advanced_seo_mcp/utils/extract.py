@@ -0,0 +1,192 @@
+import codecs
+import re
+from lxml import etree
+from typing import Dict, List, Optional, Tuple
+
+# Elements whose text is not visible page content
+_SKIP_TEXT = {'script', 'style', 'template'}
+# Page chrome left out of the main text
+_BOILERPLATE = {'nav', 'header', 'footer', 'aside'}
+_HEADINGS = ('h1', 'h2', 'h3', 'h4', 'h5', 'h6')
+_META_CHARSET = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.I)
+
+class PageFeatures:
+    """Everything the analyzers read from a page, collected in one pass."""
+
+    def __init__(self):
+        self.title: Optional[str] = None
+        # Lowercased meta name/property -> content (first occurrence wins)
+        self.meta: Dict[str, Optional[str]] = {}
+        self.canonical: Optional[str] = None
+        self.headings: Dict[str, List[str]] = {h: [] for h in _HEADINGS}
+        # (href, lowercased rel tokens) for every <a href>
+        self.links: List[Tuple[str, List[str]]] = []
+        # (src, alt) for every <img>
+        self.images: List[Tuple[Optional[str], Optional[str]]] = []
+        self.json_ld: List[str] = []
+        # Visible text, whitespace-separated (script/style/template excluded)
+        self.text: str = ""
+        # Text of <main> (or of the <article>s), else the visible text
+        # without nav/header/footer/aside
+        self.main_text: str = ""
+        # False if extraction stopped early (e.g. after </head>)
+        self.complete: bool = False
+
+def sniff_encoding(head: bytes, declared: Optional[str] = None) -> str:
+    """Picks a decoder: the HTTP charset, then a <meta charset>, then UTF-8."""
+    for candidate in (declared, _match_charset(head)):
+        if candidate:
+            try:
+                return codecs.lookup(candidate).name
+            except LookupError:
+                continue
+    return 'utf-8'
+
+def _match_charset(head: bytes) -> Optional[str]:
+    match = _META_CHARSET.search(head[:4096])
+    return match.group(1).decode('ascii') if match else None
+
+class PageExtractor:
+    """
+    Incremental single-pass HTML extractor built on lxml's pull parser.
+
+    Feed it bytes as they arrive; each element is inspected once on its
+    start/end events and then cleared, so the tree never outlives the parse.
+    `head_done` turns True once </head> has been parsed, letting callers that
+    only need head fields stop reading.
+    """
+
+    def __init__(self, encoding: Optional[str] = None):
+        self.features = PageFeatures()
+        self.head_done = False
+        self._declared = encoding
+        self._decoder = None
+        self._pending = b""
+        self._parser = etree.HTMLPullParser(events=('start', 'end'), remove_comments=True,
+                                            remove_pis=True, no_network=True)
+        # Visible text fragments in document order, and the subset outside boilerplate
+        self._texts: List[str] = []
+        self._content: List[str] = []
+        # [element, last child started, index into _texts, index into _content] per open element
+        self._stack: List[list] = [[None, None, 0, 0]]
+        # Depth inside script/style/template, and inside boilerplate elements
+        self._skip = 0
+        self._boilerplate = 0
+        # (start, end) ranges of _content covered by <main> / <article> elements
+        self._main: Optional[Tuple[int, int]] = None
+        self._articles: List[Tuple[int, int]] = []
+
+    def feed(self, data: bytes):
+        if self._decoder is None:
+            # Wait for enough bytes to find a <meta charset> before decoding
+            self._pending += data
+            if len(self._pending) < 1024:
+                return
+            data, self._pending = self._pending, b""
+            self._decoder = codecs.getincrementaldecoder(sniff_encoding(data, self._declared))(errors='replace')
+        text = self._decoder.decode(data)
+        if text:
+            self._parser.feed(text)
+            self._handle_events()
+
+    def close(self) -> PageFeatures:
+        """Finishes parsing whatever was fed and returns the features."""
+        if self._decoder is None:
+            self._decoder = codecs.getincrementaldecoder(sniff_encoding(self._pending, self._declared))(errors='replace')
+            self._parser.feed(self._decoder.decode(self._pending))
+            self._pending = b""
+        self._parser.feed(self._decoder.decode(b"", final=True))
+        try:
+            self._parser.close()
+        except etree.XMLSyntaxError:
+            pass # empty document
+        self._handle_events()
+
+        features = self.features
+        features.text = _join(self._texts)
+        if self._main is not None:
+            features.main_text = _join(self._content[self._main[0]:self._main[1]])
+        elif self._articles:
+            features.main_text = _join([t for start, end in self._articles for t in self._content[start:end]])
+        else:
+            features.main_text = _join(self._content)
+        features.complete = True
+        return features
+
+    def finish_partial(self) -> PageFeatures:
+        """Returns what has been collected so far without parsing further."""
+        self.features.complete = False
+        return self.features
+
+    def _emit_gap(self, frame: list):
+        # Text between events: the element's own text before its first child,
+        # otherwise the tail of the last child seen.
+        elem, last = frame[0], frame[1]
+        text = elem.text if last is None else last.tail
+        if text and not self._skip:
+            self._texts.append(text)
+            if not self._boilerplate:
+                self._content.append(text)
+
+    def _handle_events(self):
+        features = self.features
+        stack = self._stack
+        texts = self._texts
+        for event, elem in self._parser.read_events():
+            tag = elem.tag
+            if event == 'start':
+                parent = stack[-1]
+                if parent[0] is not None:
+                    self._emit_gap(parent)
+                parent[1] = elem
+                stack.append([elem, None, len(texts), len(self._content)])
+                if tag in _SKIP_TEXT:
+                    self._skip += 1
+                elif tag in _BOILERPLATE:
+                    self._boilerplate += 1
+                elif tag == 'meta':
+                    key = elem.get('name') or elem.get('property')
+                    if key and key.lower() not in features.meta:
+                        features.meta[key.lower()] = elem.get('content')
+                elif tag == 'a':
+                    href = elem.get('href')
+                    if href is not None:
+                        features.links.append((href, (elem.get('rel') or '').lower().split()))
+                elif tag == 'img':
+                    features.images.append((elem.get('src'), elem.get('alt')))
+                elif tag == 'link' and features.canonical is None:
+                    if 'canonical' in (elem.get('rel') or '').lower().split():
+                        features.canonical = elem.get('href')
+                continue
+
+            frame = stack.pop()
+            self._emit_gap(frame)
+            if tag in _SKIP_TEXT:
+                self._skip -= 1
+                if tag == 'script' and (elem.get('type') or '').strip().lower() == 'application/ld+json':
+                    features.json_ld.append(elem.text or '')
+            elif tag in features.headings:
+                features.headings[tag].append(''.join(t.strip() for t in texts[frame[2]:]))
+            elif tag == 'title' and features.title is None:
+                features.title = ''.join(texts[frame[2]:]) or None
+            elif tag == 'head':
+                self.head_done = True
+            elif tag in _BOILERPLATE:
+                self._boilerplate -= 1
+            elif tag == 'main' and self._main is None:
+                self._main = (frame[3], len(self._content))
+            elif tag == 'article':
+                # Nested articles are covered by the outermost one
+                if not self._articles or self._articles[-1][1] <= frame[3]:
+                    self._articles.append((frame[3], len(self._content)))
+            # Children are already cleared; the tail is read by the parent later
+            elem.clear(keep_tail=True)
+
+def _join(texts: List[str]) -> str:
+    return ' '.join(s for s in (t.strip() for t in texts) if s)
+
+def extract_page(content: bytes, encoding: Optional[str] = None) -> PageFeatures:
+    """Extracts title, meta, canonical, headings, links, images, JSON-LD and text in one pass."""
+    extractor = PageExtractor(encoding)
+    extractor.feed(content)
+    return extractor.close()
@@ -0,0 +1,280 @@
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+# Audit history lives apart from the cache so clearing the cache keeps it
+HISTORY_DB_PATH = Path(os.environ.get("SEO_HISTORY_DB", Path.home() / ".advanced_seo_mcp_history.db"))
+HISTORY_ENABLED = os.environ.get("SEO_HISTORY", "1") != "0"
+
+Value = Union[int, float, str, bool, None]
+
+# Each (url, metric) is a run of rows, one per distinct value. A row's
+# recorded_at is when the value was first observed and seen_at when it was
+# last confirmed, so repeated audits of an unchanged page only move seen_at.
+_lock = threading.RLock()
+_conn: Optional[sqlite3.Connection] = None
+_conn_pid: Optional[int] = None
+
+def _init_schema(conn: sqlite3.Connection):
+    c = conn.cursor()
+    c.execute('PRAGMA journal_mode=WAL')
+    c.execute('PRAGMA synchronous=NORMAL')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS history (
+            domain TEXT NOT NULL,
+            url TEXT NOT NULL,
+            metric TEXT NOT NULL,
+            value REAL,
+            text TEXT,
+            recorded_at REAL NOT NULL,
+            seen_at REAL NOT NULL
+        )
+    ''')
+    # Latest value per page (recording, change queries) and time ranges (trends)
+    c.execute('CREATE INDEX IF NOT EXISTS idx_history_series ON history (domain, metric, url, recorded_at)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_history_time ON history (domain, metric, recorded_at)')
+    conn.commit()
+
+@contextmanager
+def _db() -> Iterator[sqlite3.Connection]:
+    """Yields the process-wide connection inside one committed transaction."""
+    global _conn, _conn_pid
+    with _lock:
+        if _conn is None or _conn_pid != os.getpid():
+            _conn = sqlite3.connect(HISTORY_DB_PATH, timeout=30, check_same_thread=False)
+            _conn.execute('PRAGMA busy_timeout=30000')
+            _conn_pid = os.getpid()
+            _init_schema(_conn)
+        try:
+            yield _conn
+            _conn.commit()
+        except Exception:
+            _conn.rollback()
+            raise
+
+def domain_of(url: str) -> str:
+    """The history key for a URL or bare domain: lowercase host without "www."."""
+    host = urlparse(url if '://' in url else 'https://' + url).hostname or url
+    host = host.lower()
+    return host[4:] if host.startswith('www.') else host
+
+def _split(value: Value) -> Tuple[Optional[float], Optional[str]]:
+    if isinstance(value, bool):
+        return float(value), None
+    if isinstance(value, (int, float)):
+        return round(float(value), 6), None
+    return None, value
+
+def _record(url: str, values: Dict[str, Value], observed_at: float):
+    domain = domain_of(url)
+    with _db() as conn:
+        for metric, value in values.items():
+            number, text = _split(value)
+            row = conn.execute('''
+                SELECT rowid, value, text FROM history WHERE domain = ? AND metric = ? AND url = ?
+                ORDER BY recorded_at DESC LIMIT 1
+            ''', (domain, metric, url)).fetchone()
+            if row and row[1] == number and row[2] == text:
+                conn.execute('UPDATE history SET seen_at = ? WHERE rowid = ?', (observed_at, row[0]))
+            else:
+                conn.execute('''
+                    INSERT INTO history (domain, url, metric, value, text, recorded_at, seen_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (domain, url, metric, number, text, observed_at, observed_at))
+
+async def record(url: str, values: Dict[str, Value]):
+    """
+    Stores one observation of a page's (or domain's) metrics.
+    Never raises: a locked or unwritable history database only loses the sample.
+    """
+    if not HISTORY_ENABLED or not values:
+        return
+    try:
+        await asyncio.to_thread(_record, url, values, time.time())
+    except sqlite3.Error:
+        pass
+
+# --- Metrics extracted from analyzer results ---
+
+def _display_ms(display: Any) -> Optional[float]:
+    """Parses PSI display values such as "2.1 s" or "180 ms" into milliseconds."""
+    match = re.match(r'\s*([\d.,]+)\s*(ms|s)\b', str(display or ''))
+    if not match:
+        return None
+    number = float(match.group(1).replace(',', ''))
+    return number * 1000 if match.group(2) == 's' else number
+
+def onpage_metrics(data: Dict[str, Any]) -> Dict[str, Value]:
+    if "error" in data:
+        return {}
+    meta = data["meta"]
+    return {
+        # No load time: it differs on every run (and is 0 on cache hits), so
+        # each audit would store a new point and show up as a change
+        "onpage.status_code": data["status_code"],
+        "onpage.title": meta["title"]["content"],
+        "onpage.title_length": meta["title"]["length"],
+        "onpage.description_length": meta["description"]["length"],
+        "onpage.canonical": meta["canonical"],
+        "onpage.robots": meta["robots"],
+        "onpage.h1_count": data["headings"]["counts"]["h1"],
+        "onpage.word_count": data["content"]["word_count"],
+        "onpage.internal_links": data["links"]["internal"],
+        "onpage.external_links": data["links"]["external"],
+        "onpage.images_missing_alt": data["images"]["missing_alt_count"],
+    }
+
+def technical_metrics(data: Dict[str, Any]) -> Dict[str, Value]:
+    values: Dict[str, Value] = {"technical.sitemap": data["sitemap"].get("found")}
+    if "error" not in data["robots_txt"]:
+        # A failed request says nothing about whether robots.txt exists
+        values["technical.robots_txt"] = data["robots_txt"].get("exists")
+    security = data["security"]
+    if "error" not in security:
+        values.update({
+            "technical.https": security["https"],
+            "technical.hsts": security["hsts"],
+            "technical.x_frame_options": security["x_frame_options"],
+            "technical.x_content_type_options": security["x_content_type_options"],
+        })
+    return values
+
+def speed_metrics(data: Dict[str, Any]) -> Dict[str, Value]:
+    if "error" in data:
+        return {}
+    prefix = f"psi.{data['strategy']}"
+    vitals = data["core_web_vitals"]
+    try:
+        cls = float(vitals["cls"])
+    except ValueError:
+        cls = None
+    return {
+        f"{prefix}.performance_score": data["performance_score"],
+        f"{prefix}.seo_score": data["seo_score"],
+        f"{prefix}.lcp_ms": _display_ms(vitals["lcp"]),
+        f"{prefix}.fcp_ms": _display_ms(vitals["fcp"]),
+        f"{prefix}.inp_ms": _display_ms(vitals["inp"]),
+        f"{prefix}.cls": cls,
+    }
+
+def backlink_metrics(data: Dict[str, Any]) -> Dict[str, Value]:
+    overview = data.get("overview") or {}
+    return {
+        "ahrefs.domain_rating": overview.get("domainRating"),
+        "ahrefs.backlinks": overview.get("backlinks"),
+        "ahrefs.refdomains": overview.get("refdomains"),
+    }
+
+def traffic_metrics(data: Dict[str, Any], country: str = "None") -> Dict[str, Value]:
+    suffix = "" if country in (None, "None") else f".{country.lower()}"
+    return {
+        f"ahrefs.traffic_monthly{suffix}": data["traffic"]["monthly"],
+        f"ahrefs.traffic_value{suffix}": data["traffic"]["value"],
+    }
+
+# --- Queries ---
+
+def _value(number: Optional[float], text: Optional[str]) -> Value:
+    if number is None:
+        return text
+    return int(number) if number.is_integer() else number
+
+def _iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat(timespec='seconds')
+
+def list_metrics(domain: str) -> List[Dict[str, Any]]:
+    """Metrics recorded for a domain, with how many pages and stored points (distinct values) each has."""
+    with _db() as conn:
+        rows = conn.execute('''
+            SELECT metric, COUNT(DISTINCT url), COUNT(*), MIN(recorded_at), MAX(seen_at)
+            FROM history WHERE domain = ? GROUP BY metric ORDER BY metric
+        ''', (domain_of(domain),)).fetchall()
+    return [{"metric": m, "urls": urls, "points": n, "first_seen": _iso(first), "last_seen": _iso(last)}
+            for m, urls, n, first, last in rows]
+
+def trend(domain: str, metric: str, days: float = 90, url: Optional[str] = None, limit: int = 500) -> List[Dict[str, Any]]:
+    """
+    Value changes of one metric within the last `days`, oldest first, plus
+    the value each series had when the window started. Each point holds
+    from `recorded_at` until the next point of the same URL; `seen_at` is
+    when it was last confirmed.
+    """
+    since = time.time() - days * 86400
+    domain = domain_of(domain)
+    url_filter, params = ('AND url = ?', (url,)) if url else ('', ())
+    with _db() as conn:
+        # The value in force at the start of the window (still seen after it)
+        carried = conn.execute(f'''
+            SELECT url, value, text, recorded_at, seen_at FROM history
+            WHERE domain = ? AND metric = ? AND recorded_at < ? AND seen_at >= ? {url_filter}
+            ORDER BY recorded_at LIMIT ?
+        ''', (domain, metric, since, since, *params, limit)).fetchall()
+        rows = conn.execute(f'''
+            SELECT url, value, text, recorded_at, seen_at FROM history
+            WHERE domain = ? AND metric = ? AND recorded_at >= ? {url_filter}
+            ORDER BY recorded_at LIMIT ?
+        ''', (domain, metric, since, *params, max(0, limit - len(carried)))).fetchall()
+    return [{"url": u, "value": _value(v, t), "recorded_at": _iso(r), "seen_at": _iso(s)} for u, v, t, r, s in carried + rows]
+
+def _truthy(value: Value) -> bool:
+    return bool(value) and value != "Missing"
+
+_CHANGE_FILTERS = {
+    "any": lambda old, new: True,
+    "lost": lambda old, new: _truthy(old) and not _truthy(new),
+    "gained": lambda old, new: not _truthy(old) and _truthy(new),
+    "up": lambda old, new: isinstance(old, (int, float)) and isinstance(new, (int, float)) and new > old,
+    "down": lambda old, new: isinstance(old, (int, float)) and isinstance(new, (int, float)) and new < old,
+}
+CHANGE_KINDS = tuple(_CHANGE_FILTERS)
+
+def changes(domain: str, metric: str, change: str = "any", since_last_audit: bool = True,
+            days: Optional[float] = None, limit: int = 500) -> List[Dict[str, Any]]:
+    """
+    Pages whose latest value of `metric` differs from the one before it.
+
+    Args:
+        change: "any", "lost" (was set/non-zero, now empty/zero), "gained",
+            "up" or "down".
+        since_last_audit: Only pages where the change showed up in their most
+            recent audit (the latest value has not been confirmed since).
+        days: Only changes first seen within the last `days`.
+    """
+    keep = _CHANGE_FILTERS[change]
+    conditions = ['cur.rn = 1']
+    params: List[Any] = [domain_of(domain), metric]
+    if since_last_audit:
+        conditions.append('cur.recorded_at = cur.seen_at')
+    if days is not None:
+        conditions.append('cur.recorded_at >= ?')
+        params.append(time.time() - days * 86400)
+    with _db() as conn:
+        rows = conn.execute(f'''
+            WITH ranked AS (
+                SELECT url, value, text, recorded_at, seen_at,
+                       ROW_NUMBER() OVER (PARTITION BY url ORDER BY recorded_at DESC) AS rn
+                FROM history WHERE domain = ? AND metric = ?
+            )
+            SELECT cur.url, prev.value, prev.text, cur.value, cur.text, prev.seen_at, cur.recorded_at
+            FROM ranked cur JOIN ranked prev ON prev.url = cur.url AND prev.rn = 2
+            WHERE {' AND '.join(conditions)}
+            ORDER BY cur.recorded_at DESC
+        ''', params).fetchall()
+
+    result = []
+    for url, old_number, old_text, new_number, new_text, before, changed_at in rows:
+        old, new = _value(old_number, old_text), _value(new_number, new_text)
+        if keep(old, new):
+            result.append({"url": url, "before": old, "after": new,
+                           "last_seen_before": _iso(before), "changed_at": _iso(changed_at)})
+            if len(result) >= limit:
+                break
+    return result
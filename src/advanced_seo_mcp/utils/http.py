@@ -0,0 +1,179 @@
+import asyncio
+import os
+import time
+import httpx
+from contextlib import asynccontextmanager, nullcontext
+from urllib.parse import urlparse
+from typing import Dict, Any, AsyncIterator, Callable, Optional, Tuple
+from . import metrics
+
+# Pool sizing (override via .env)
+MAX_CONNECTIONS = int(os.environ.get("SEO_HTTP_MAX_CONNECTIONS", 100))
+MAX_KEEPALIVE = int(os.environ.get("SEO_HTTP_MAX_KEEPALIVE", 20))
+MAX_PER_HOST = int(os.environ.get("SEO_HTTP_MAX_PER_HOST", 8))
+DEFAULT_TIMEOUT = float(os.environ.get("SEO_HTTP_TIMEOUT", 30))
+# Bodies are never buffered past this size (override via .env)
+MAX_BODY_BYTES = int(float(os.environ.get("SEO_HTTP_MAX_BODY_MB", 10)) * 1024 * 1024)
+
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+
+class ContentTypeRejected(Exception):
+    """Raised by `fetch_limited` when a response's Content-Type is not accepted."""
+
+class _LoopState:
+    """Client and per-host semaphores bound to one event loop."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE,
+                keepalive_expiry=30,
+            ),
+            timeout=DEFAULT_TIMEOUT,
+            follow_redirects=True,
+        )
+        self.host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    def host_limit(self, host: str) -> asyncio.Semaphore:
+        sem = self.host_limits.get(host)
+        if sem is None:
+            sem = self.host_limits[host] = asyncio.Semaphore(MAX_PER_HOST)
+        return sem
+
+_state: Optional[_LoopState] = None
+
+def _current_state() -> _LoopState:
+    # httpx clients cannot be shared across event loops. The server runs one
+    # loop for its lifetime; scripts calling asyncio.run() repeatedly get a
+    # fresh client per loop.
+    global _state
+    loop = asyncio.get_running_loop()
+    if _state is None or _state.loop is not loop:
+        _state = _LoopState(loop)
+    return _state
+
+def _record_response(method: str, host: str, response: httpx.Response, started: float):
+    metrics.observe("seo_http_request_duration_seconds", time.perf_counter() - started, method=method)
+    metrics.inc("seo_http_requests_total", host=metrics.host_label(host), method=method,
+                status=f"{response.status_code // 100}xx")
+
+def _record_error(host: str, error: httpx.HTTPError):
+    if isinstance(error, httpx.TimeoutException):
+        kind = "timeout"
+    elif isinstance(error, httpx.NetworkError):
+        kind = "connect"
+    else:
+        kind = "other"
+    metrics.inc("seo_http_errors_total", host=metrics.host_label(host), kind=kind)
+
+def get_client() -> httpx.AsyncClient:
+    """Returns the shared keep-alive client for the running event loop."""
+    return _current_state().client
+
+async def request(method: str, url: str, **kwargs: Any) -> httpx.Response:
+    """
+    Sends a request through the shared client, holding a per-host slot.
+
+    Accepts the same keyword arguments as `httpx.AsyncClient.request`
+    (headers, params, json, timeout, follow_redirects, ...).
+    """
+    state = _current_state()
+    host = urlparse(url).netloc
+    async with state.host_limit(host):
+        started = time.perf_counter()
+        try:
+            response = await state.client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            _record_error(host, e)
+            raise
+    _record_response(method, host, response, started)
+    metrics.inc("seo_http_response_bytes_total", response.num_bytes_downloaded, host=metrics.host_label(host))
+    return response
+
+async def get(url: str, **kwargs: Any) -> httpx.Response:
+    return await request("GET", url, **kwargs)
+
+async def head(url: str, **kwargs: Any) -> httpx.Response:
+    # Match requests.head(): do not follow redirects unless asked to.
+    kwargs.setdefault("follow_redirects", False)
+    return await request("HEAD", url, **kwargs)
+
+async def post(url: str, **kwargs: Any) -> httpx.Response:
+    return await request("POST", url, **kwargs)
+
+@asynccontextmanager
+async def stream(method: str, url: str, host_limit: bool = True, **kwargs: Any) -> AsyncIterator[httpx.Response]:
+    """
+    Streams a response body through the shared client, holding a per-host
+    slot until the body has been consumed or the context exits.
+
+    Pass host_limit=False for long-lived streams whose consumer may apply
+    backpressure (they would otherwise starve other requests to that host);
+    the caller is then responsible for bounding its own concurrency.
+    """
+    state = _current_state()
+    host = urlparse(url).netloc
+    async with state.host_limit(host) if host_limit else nullcontext():
+        started = time.perf_counter()
+        try:
+            async with state.client.stream(method, url, **kwargs) as response:
+                _record_response(method, host, response, started)
+                try:
+                    yield response
+                finally:
+                    metrics.inc("seo_http_response_bytes_total", response.num_bytes_downloaded, host=metrics.host_label(host))
+        except httpx.HTTPError as e:
+            _record_error(host, e)
+            raise
+
+async def fetch_limited(
+    method: str,
+    url: str,
+    max_bytes: Optional[int] = None,
+    content_types: Optional[Tuple[str, ...]] = None,
+    stop: Optional[Callable[[bytes], bool]] = None,
+    **kwargs: Any,
+) -> Tuple[httpx.Response, bytes, bool]:
+    """
+    Streams a response and reads at most `max_bytes` of its body.
+
+    Args:
+        max_bytes: Body size cap (MAX_BODY_BYTES by default).
+        content_types: If given, the body is only read when the Content-Type
+            contains one of these (a missing header is accepted); otherwise
+            ContentTypeRejected is raised before any body bytes are read.
+        stop: Called with each chunk; returning True ends the read early.
+
+    Returns:
+        (response, body, complete). `complete` is False if the body was cut
+        short by the size cap or by `stop`. The response is closed.
+    """
+    max_bytes = MAX_BODY_BYTES if max_bytes is None else max_bytes
+    async with stream(method, url, **kwargs) as response:
+        content_type = response.headers.get('Content-Type', '').lower()
+        if content_types and content_type and not any(t in content_type for t in content_types):
+            raise ContentTypeRejected(f"Skipped {content_type.split(';')[0]} response from {url}")
+
+        chunks = []
+        size = 0
+        complete = True
+        async for chunk in response.aiter_bytes():
+            if size + len(chunk) > max_bytes:
+                chunks.append(chunk[:max_bytes - size])
+                complete = False
+                break
+            chunks.append(chunk)
+            size += len(chunk)
+            if stop is not None and stop(chunk):
+                complete = False
+                break
+    return response, b"".join(chunks), complete
+
+async def aclose() -> None:
+    """Closes the shared client (e.g. on server shutdown)."""
+    global _state
+    if _state is not None:
+        await _state.client.aclose()
+        _state = None
@@ -0,0 +1,218 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+# Distinct hosts tracked before the rest are counted under "other" (bounds label cardinality)
+MAX_HOSTS = int(os.environ.get("SEO_METRICS_MAX_HOSTS", 500))
+
+HELP = {
+    "seo_tool_duration_seconds": "MCP tool call latency.",
+    "seo_tool_calls_total": "MCP tool calls by outcome.",
+    "seo_stage_duration_seconds": "Latency of internal stages (fetch, parse, link checks, PSI, captcha, report stages).",
+    "seo_http_request_duration_seconds": "Outbound HTTP request latency (until headers for streamed bodies).",
+    "seo_http_requests_total": "Outbound HTTP requests by host, method and status class.",
+    "seo_http_response_bytes_total": "Response body bytes downloaded per host.",
+    "seo_http_errors_total": "Outbound HTTP failures by host and kind (timeout, connect, other).",
+    "seo_cache_lookups_total": "Cache lookups by cache and result (hit, miss, revalidated).",
+    "seo_psi_retries_total": "PageSpeed Insights retries by reason (HTTP status, timeout, network).",
+    "seo_startup_seconds": "Time from server module import to ready to serve.",
+    "seo_first_tool_response_seconds": "Time from server module import to the first completed tool call.",
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+class Histogram:
+    """Cumulative-bucket latency histogram (Prometheus layout)."""
+
+    __slots__ = ("counts", "sum", "count", "min", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.min = float('inf')
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimates a quantile by linear interpolation inside its bucket."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        estimate = self.max
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                lower = LATENCY_BUCKETS[i - 1] if i else 0.0
+                upper = LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else self.max
+                estimate = lower + (upper - lower) * (rank - seen) / n
+                break
+            seen += n
+        # Bucket interpolation can overshoot what was actually observed
+        return min(max(estimate, self.min), self.max)
+
+_lock = threading.Lock()
+_counters: Dict[Tuple[str, Labels], float] = {}
+_histograms: Dict[Tuple[str, Labels], Histogram] = {}
+_gauges: Dict[Tuple[str, Labels], float] = {}
+_hosts: set = set()
+_started = time.time()
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def host_label(host: str) -> str:
+    """The host as a label value, or "other" once MAX_HOSTS distinct hosts were seen."""
+    with _lock:
+        if host in _hosts:
+            return host
+        if len(_hosts) < MAX_HOSTS:
+            _hosts.add(host)
+            return host
+    return "other"
+
+def inc(name: str, amount: float = 1, **labels: Any):
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+def observe(name: str, seconds: float, **labels: Any):
+    key = (name, _labels(labels))
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = Histogram()
+        hist.observe(seconds)
+
+def set_gauge(name: str, value: float, **labels: Any):
+    with _lock:
+        _gauges[(name, _labels(labels))] = value
+
+@contextmanager
+def timer(name: str, **labels: Any) -> Iterator[None]:
+    """Observes the duration of the block (including failed runs) into a histogram."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started, **labels)
+
+def stage(name: str):
+    """Shorthand for timing an internal stage into seo_stage_duration_seconds."""
+    return timer("seo_stage_duration_seconds", stage=name)
+
+def cache_lookup(cache: str, result: str):
+    inc("seo_cache_lookups_total", cache=cache, result=result)
+
+def reset():
+    """Clears counters and histograms; gauges (e.g. startup times) are kept."""
+    global _started
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+        _hosts.clear()
+        _started = time.time()
+
+def snapshot() -> Dict[str, Any]:
+    """
+    All metrics as plain data: gauges and counters with their values, histograms
+    with count, mean, estimated p50/p95/p99 and max (milliseconds).
+    """
+    def ms(seconds: Optional[float]) -> Optional[float]:
+        return None if seconds is None else round(seconds * 1000, 1)
+
+    with _lock:
+        counters = sorted(_counters.items())
+        gauges = sorted(_gauges.items())
+        histograms = [(key, h.count, h.sum, h.max, h.quantile(0.5), h.quantile(0.95), h.quantile(0.99))
+                      for key, h in sorted(_histograms.items())]
+    result: Dict[str, Any] = {"uptime_seconds": round(time.time() - _started, 1), "gauges": {}, "counters": {}, "histograms": {}}
+    for (name, labels), value in gauges:
+        result["gauges"].setdefault(name, []).append({**dict(labels), "value": round(value, 4)})
+    for (name, labels), value in counters:
+        result["counters"].setdefault(name, []).append({**dict(labels), "value": value})
+    for (name, labels), count, total, slowest, p50, p95, p99 in histograms:
+        result["histograms"].setdefault(name, []).append({
+            **dict(labels),
+            "count": count,
+            "mean_ms": ms(total / count) if count else None,
+            "p50_ms": ms(p50),
+            "p95_ms": ms(p95),
+            "p99_ms": ms(p99),
+            "max_ms": ms(slowest),
+        })
+    return result
+
+def _format_labels(labels: Labels, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    items = labels + extra
+    if not items:
+        return ""
+    escaped = (v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in items)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + "}"
+
+def render_prometheus() -> str:
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    with _lock:
+        counters = sorted(_counters.items())
+        gauges = sorted(_gauges.items())
+        histograms = [(key, list(h.counts), h.sum, h.count) for key, h in sorted(_histograms.items())]
+
+    lines: List[str] = []
+    seen = set()
+
+    def header(name: str, kind: str):
+        if name not in seen:
+            seen.add(name)
+            lines.append(f"# HELP {name} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} {kind}")
+
+    for (name, labels), value in gauges:
+        header(name, "gauge")
+        lines.append(f"{name}{_format_labels(labels)} {value:.6f}")
+    for (name, labels), value in counters:
+        header(name, "counter")
+        lines.append(f"{name}{_format_labels(labels)} {value:.15g}")
+    for (name, labels), counts, total, count in histograms:
+        header(name, "histogram")
+        cumulative = 0
+        for bound, n in zip(LATENCY_BUCKETS + (float('inf'),), counts):
+            cumulative += n
+            le = "+Inf" if bound == float('inf') else f"{bound:g}"
+            lines.append(f"{name}_bucket{_format_labels(labels, (('le', le),))} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {total:.6f}")
+        lines.append(f"{name}_count{_format_labels(labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def start_http_server(port: int, addr: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serves GET /metrics in Prometheus text format from a daemon thread."""
+    server = ThreadingHTTPServer((addr, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="seo-metrics", daemon=True).start()
+    return server
@@ -0,0 +1,133 @@
+import hashlib
+from array import array
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+_MASK32 = 0xFFFFFFFF
+_EMPTY = _MASK32 + 1
+# Offset mixed into values borrowed from another bin, so filled bins differ per position
+_FILL_STEP = 0x9E3779B1
+
+def _hash64(data: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'big')
+
+def minhash_signature(tokens: List[str], num_perm: int = 60, shingle_size: int = 5) -> Optional[array]:
+    """
+    MinHash signature of the page's word shingles, as `num_perm` uint32 values.
+
+    Uses one-permutation hashing: every shingle is hashed once and lands in
+    one of `num_perm` bins, each keeping its minimum. Empty bins borrow the
+    next non-empty bin's value, so cost is linear in the page length rather
+    than `num_perm` times it. Two signatures agree in roughly the fraction of
+    positions equal to the Jaccard similarity of the pages' shingle sets.
+
+    Returns None when there is no text to sign.
+    """
+    if not tokens:
+        return None
+    if len(tokens) < shingle_size:
+        shingle_size = len(tokens)
+
+    mins = [_EMPTY] * num_perm
+    for i in range(len(tokens) - shingle_size + 1):
+        h = _hash64(' '.join(tokens[i:i + shingle_size]).encode('utf-8', 'surrogatepass'))
+        b = h % num_perm
+        value = h >> 32
+        if value < mins[b]:
+            mins[b] = value
+
+    if _EMPTY in mins:
+        original = list(mins)
+        for i in range(num_perm):
+            if original[i] != _EMPTY:
+                continue
+            # Rotate right to the next originally filled bin (wrapping around)
+            distance = 1
+            while original[(i + distance) % num_perm] == _EMPTY:
+                distance += 1
+            mins[i] = (original[(i + distance) % num_perm] + distance * _FILL_STEP) & _MASK32
+    return array('I', mins)
+
+def similarity(a: array, b: array) -> float:
+    """Estimated Jaccard similarity of two signatures of equal length."""
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+class NearDuplicateIndex:
+    """
+    Locality-sensitive hashing index over MinHash signatures.
+
+    Each signature is cut into `bands` bands; pages sharing any band key
+    become candidates and are confirmed against `threshold` on the full
+    signature. Band keys are 64-bit hashes kept in flat arrays, and
+    candidates are found by sorting each band's keys, so memory is about
+    (4 * num_perm + 8 * bands) bytes per page and clustering is
+    O(n log n) with no pairwise comparison across the whole set.
+    """
+
+    def __init__(self, num_perm: int = 60, bands: int = 10, threshold: float = 0.8):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.urls: List[str] = []
+        self.signatures = array('I')
+        self.band_keys = [array('Q') for _ in range(bands)]
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    def add(self, url: str, signature: array):
+        self.urls.append(url)
+        self.signatures.extend(signature)
+        for band in range(self.bands):
+            start = band * self.rows
+            key = _hash64(band.to_bytes(1, 'big') + signature[start:start + self.rows].tobytes())
+            self.band_keys[band].append(key)
+
+    def _signature(self, i: int) -> array:
+        return self.signatures[i * self.num_perm:(i + 1) * self.num_perm]
+
+    def clusters(self, max_urls: int = 50) -> List[Dict[str, Any]]:
+        """
+        Groups of near-duplicate pages, largest first.
+
+        Each cluster lists at most `max_urls` URLs; `size` is the full count.
+        """
+        parent = list(range(len(self.urls)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for keys in self.band_keys:
+            order = sorted(range(len(keys)), key=keys.__getitem__)
+            run_start = 0
+            for pos in range(1, len(order) + 1):
+                if pos < len(order) and keys[order[pos]] == keys[order[run_start]]:
+                    continue
+                # Confirm each bucket member against the bucket's first page
+                leader = order[run_start]
+                leader_sig = None
+                for member in order[run_start + 1:pos]:
+                    a, b = find(leader), find(member)
+                    if a == b:
+                        continue
+                    if leader_sig is None:
+                        leader_sig = self._signature(leader)
+                    if similarity(leader_sig, self._signature(member)) >= self.threshold:
+                        parent[b] = a
+                run_start = pos
+
+        groups: Dict[int, List[int]] = defaultdict(list)
+        for i in range(len(self.urls)):
+            groups[find(i)].append(i)
+        clusters = [members for members in groups.values() if len(members) > 1]
+        clusters.sort(key=len, reverse=True)
+        return [{
+            "size": len(members),
+            "urls": [self.urls[i] for i in members[:max_urls]],
+        } for members in clusters]
@@ -0,0 +1,5 @@
+from typing import Awaitable, Callable
+
+# Progress callback: (done, total) -> awaitable. Lives here rather than in a
+# provider so modules can share it without importing each other.
+ProgressCallback = Callable[[int, int], Awaitable[None]]
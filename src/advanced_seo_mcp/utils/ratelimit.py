@@ -0,0 +1,32 @@
+import asyncio
+import threading
+import time
+
+class TokenBucket:
+    """
+    Async token-bucket limiter: `capacity` calls at once, refilled at `rate`
+    tokens per second. Callers reserve a token up front and sleep until it
+    is due, so waiters are served in arrival order without polling. It is
+    not bound to an event loop.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Takes one token and returns how many seconds to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+
+    async def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
@@ -0,0 +1,114 @@
+import asyncio
+import json
+import os
+import secrets
+import sqlite3
+import zlib
+from typing import Any, Callable, Dict, List, Optional
+from . import cache
+
+# How long full results stay fetchable by cursor
+RESULT_TTL = float(os.environ.get("SEO_RESULT_TTL_HOURS", 24)) * 3600
+# Items returned inline (and per fetch by default) in compact responses
+PAGE_SIZE = int(os.environ.get("SEO_RESULT_PAGE_SIZE", 20))
+# Items per stored chunk; a fetch reads only the chunks it needs
+CHUNK_ITEMS = 50
+
+def _pack(value: Any) -> bytes:
+    return zlib.compress(json.dumps(value, separators=(',', ':')).encode('utf-8'), 6)
+
+def _unpack(payload: bytes) -> Any:
+    return json.loads(zlib.decompress(payload))
+
+def store_items(items: List[Any], label: str) -> str:
+    """Stores a list for cursor paging and returns its result id."""
+    result_id = secrets.token_hex(8)
+    # Chunk 0 describes the set; items start at chunk 1
+    chunks = [_pack({"label": label, "total": len(items)})]
+    chunks += [_pack(items[i:i + CHUNK_ITEMS]) for i in range(0, len(items), CHUNK_ITEMS)]
+    cache.save_result_chunks(result_id, chunks, RESULT_TTL)
+    return result_id
+
+def make_cursor(result_id: str, offset: int) -> str:
+    return f"{result_id}:{offset}"
+
+def fetch_page(cursor: str, limit: int = PAGE_SIZE, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Reads the items a cursor points at.
+
+    Args:
+        cursor: "<result_id>:<offset>" as handed out by `paginate`.
+        limit: Max items to return.
+        fields: Keep only these top-level keys of each item.
+    """
+    result_id, _, offset = cursor.partition(':')
+    if not result_id or not offset.isdigit():
+        return {"error": f"Invalid cursor '{cursor}'."}
+    offset, limit = int(offset), max(1, limit)
+
+    first, last = 1 + offset // CHUNK_ITEMS, 1 + (offset + limit - 1) // CHUNK_ITEMS
+    try:
+        chunks = cache.get_result_chunks(result_id, 0, 0)
+        chunks.update(cache.get_result_chunks(result_id, first, last))
+    except sqlite3.Error as e:
+        return {"error": f"Could not read stored results: {e}"}
+    if 0 not in chunks:
+        return {"error": "Result set not found or expired; run the audit again."}
+    header = _unpack(chunks[0])
+    total = header["total"]
+
+    items: List[Any] = []
+    for n in range(first, last + 1):
+        if n not in chunks:
+            if (n - 1) * CHUNK_ITEMS < total:
+                return {"error": "Part of the result set was evicted; run the audit again."}
+            break
+        items.extend(_unpack(chunks[n]))
+    start = offset - (first - 1) * CHUNK_ITEMS
+    items = items[start:start + limit]
+    if fields:
+        items = [{k: item[k] for k in fields if k in item} if isinstance(item, dict) else item for item in items]
+
+    end = offset + len(items)
+    return {
+        "label": header["label"],
+        "total": total,
+        "offset": offset,
+        "items": items,
+        "next_cursor": make_cursor(result_id, end) if end < total else None,
+    }
+
+async def stash(items: List[Any], label: str) -> Optional[str]:
+    """Stores a list in a worker thread; returns a cursor to its start, or None if storing failed."""
+    try:
+        return make_cursor(await asyncio.to_thread(store_items, items, label), 0)
+    except sqlite3.Error:
+        return None
+
+async def paginate(container: Dict[str, Any], key: str, page_size: int = PAGE_SIZE,
+                   project: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None):
+    """
+    Replaces a long list in `container[key]` with its first `page_size` items
+    and stores the full list server-side. Paging details (total, cursors) are
+    added as `<key>_page`. With `project`, inline items are projected to a
+    compact form (error entries are kept as they are) and `full_cursor`
+    pages through the full items from the start.
+    """
+    items = container.get(key)
+    if not isinstance(items, list) or (len(items) <= page_size and project is None):
+        return
+    start = await stash(items, key)
+
+    inline = items[:page_size]
+    if project is not None:
+        inline = [item if not isinstance(item, dict) or "error" in item else project(item) for item in inline]
+    container[key] = inline
+    page = {"total": len(items), "returned": len(inline)}
+    if start is None:
+        page["error"] = "Could not store the full results; showing the first page only."
+    else:
+        result_id = start.partition(':')[0]
+        page["next_cursor"] = make_cursor(result_id, len(inline)) if len(inline) < len(items) else None
+        if project is not None:
+            page["full_cursor"] = start
+    container[f"{key}_page"] = page
@@ -0,0 +1,70 @@
+import string
+from collections import deque
+from typing import Dict, List
+
+_PUNCTUATION = str.maketrans('', '', string.punctuation)
+
+def tokenize(text: str) -> List[str]:
+    """Lowercases text, strips ASCII punctuation and splits on whitespace."""
+    return text.translate(_PUNCTUATION).lower().split()
+
+def content_words(tokens: List[str]) -> List[str]:
+    """Drops words of two characters or fewer (articles, prepositions, ...)."""
+    return [w for w in tokens if len(w) > 2]
+
+class PhraseMatcher:
+    """
+    Counts many keywords/phrases in one pass over a token stream.
+
+    An Aho-Corasick automaton whose alphabet is whole tokens rather than
+    characters: phrases only ever match on word boundaries ("seo" does not
+    match inside "seoul"), and overlapping phrases ("seo", "seo audit") are
+    all counted. Matching is linear in the number of tokens regardless of
+    how many phrases are tracked.
+    """
+
+    def __init__(self, phrases: List[str]):
+        self.phrases = phrases
+        self._goto: List[Dict[str, int]] = [{}]
+        self._out: List[List[int]] = [[]]
+        for index, phrase in enumerate(phrases):
+            tokens = tokenize(phrase)
+            if not tokens:
+                continue
+            state = 0
+            for token in tokens:
+                nxt = self._goto[state].get(token)
+                if nxt is None:
+                    nxt = self._goto[state][token] = len(self._goto)
+                    self._goto.append({})
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(index)
+
+        # Breadth-first failure links; each state also reports the phrases
+        # that end at its longest proper suffix.
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(token, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def count(self, tokens: List[str]) -> List[int]:
+        """Occurrences of each phrase (in constructor order) in `tokens`."""
+        goto, fail, out = self._goto, self._fail, self._out
+        counts = [0] * len(self.phrases)
+        state = 0
+        for token in tokens:
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            for index in out[state]:
+                counts[index] += 1
+        return counts
@@ -0,0 +1,35 @@
+import hashlib
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+def fingerprint(url: str) -> int:
+    """
+    64-bit fingerprint of a URL for compact seen-sets.
+
+    Storing ints instead of URL strings keeps dedupe memory at a fraction of
+    the URL size; the collision rate is negligible below billions of URLs.
+    """
+    digest = hashlib.blake2b(url.encode('utf-8', 'surrogatepass'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+def site_key(host: str) -> str:
+    """The site a host belongs to: lowercase, without "www." (example.com and www.example.com match)."""
+    host = host.lower()
+    return host[4:] if host.startswith('www.') else host
+
+def canonicalize(url: str) -> str:
+    """
+    Normalizes a URL for use as a cache/dedupe key: lowercases scheme and
+    host, drops default ports and fragments, and sorts query parameters.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if ':' in host:
+        host = f"[{host}]" # IPv6 literal
+    port = parts.port
+    if port and not ((scheme == 'http' and port == 80) or (scheme == 'https' and port == 443)):
+        host = f"{host}:{port}"
+    if parts.username:
+        host = f"{parts.username}{':' + parts.password if parts.password else ''}@{host}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or '/', query, ''))
@@ -0,0 +1,28 @@
+import random
+import threading
+from typing import List, Optional
+
+# User-Agent strings loaded once per process; fake_useragent re-reads its
+# dataset on every UserAgent() and re-filters it on every `.random`.
+_pool: Optional[List[str]] = None
+_lock = threading.Lock()
+
+def _load_pool() -> List[str]:
+    from fake_useragent import UserAgent
+
+    ua = UserAgent()
+    try:
+        # Same browser/OS/platform filter `.random` applies, evaluated once
+        agents = [entry["useragent"] for entry in ua._filter_useragents()]
+    except (AttributeError, KeyError, TypeError):
+        agents = list({ua.random for _ in range(50)})
+    return agents or [ua.fallback]
+
+def random_user_agent() -> str:
+    """Returns a random real-browser User-Agent from the shared pool."""
+    global _pool
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                _pool = _load_pool()
+    return random.choice(_pool)